@@ -11,7 +11,13 @@ Usage:
     python -m newsfeed --db EVENT --version V2 --start 2021-01-01-00-00-00 --end 2021-01-02-00-00-00 --use-cache
     python -m newsfeed --db EVENT --version V2 --start 2021-01-01-00-00-00 --end 2021-01-02-00-00-00 --incremental
     python -m newsfeed --db EVENT --version V2 --start 2021-01-01-00-00-00 --end 2021-01-02-00-00-00 --async
+    python -m newsfeed --db EVENT --version V2 --start 2021-01-01-00-00-00 --end 2021-01-02-00-00-00 --manifest
+    python -m newsfeed --db EVENT --version V2 --start 2021-01-01-00-00-00 --end 2021-01-02-00-00-00 --columns GLOBALEVENTID,SQLDATE,SOURCEURL
+    python -m newsfeed --db GKG --version V2 --start 2021-01-01-00-00-00 --end 2021-02-01-00-00-00 --stream
     
+    # Mirror Events V2 locally; later queries of the range read the mirror
+    python -m newsfeed sync --db EVENT --version V2 --since 2021-01-01-00-00-00
+
     # Download full text from URLs
     python -m newsfeed --fulltext --url "https://example.com/article" --output article.json
     python -m newsfeed --fulltext --input urls.txt --output fulltexts.csv
@@ -26,16 +32,19 @@ import json
 import sys
 import os
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 from tqdm import tqdm
 
 from newsfeed.news.db.events import EventV1, EventV2
 from newsfeed.news.db.gkg import GKGV1, GKGV2
 from newsfeed.news.db.others import GEG, VGEG, GDG, GFG, GAL, GSG
 from newsfeed.utils.fulltext import download, download_batch
+from newsfeed.utils.writers import write_frames
+from newsfeed.utils.cache import get_cache_manager
+from newsfeed.utils.mirror import get_mirror
 
 
-SUPPORTED_OUTPUT_FORMATS = ["csv", "json", "txt", "parquet"]
+SUPPORTED_OUTPUT_FORMATS = ["csv", "json", "ndjson", "txt", "parquet"]
 VERSIONED_DATABASES = ["EVENT", "GKG", "MENTIONS"]
 V3_DATABASES = ["GEG", "VGEG", "GDG", "GFG", "GAL", "GSG"]
 SUPPORTED_DATABASES = VERSIONED_DATABASES + V3_DATABASES
@@ -46,35 +55,29 @@ def save_results(results, output_path: str, output_format: str, allow_txt: bool
     Save query or full-text results to disk.
 
     Args:
-        results: A pandas DataFrame or a list of dictionaries.
+        results: A pandas DataFrame, a list of dictionaries, or an iterable
+            of DataFrames (e.g. from iter_query) that is written as it arrives.
         output_path: Destination file path.
-        output_format: csv, json, txt, or parquet.
+        output_format: csv, json, ndjson, txt, or parquet.
         allow_txt: Whether TXT output is valid for this result type.
 
     Returns:
         The format that was actually written.
     """
     output_format = output_format.lower()
-    if isinstance(results, pd.DataFrame):
-        df = results
+    if output_format not in SUPPORTED_OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    if isinstance(results, list) and (not results or isinstance(results[0], dict)):
+        records = results
+        frames = [pd.DataFrame(results)]
+    elif isinstance(results, pd.DataFrame):
         records = None
+        frames = [results]
     else:
-        records = results
-        df = pd.DataFrame(results)
+        records = None
+        frames = results
 
-    if output_format == "csv":
-        df.to_csv(output_path, index=False)
-        return "csv"
-    if output_format == "json":
-        if records is not None:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(records, f, ensure_ascii=False, indent=2)
-        else:
-            df.to_json(output_path, orient='records', force_ascii=False)
-        return "json"
-    if output_format == "parquet":
-        df.to_parquet(output_path, index=False)
-        return "parquet"
     if output_format == "txt":
         if allow_txt and records is not None and len(records) == 1 and records[0].get('success'):
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -82,10 +85,19 @@ def save_results(results, output_path: str, output_format: str, allow_txt: bool
             return "txt"
 
         print("Warning: TXT format is only supported for successful single URL full text downloads. Using CSV instead.")
-        df.to_csv(output_path, index=False)
-        return "csv"
+        output_format = "csv"
+
+    if output_format == "json" and records is not None:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        return "json"
+    if output_format == "parquet" and isinstance(results, pd.DataFrame):
+        # A materialised frame keeps its pandas dtypes in the file metadata
+        results.to_parquet(output_path, index=False)
+        return "parquet"
 
-    raise ValueError(f"Unsupported output format: {output_format}")
+    write_frames(frames, output_path, output_format)
+    return output_format
 
 
 def parse_date(version: str, date_str: str) -> str:
@@ -294,7 +306,62 @@ def read_urls_from_file(input_file: str, url_column: str = None) -> list:
     return urls
 
 
+def sync_main(argv: list):
+    """Fill the local Parquet mirror: python -m newsfeed sync ..."""
+    parser = argparse.ArgumentParser(
+        prog="python -m newsfeed sync",
+        description="Download EVENT/GKG/MENTIONS files into the local Parquet mirror. "
+                    "Queries whose range is fully mirrored are read from it.",
+    )
+    parser.add_argument("--db", type=str.upper, required=True, choices=VERSIONED_DATABASES,
+                        help="Database to mirror")
+    parser.add_argument("--version", type=str.upper, default="V2", choices=["V1", "V2"],
+                        help="Database version (default: V2)")
+    parser.add_argument("--since", type=str, required=True,
+                        help="First date to mirror (V1: YYYY-MM-DD, V2: YYYY-MM-DD-HH-MM-SS)")
+    parser.add_argument("--until", type=str, default=None,
+                        help="Last date to mirror (default: now)")
+    parser.add_argument("--mirror-dir", type=str, default=None,
+                        help="Mirror directory (default: ~/.cache/newsfeed/mirror)")
+    args = parser.parse_args(argv)
+
+    if args.db == "MENTIONS" and args.version == "V1":
+        parser.error("Mentions database is only available in V2")
+    if args.until is None:
+        args.until = datetime.now(timezone.utc).strftime("%Y-%m-%d" if args.version == "V1" else "%Y-%m-%d-%H-%M-%S")
+    try:
+        start_date = parse_date(args.version, args.since)
+        end_date = parse_date(args.version, args.until)
+    except argparse.ArgumentTypeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.db == "EVENT":
+        db = EventV1(start_date=start_date, end_date=end_date) if args.version == "V1" else \
+            EventV2(start_date=start_date, end_date=end_date, table="events", translation=False)
+    elif args.db == "GKG":
+        db = GKGV1(start_date=start_date, end_date=end_date) if args.version == "V1" else \
+            GKGV2(start_date=start_date, end_date=end_date, translation=False)
+    else:
+        db = EventV2(start_date=start_date, end_date=end_date, table="mentions", translation=False)
+
+    mirror = get_mirror(args.mirror_dir)
+    print(f"Syncing {args.db} {args.version} from {start_date} to {end_date} into {mirror.root}")
+    try:
+        stats = db.sync(mirror)
+    except KeyboardInterrupt:
+        print("\n\nSync interrupted by user.")
+        sys.exit(1)
+    print(f"Already mirrored: {stats['mirrored']}, downloaded: {stats['downloaded']}, "
+          f"failed: {stats['failed']}")
+    if stats["failed"]:
+        print("Failed files are retried by the next sync.")
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        return sync_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="Query GDELT Project databases and download full text articles",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -401,13 +468,39 @@ Examples:
         action="store_true",
         help="Use cached query results (90-95%% faster for repeated queries)"
     )
+
+    parser.add_argument(
+        "--cache-max-size",
+        type=float,
+        default=None,
+        help="Cache budget in MB; least recently used cache files are evicted beyond it"
+    )
     
+    parser.add_argument(
+        "--mirror-dir",
+        type=str,
+        default=None,
+        help="Local mirror filled by 'python -m newsfeed sync' (default: ~/.cache/newsfeed/mirror)"
+    )
+
     parser.add_argument(
         "--incremental",
         action="store_true",
-        help="Use incremental query mode (only download new files, 80-90%% faster for updates)"
+        help="Use incremental query mode: return the whole window, downloading only files not stored yet (80-90%% faster for updates)"
     )
     
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help="Only request files listed in GDELT's masterfilelist.txt (V2 EVENT/GKG/MENTIONS)"
+    )
+
+    parser.add_argument(
+        "--verify-checksums",
+        action="store_true",
+        help="Check V2 downloads and cached files against the size and MD5 in GDELT's manifest (implies --manifest)"
+    )
+
     parser.add_argument(
         "--force-redownload",
         action="store_true",
@@ -420,6 +513,20 @@ Examples:
         dest="use_async",
         help="Use async concurrent downloads (3-5x faster)"
     )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Stream each EVENT/GKG/MENTIONS file and parse it in chunks of this many rows to bound memory"
+    )
+
+    parser.add_argument(
+        "--columns",
+        type=str,
+        default=None,
+        help="Comma-separated EVENT/GKG/MENTIONS columns to parse and return, e.g. GLOBALEVENTID,SQLDATE,SOURCEURL"
+    )
     
     # Full text download arguments
     parser.add_argument(
@@ -461,6 +568,12 @@ Examples:
     )
     
     # Output arguments
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write results to the output file file by file as they are downloaded, in bounded memory"
+    )
+
     parser.add_argument(
         "--format",
         type=str.lower,
@@ -537,6 +650,20 @@ Examples:
     if not args.db:
         parser.error("--db is required for database query")
 
+    if args.stream:
+        if args.format == "txt":
+            parser.error("--stream does not support --format txt")
+        if args.download_fulltext:
+            parser.error("--stream cannot be combined with --download-fulltext")
+        if args.db == "GAL" and args.rss:
+            parser.error("--stream cannot be combined with --rss")
+
+    columns = None
+    if args.columns:
+        if args.db not in VERSIONED_DATABASES:
+            parser.error("--columns is only supported for EVENT/GKG/MENTIONS queries")
+        columns = [column.strip() for column in args.columns.split(",") if column.strip()]
+
     if args.db in VERSIONED_DATABASES:
         if not args.version or not args.start or not args.end:
             parser.error("--db, --version, --start, and --end are required for EVENT/GKG/MENTIONS queries")
@@ -601,11 +728,19 @@ Examples:
     print(f"Output File:   {args.output}")
     print(f"Use Cache:     {args.use_cache}")
     print(f"Incremental:   {args.incremental}")
+    print(f"Manifest:      {args.manifest}")
+    print(f"Verify MD5:    {args.verify_checksums}")
     print(f"Force Reload:  {args.force_redownload}")
     print(f"Use Async:     {args.use_async}")
+    print(f"Stream:        {args.stream}")
     print(f"Download Fulltext: {args.download_fulltext}")
     print(f"{'='*60}\n")
     
+    if args.cache_max_size is not None:
+        get_cache_manager(max_bytes=int(args.cache_max_size * 1024 * 1024))
+    if args.mirror_dir is not None:
+        get_mirror(args.mirror_dir)
+    
     try:
         # Initialize appropriate database class
         if args.db == "EVENT":
@@ -613,23 +748,25 @@ Examples:
                 db = EventV1(start_date=start_date, end_date=end_date,
                            use_cache=args.use_cache, use_incremental=args.incremental,
                            force_redownload=args.force_redownload, use_async=args.use_async,
-                           output_format=args.format)
+                           output_format=args.format, chunk_size=args.chunk_size)
             else:  # V2
                 db = EventV2(start_date=start_date, end_date=end_date, table="events", translation=False,
                            use_cache=args.use_cache, use_incremental=args.incremental,
                            force_redownload=args.force_redownload, use_async=args.use_async,
-                           output_format=args.format)
+                           output_format=args.format, chunk_size=args.chunk_size,
+                           use_manifest=args.manifest, verify_checksums=args.verify_checksums)
         elif args.db == "GKG":
             if args.version == "V1":
                 db = GKGV1(start_date=start_date, end_date=end_date,
                            use_cache=args.use_cache, use_incremental=args.incremental,
                            force_redownload=args.force_redownload, use_async=args.use_async,
-                           output_format=args.format)
+                           output_format=args.format, chunk_size=args.chunk_size)
             else:  # V2
                 db = GKGV2(start_date=start_date, end_date=end_date, translation=False,
                            use_cache=args.use_cache, use_incremental=args.incremental,
                            force_redownload=args.force_redownload, use_async=args.use_async,
-                           output_format=args.format)
+                           output_format=args.format, chunk_size=args.chunk_size,
+                           use_manifest=args.manifest, verify_checksums=args.verify_checksums)
         elif args.db == "MENTIONS":
             if args.version == "V1":
                 print("Error: Mentions database is only available in V2")
@@ -638,7 +775,8 @@ Examples:
                 db = EventV2(start_date=start_date, end_date=end_date, table="mentions", translation=False,
                            use_cache=args.use_cache, use_incremental=args.incremental,
                            force_redownload=args.force_redownload, use_async=args.use_async,
-                           output_format=args.format)
+                           output_format=args.format, chunk_size=args.chunk_size,
+                           use_manifest=args.manifest, verify_checksums=args.verify_checksums)
         elif args.db == "GEG":
             db = GEG(start_date=start_date, end_date=end_date,
                      use_cache=args.use_cache, use_incremental=args.incremental,
@@ -648,22 +786,23 @@ Examples:
                       use_cache=args.use_cache, use_incremental=args.incremental,
                       force_redownload=args.force_redownload, use_async=args.use_async)
         elif args.db == "GDG":
-            if args.incremental or args.use_async:
-                print("Warning: GDG does not support --incremental or --async; ignoring those options.")
+            if args.incremental:
+                print("Warning: GDG does not support --incremental; ignoring that option.")
             db = GDG(query_date=start_date, use_cache=args.use_cache,
-                     force_redownload=args.force_redownload)
+                     force_redownload=args.force_redownload, use_async=args.use_async)
         elif args.db == "GFG":
-            if args.incremental or args.use_async:
-                print("Warning: GFG does not support --incremental or --async; ignoring those options.")
+            if args.incremental:
+                print("Warning: GFG does not support --incremental; ignoring that option.")
             db = GFG(query_date=start_date, use_cache=args.use_cache,
-                     force_redownload=args.force_redownload)
+                     force_redownload=args.force_redownload, use_async=args.use_async)
         elif args.db == "GAL":
-            if args.incremental or args.use_async:
-                print("Warning: GAL does not support --incremental or --async; ignoring those options.")
+            if args.incremental:
+                print("Warning: GAL does not support --incremental; ignoring that option.")
             db = GAL(start_date=start_date or "2020-01-01-00-01-00",
                      end_date=end_date,
                      use_cache=args.use_cache,
-                     force_redownload=args.force_redownload)
+                     force_redownload=args.force_redownload,
+                     use_async=args.use_async)
         elif args.db == "GSG":
             db = GSG(start_date=start_date,
                      end_date=end_date,
@@ -676,8 +815,20 @@ Examples:
         
         # Query the database
         print(f"Starting query...\n")
+        if args.stream:
+            frames = db.iter_query(columns=columns) if columns else db.iter_query()
+            rows = write_frames(frames, args.output, args.format)
+            print("\nQuery completed successfully!")
+            print(f"Streamed {rows} records to: {os.path.abspath(args.output)}")
+            print(f"\n{'='*60}")
+            print("Done!")
+            print(f"{'='*60}\n")
+            return
+
         if args.db == "GAL" and args.rss:
             results = db.query_rss_feed()
+        elif columns:
+            results = db.query(columns=columns)
         else:
             results = db.query()
         
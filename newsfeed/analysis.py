@@ -84,7 +84,7 @@ def actor_activity_trends(df, actor_cols=("Actor1Name", "Actor2Name"), date_col=
     top = actors["actor"].value_counts().head(top_n).index
     return (
         actors[actors["actor"].isin(top)]
-        .groupby(["actor", pd.Grouper(key="date", freq=freq)])
+        .groupby(["actor", pd.Grouper(key="date", freq=freq)], observed=True)
         .size()
         .reset_index(name="activity_count")
     )
@@ -172,7 +172,7 @@ def theme_evolution_over_time(df, theme_col="THEMES", date_col="DATE", freq="D",
         return pd.DataFrame(columns=["date", "theme", "count"])
     return (
         pd.DataFrame(rows).dropna()
-        .groupby(["theme", pd.Grouper(key="date", freq=freq)])
+        .groupby(["theme", pd.Grouper(key="date", freq=freq)], observed=True)
         .size()
         .reset_index(name="count")
     )
@@ -241,7 +241,7 @@ def actor_relationship_network(df, actor1_col="Actor1Name", actor2_col="Actor2Na
     edges = df[[actor1_col, actor2_col]].dropna()
     edges = edges[(edges[actor1_col] != "") & (edges[actor2_col] != "")]
     return (
-        edges.groupby([actor1_col, actor2_col])
+        edges.groupby([actor1_col, actor2_col], observed=True)
         .size()
         .reset_index(name="weight")
         .rename(columns={actor1_col: "source", actor2_col: "target"})
@@ -291,7 +291,7 @@ def event_cascade_analysis(df, date_col="SQLDATE", event_col="EventCode", freq="
     return (
         pd.DataFrame({"date": dates, "event": df[event_col]})
         .dropna()
-        .groupby(["event", pd.Grouper(key="date", freq=freq)])
+        .groupby(["event", pd.Grouper(key="date", freq=freq)], observed=True)
         .size()
         .reset_index(name="count")
     )
@@ -362,7 +362,7 @@ def sentiment_heatmap_data(df, region_col="ActionGeo_CountryCode", tone_col="Avg
     return (
         pd.DataFrame({"region": df[region_col], "sentiment": values})
         .dropna()
-        .groupby("region")["sentiment"]
+        .groupby("region", observed=True)["sentiment"]
         .agg(["mean", "count"])
         .reset_index()
         .rename(columns={"mean": "avg_sentiment"})
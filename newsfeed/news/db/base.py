@@ -0,0 +1,135 @@
+"""
+Granule cache, incremental history and local mirror shared by the database classes
+author: Terence Junjie LIU
+date: 2026
+"""
+from typing import Optional
+
+import pandas as pd
+
+from newsfeed.utils.cache import get_cache_manager
+from newsfeed.utils.incremental import (get_incremental_manager, split_downloads,
+                                        checkpoint_downloads)
+from newsfeed.utils.predicates import apply_where, parse_columns
+
+
+class GranuleStore(object):
+    """
+    Serve the files of a query from the local mirror and the granule cache
+
+    Subclasses set ``granule_key = (db_type, version)``, which also keys
+    their incremental history, and ``mirror_key`` if they can be mirrored.
+    Queries then run in four steps: ``_mirrored`` tells whether the mirror
+    holds the whole range, ``_plan_downloads`` splits the files into
+    cached granules and files to download, ``_cache_downloads`` and
+    ``_checkpoint`` store each download as it arrives, and
+    ``_save_history`` records the outcome of the query.
+
+    Incremental queries keep every file in the granule store, so they
+    return the whole window while only downloading what is missing:
+    new files, files whose last download failed and files evicted from
+    the cache since they were downloaded.
+    """
+    granule_key = None
+    mirror_key = None
+    # Query projection and filter; only the Events and GKG classes set them
+    selected_columns = None
+    where = None
+    verify_checksums = False
+
+    def _init_storage(self, use_cache: bool, use_incremental: bool,
+                      force_redownload: bool) -> None:
+        """Set up the granule cache and the incremental history of a query"""
+        self.use_cache = use_cache or use_incremental
+        self.use_incremental = use_incremental
+        self.force_redownload = force_redownload
+        self.cache_manager = get_cache_manager() if self.use_cache else None
+        self.incremental_manager = get_incremental_manager() if use_incremental else None
+
+    def _checksum(self, url: str) -> Optional[str]:
+        """MD5 a file is verified against, if any"""
+        return None
+
+    def _history_params(self) -> dict:
+        """Query parameters recorded with the incremental history"""
+        return dict(start_date=self.start_date, end_date=self.end_date)
+
+    def _mirrored(self, download_url_list: list) -> bool:
+        """Whether the local mirror holds every file of the query"""
+        return (self.mirror_key is not None and not self.force_redownload
+                and self.mirror.covers(download_url_list, *self.mirror_key))
+
+    def _read_mirror(self, download_url_list: list):
+        """Read the files of the query from the local mirror, filtered"""
+        print("[+] Reading {} files from the local mirror...".format(len(download_url_list)))
+        for df in self.mirror.read(download_url_list, *self.mirror_key,
+                                   columns=parse_columns(self.selected_columns, self.where)):
+            yield apply_where(df, self.where)
+
+    def _split_granules(self, download_url_list: list):
+        """Split the query files into cached granules and files to download"""
+        checksums = {url: self._checksum(url) for url in download_url_list} \
+            if self.verify_checksums else None
+        cached, missing = self.cache_manager.split_granules(
+            download_url_list, *self.granule_key, checksums=checksums)
+        if cached:
+            print("[+] Loading {} of {} files from cache...".format(
+                len(cached), len(download_url_list)))
+        return cached, missing
+
+    def _plan_downloads(self, download_url_list: list):
+        """
+        Split the query files into cached granules and files to download
+
+        Returns:
+            Tuple of (cached files, files to download)
+        """
+        cached_files = []
+        if self.use_cache and not self.force_redownload:
+            cached_files, download_url_list = self._split_granules(download_url_list)
+        if self.use_incremental and not download_url_list:
+            print("[+] No new files to download (incremental mode)")
+        return cached_files, download_url_list
+
+    def _load_granules(self, cached_files: list):
+        """Read the cached granules of some query files, filtered"""
+        for url in cached_files:
+            df = self.cache_manager.get_granule(
+                url, *self.granule_key,
+                read_columns=parse_columns(self.selected_columns, self.where))
+            if df is not None:
+                yield apply_where(df, self.where)
+
+    def _cache_granule(self, df: pd.DataFrame, url: str) -> pd.DataFrame:
+        """Cache a fully parsed file, then prune it to the columns the query needs"""
+        self.cache_manager.set_granule(df, url, *self.granule_key,
+                                       checksum=self._checksum(url))
+        usecols = parse_columns(self.selected_columns, self.where)
+        return df if usecols is None else df[usecols]
+
+    def _cache_downloads(self, downloaded):
+        """Cache the files parsed by the async downloader, then filter them"""
+        for df in downloaded:
+            if isinstance(df, pd.DataFrame) and self.use_cache:
+                df = apply_where(self._cache_granule(df, df.attrs["source_file"]), self.where)
+            yield df
+
+    def _checkpoint(self, downloaded):
+        """Record the downloaded files in the incremental history as they arrive"""
+        db_type, version = self.granule_key
+        return checkpoint_downloads(downloaded, self.incremental_manager,
+                                    db_type=db_type, version=version)
+
+    def _save_history(self, download_url_list: list) -> None:
+        """Record which of the downloaded files succeeded and which failed"""
+        if not self.use_incremental:
+            return
+        db_type, version = self.granule_key
+        downloaded_files, failed_files = split_downloads(download_url_list, self.bytes_fetched)
+        self.incremental_manager.save_query_history(
+            downloaded_files,
+            failed_files=failed_files,
+            db_type=db_type,
+            version=version,
+            **self._history_params()
+        )
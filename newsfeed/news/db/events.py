@@ -5,27 +5,38 @@ modified: Sat 05 Jan, 2022
 updated: 2026 - Performance optimizations
 """
 import time
-import tqdm
-import requests
+import itertools
 import pandas as pd
 from lxml import html
 import multiprocessing
 from datetime import datetime, timedelta, timezone
-from fake_useragent import UserAgent
 from typing import Optional
 from tenacity import retry, stop_after_attempt
 
-from newsfeed.utils.cache import get_cache_manager
-from newsfeed.utils.incremental import get_incremental_manager
-from newsfeed.utils.async_downloader import run_async_download
+from newsfeed.utils.mirror import get_mirror
+from newsfeed.utils.manifest import get_manifest_index
+from newsfeed.utils.async_downloader import iter_async_download, DEFAULT_MAX_CONCURRENT
+from newsfeed.utils.stream import iter_pool, rebatch
+from newsfeed.utils.download import (tag_download, bytes_fetched, open_body,
+                                     get_session, worker_user_agent, verify_body,
+                                     ChecksumMismatch, return_last_error)
+from newsfeed.utils.decoders import read_zip_tsv, concat_frames
+from newsfeed.utils.predicates import normalize_where, apply_where, parse_columns
+from newsfeed.news.db.base import GranuleStore
+from newsfeed.news.db.schema import (EVENTS_V1_DTYPES, EVENTS_V2_DTYPES,
+                                     MENTIONS_V2_DTYPES, validate_columns)
 
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
-class EventV1(object):
+class EventV1(GranuleStore):
     base_url = "http://data.gdeltproject.org/events/"
     cpu_num = multiprocessing.cpu_count() * 2
+    max_concurrent = DEFAULT_MAX_CONCURRENT
+    parse_executor = "thread"
+    granule_key = ("EVENT", "V1")
+    mirror_key = ("EVENT", "V1", "events")
 
     columns_name = [
         'GLOBALEVENTID', 'SQLDATE', 'MonthYear', 'Year', 'FractionDate',
@@ -55,23 +66,46 @@ class EventV1(object):
                  use_incremental: bool = False,
                  force_redownload: bool = False,
                  use_async: bool = False,
-                 output_format: str = "csv"):
+                 output_format: str = "csv",
+                 chunk_size: int = None):
         self.start_date = "".join(start_date.split("-"))
         self.end_date = "".join(end_date.split("-"))
         self.proxy = proxy
-        self.use_cache = use_cache
-        self.use_incremental = use_incremental
-        self.force_redownload = force_redownload
+        self._init_storage(use_cache, use_incremental, force_redownload)
         self.use_async = use_async
         self.output_format = output_format
-        self.cache_manager = get_cache_manager() if use_cache else None
-        self.incremental_manager = get_incremental_manager() if use_incremental else None
+        self.chunk_size = chunk_size
+        self.mirror = get_mirror()
+        self.bytes_fetched = {}
+        self.selected_columns = None
+        self.where = None
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
+    def _read_options(self) -> dict:
+        # Cached granules keep every column
+        usecols = None if self.use_cache else parse_columns(self.selected_columns, self.where)
+        return {"names": self.columns_name, "dtype": EVENTS_V1_DTYPES,
+                "usecols": usecols}
+
+    def _output_columns(self) -> list:
+        return self.selected_columns or self.columns_name
+
+    def _project(self, results: pd.DataFrame) -> pd.DataFrame:
+        if self.selected_columns is None:
+            results.columns = self.columns_name
+            return results
+        return results[self.selected_columns]
+
+    def _iter_frames(self, downloaded):
+        self.bytes_fetched = {}
+        for df in downloaded:
+            if isinstance(df, pd.DataFrame):
+                self.bytes_fetched.update(bytes_fetched([df]))
+                yield self._project(df)
+
     @retry(stop=stop_after_attempt(3))
     def _query_list(self) -> list:
         download_url_list = [
@@ -80,8 +114,26 @@ class EventV1(object):
         ]
         return download_url_list
 
-    @retry(stop=stop_after_attempt(3))
     def _download_file(self, url: str = "20200101.export.CSV.zip"):
+        """Download and parse one file, through the granule cache if enabled"""
+        if self.use_cache:
+            response_df = self.cache_manager.get_or_compute_granule(
+                url, *self.granule_key,
+                compute=lambda: self._fetch_file(url),
+                read_columns=parse_columns(self.selected_columns, self.where),
+                refresh=self.force_redownload)
+        else:
+            response_df = self._fetch_file(url)
+        if isinstance(response_df, pd.DataFrame) and self.use_cache:
+            if "source_file" not in response_df.attrs:
+                # Cached by another worker while this one waited
+                response_df = tag_download(response_df, url, 0)
+            # Granules keep every row; fresh files are filtered while parsing
+            response_df = apply_where(response_df, self.where)
+        return response_df
+
+    @retry(stop=stop_after_attempt(3))
+    def _fetch_file(self, url: str):
         """
         fixed: add retry mechanism
         fixed: replace write_bad_lines with on_bad_lines
@@ -89,115 +141,179 @@ class EventV1(object):
         download_url = self.base_url + url
         time.sleep(0.0005)
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=10)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=10,
+                                         stream=self.chunk_size is not None)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
             else:
-                response_df = pd.read_csv(download_url,
-                                          compression="zip",
-                                          sep="\t",
-                                          header=None,
-                                          on_bad_lines='skip',
-                                          low_memory=False)
-                return response_df
+                response_text, num_bytes = open_body(
+                    response, streaming=self.chunk_size is not None)
+                response_df = read_zip_tsv(response_text,
+                                           chunk_size=self.chunk_size,
+                                           where=None if self.use_cache else self.where,
+                                           **self._read_options())
+                response_text.close()
+                return tag_download(response_df, url, num_bytes)
 
         except Exception as e:
             return e
 
-    def query(self):
+    def query(self, columns: list = None, where: list = None):
+        """
+        Query Events V1 files between start_date and end_date
+
+        Args:
+            columns: Only parse and return these columns (default: all)
+            where: Row filter applied to each file before concatenation,
+                see ``newsfeed.utils.predicates``
+        """
+        self.selected_columns = validate_columns(columns, self.columns_name)
+        self.where = normalize_where(where, self.columns_name)
         download_url_list = self._query_list()
         
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="EVENT",
-                version="V1",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
+        # Serve the whole range from the local mirror when it has every file
+        if self._mirrored(download_url_list):
+            self.bytes_fetched = {}
+            return self._project(concat_frames(list(self._read_mirror(download_url_list))))
         
-        # Apply incremental query
-        if self.use_incremental and not self.force_redownload:
-            all_files = download_url_list
-            new_files = self.incremental_manager.get_new_files(
-                all_files,
-                db_type="EVENT",
-                version="V1",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
-            if len(new_files) == 0:
-                print("[+] No new files to download (incremental mode)")
-                return pd.DataFrame(columns=self.columns_name)
-            download_url_list = new_files
+        # Serve the files already cached as granules
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
         
         # Use async download if enabled
-        if self.use_async:
+        if not download_url_list:
+            downloaded_dfs = []
+        elif self.use_async:
             print("[+] Using async download...")
-            downloaded_dfs, errors = run_async_download(
+            downloaded_dfs = list(self._checkpoint(self._cache_downloads(iter_async_download(
                 self.base_url,
                 download_url_list,
-                max_concurrent=20,
-                proxy=self.proxy
-            )
+                max_concurrent=self.max_concurrent,
+                parse_executor=self.parse_executor,
+                proxy=self.proxy,
+                chunk_size=self.chunk_size,
+                read_csv_kwargs=self._read_options(),
+                where=None if self.use_cache else self.where
+            ))))
+            errors = [df for df in downloaded_dfs if not isinstance(df, pd.DataFrame)]
             if errors:
                 print(f"[+] {len(errors)} files failed to download")
         else:
             # Original synchronous download
-            pool = multiprocessing.Pool(self.cpu_num)
             try:
                 print("[+] Downloading... [startdate={} & enddate={}]".format(
                     self.start_date, self.end_date))
-                downloaded_dfs = list(
-                    tqdm.tqdm(pool.imap_unordered(self._download_file,
-                                                  download_url_list),
-                              total=len(download_url_list)))
-                pool.close()
-                pool.terminate()
-                pool.join()
+                downloaded_dfs = list(self._checkpoint(
+                    iter_pool(self._download_file, download_url_list, self.cpu_num)))
             except Exception as e:
                 return e
         
         # Process downloaded data
         downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        self.bytes_fetched = bytes_fetched(downloaded_dfs)
+        if self.bytes_fetched:
+            print("[+] Fetched {:.2f} MB in {} files".format(
+                sum(self.bytes_fetched.values()) / (1024 * 1024),
+                len(self.bytes_fetched)))
+        downloaded_dfs = list(self._load_granules(cached_files)) + downloaded_dfs
         if not downloaded_dfs:
             print("[+] No valid data downloaded")
-            return pd.DataFrame(columns=self.columns_name)
+            return pd.DataFrame(columns=self._output_columns())
         
-        results = pd.concat(downloaded_dfs)
+        results = concat_frames(downloaded_dfs)
         del downloaded_dfs
-        results.reset_index(drop=True, inplace=True)
-        results.columns = self.columns_name
-        
-        # Save to cache if enabled
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="EVENT",
-                              version="V1",
-                              start_date=self.start_date,
-                              end_date=self.end_date)
+        results = self._project(results)
         
         # Save incremental history if enabled
-        if self.use_incremental:
-            self.incremental_manager.save_query_history(
-                download_url_list,
-                db_type="EVENT",
-                version="V1",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
+        self._save_history(download_url_list)
         
         return results
 
-    def query_nowtime(self, date: str = None, max_lookback: int = 7):
+    def iter_query(self, columns: list = None, where: list = None,
+                   batch_rows: int = None):
+        """
+        Stream Events V1 files between start_date and end_date
+
+        DataFrames are yielded as the downloads complete instead of being
+        concatenated, so only one file (or batch) is held at a time. With
+        ``use_cache`` the files are served from and saved to the granule
+        cache as in ``query()``.
+
+        Args:
+            columns: Only parse and return these columns (default: all)
+            where: Row filter applied to each file,
+                see ``newsfeed.utils.predicates``
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the same columns and dtypes as ``query()``
+        """
+        self.selected_columns = validate_columns(columns, self.columns_name)
+        self.where = normalize_where(where, self.columns_name)
+        download_url_list = self._query_list()
+
+        if self._mirrored(download_url_list):
+            self.bytes_fetched = {}
+            yield from rebatch((self._project(df) for df in self._read_mirror(download_url_list)),
+                               batch_rows)
+            return
+
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
+
+        if not download_url_list:
+            downloaded = []
+        elif self.use_async:
+            print("[+] Using async download...")
+            downloaded = self._cache_downloads(iter_async_download(
+                self.base_url,
+                download_url_list,
+                max_concurrent=self.max_concurrent,
+                parse_executor=self.parse_executor,
+                proxy=self.proxy,
+                chunk_size=self.chunk_size,
+                read_csv_kwargs=self._read_options(),
+                where=None if self.use_cache else self.where
+            ))
+        else:
+            print("[+] Downloading... [startdate={} & enddate={}]".format(
+                self.start_date, self.end_date))
+            downloaded = iter_pool(self._download_file, download_url_list,
+                                   self.cpu_num)
+
+        cached = (self._project(df) for df in self._load_granules(cached_files))
+        yield from rebatch(itertools.chain(cached, self._iter_frames(self._checkpoint(downloaded))),
+                           batch_rows)
+
+        self._save_history(download_url_list)
+
+    def sync(self, mirror=None) -> dict:
+        """
+        Download every file between start_date and end_date into the local mirror
+
+        Files already mirrored are skipped. Later queries whose range is
+        fully mirrored read from it instead of the network.
+
+        Args:
+            mirror: Mirror to fill (default: the global mirror)
+
+        Returns:
+            Dictionary with the numbers of files already mirrored,
+            downloaded and failed
+        """
+        self.mirror = mirror or self.mirror
+        self.selected_columns = None
+        self.where = None
+        return self.mirror.sync(self, self._query_list())
+
+    def query_nowtime(self, date: str = None, max_lookback: int = 7,
+                      columns: list = None, where: list = None):
         """Query the nearest available daily Events V1 file."""
+        self.selected_columns = validate_columns(columns, self.columns_name)
+        self.where = normalize_where(where, self.columns_name)
         if date == None:
             dt = datetime.now(timezone.utc) - timedelta(days=1)
         else:
@@ -212,8 +328,7 @@ class EventV1(object):
             results = self._download_file(url=url)
             if isinstance(results, pd.DataFrame):
                 results.reset_index(drop=True, inplace=True)
-                results.columns = self.columns_name
-                return results
+                return self._project(results)
             last_error = results
             print(results)
 
@@ -224,9 +339,12 @@ class EventV1(object):
         )
 
 
-class EventV2(object):
+class EventV2(GranuleStore):
     cpu_num = multiprocessing.cpu_count() * 2
+    max_concurrent = DEFAULT_MAX_CONCURRENT
+    parse_executor = "thread"
     base_url = "http://data.gdeltproject.org/gdeltv2/"
+    granule_key = ("EVENT", "V2")
 
     columns_name_events = [
         'GLOBALEVENTID', 'SQLDATE', 'MonthYear', 'Year', 'FractionDate',
@@ -267,25 +385,98 @@ class EventV2(object):
                  use_incremental: bool = False,
                  force_redownload: bool = False,
                  use_async: bool = False,
-                 output_format: str = "csv"):
+                 output_format: str = "csv",
+                 chunk_size: int = None,
+                 use_manifest: bool = False,
+                 verify_checksums: bool = False):
         self.start_date = "".join(start_date.split("-"))
         self.end_date = "".join(end_date.split("-"))
         self.table = table
         self.translation = translation
         self.proxy = proxy
-        self.use_cache = use_cache
-        self.use_incremental = use_incremental
-        self.force_redownload = force_redownload
+        self._init_storage(use_cache, use_incremental, force_redownload)
         self.use_async = use_async
         self.output_format = output_format
-        self.cache_manager = get_cache_manager() if use_cache else None
-        self.incremental_manager = get_incremental_manager() if use_incremental else None
+        self.chunk_size = chunk_size
+        self.mirror = get_mirror()
+        # Only request the files GDELT lists in its master file list, and
+        # check downloads and cached granules against their size and MD5
+        self.use_manifest = use_manifest or verify_checksums
+        self.verify_checksums = verify_checksums
+        self.file_info = {}
+        self.bytes_fetched = {}
+        self.selected_columns = None
+        self.where = None
+
+    def __getstate__(self):
+        # Pool workers look files up in the manifest index instead of
+        # receiving the whole file list with every task
+        state = self.__dict__.copy()
+        state["file_info"] = {}
+        return state
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
+    def _history_params(self) -> dict:
+        return dict(start_date=self.start_date, end_date=self.end_date,
+                    table_type=self.table, translation=self.translation)
+
+    @property
+    def mirror_key(self) -> tuple:
+        return ("EVENT", "V2", self.table)
+
+    def _manifest_list(self) -> list:
+        """Files of the query that GDELT actually published, from the manifest index"""
+        kind = "export.CSV.zip" if self.table == "events" else "mentions.CSV.zip"
+        if self.translation:
+            kind = "translation." + kind
+        manifest = get_manifest_index()
+        manifest.refresh(translation=self.translation, proxy=self.proxy, until=self.end_date)
+        files = manifest.files(kind, self.start_date, self.end_date)
+        self.file_info = {file_name: (size, md5) for file_name, size, md5 in files}
+        print("[+] {} files listed by GDELT in the query range".format(len(files)))
+        return [file_name for file_name, _, _ in files]
+
+    def _expected(self, url: str) -> Optional[tuple]:
+        """Size and MD5 published for a file, when verifying checksums"""
+        if not self.verify_checksums:
+            return None
+        return self.file_info.get(url) or get_manifest_index().entry(url)
+
+    def _checksum(self, url: str) -> Optional[str]:
+        expected = self._expected(url)
+        return expected[1] if expected is not None else None
+
+    def _table_columns(self) -> list:
+        if self.table == "mentions":
+            return self.columns_name_mentions
+        return self.columns_name_events
+
+    def _read_options(self) -> dict:
+        dtypes = MENTIONS_V2_DTYPES if self.table == "mentions" else EVENTS_V2_DTYPES
+        # Cached granules keep every column
+        usecols = None if self.use_cache else parse_columns(self.selected_columns, self.where)
+        return {"names": self._table_columns(), "dtype": dtypes,
+                "usecols": usecols}
+
+    def _output_columns(self) -> list:
+        return self.selected_columns or self._table_columns()
+
+    def _project(self, results: pd.DataFrame) -> pd.DataFrame:
+        if self.selected_columns is None:
+            results.columns = self._table_columns()
+            return results
+        return results[self.selected_columns]
+
+    def _iter_frames(self, downloaded):
+        self.bytes_fetched = {}
+        for df in downloaded:
+            if isinstance(df, pd.DataFrame):
+                self.bytes_fetched.update(bytes_fetched([df]))
+                yield self._project(df)
+
     @retry(stop=stop_after_attempt(3))
     def _query_list(self) -> list:
 
@@ -294,6 +485,9 @@ class EventV2(object):
                 "Wrong table name, EventV2 is only used for querying Event and Mentions"
             )
 
+        elif self.use_manifest:
+            return self._manifest_list()
+
         else:
             if self.translation == True:
                 print("[+] Scraping data from GDELT Project...")
@@ -329,139 +523,214 @@ class EventV2(object):
                     ]
                     return download_url_list
 
-    @retry(stop=stop_after_attempt(3))
     def _download_file(self, url: str = "20220108160000.export.CSV.zip"):
+        """Download and parse one file, through the granule cache if enabled"""
+        if self.use_cache:
+            response_df = self.cache_manager.get_or_compute_granule(
+                url, *self.granule_key,
+                compute=lambda: self._fetch_file(url),
+                read_columns=parse_columns(self.selected_columns, self.where),
+                refresh=self.force_redownload,
+                checksum=self._checksum(url))
+        else:
+            response_df = self._fetch_file(url)
+        if isinstance(response_df, pd.DataFrame) and self.use_cache:
+            if "source_file" not in response_df.attrs:
+                # Cached by another worker while this one waited
+                response_df = tag_download(response_df, url, 0)
+            # Granules keep every row; fresh files are filtered while parsing
+            response_df = apply_where(response_df, self.where)
+        return response_df
+
+    @retry(stop=stop_after_attempt(3), retry_error_callback=return_last_error)
+    def _fetch_file(self, url: str):
         download_url = self.base_url + url
         time.sleep(0.0005)
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=10)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=10,
+                                         stream=self.chunk_size is not None)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
             else:
-                response_df = pd.read_csv(download_url,
-                                          compression="zip",
-                                          sep="\t",
-                                          header=None,
-                                          on_bad_lines='skip',
-                                          low_memory=False)
-                return response_df
-
+                response_text, num_bytes = open_body(
+                    response, streaming=self.chunk_size is not None)
+                expected = self._expected(url)
+                if expected is not None:
+                    verify_body(response_text, url, expected)
+                response_df = read_zip_tsv(response_text,
+                                           chunk_size=self.chunk_size,
+                                           where=None if self.use_cache else self.where,
+                                           **self._read_options())
+                response_text.close()
+                return tag_download(response_df, url, num_bytes)
+
+        except ChecksumMismatch as e:
+            # Truncated or corrupted download: fetch it again
+            print("[+] {}, downloading it again...".format(e))
+            raise
         except Exception as e:
             return e
 
-    def query(self):
+    def query(self, columns: list = None, where: list = None):
+        """
+        Query Events V2 or Mentions files between start_date and end_date
+
+        Args:
+            columns: Only parse and return these columns (default: all)
+            where: Row filter applied to each file before concatenation,
+                see ``newsfeed.utils.predicates``
+        """
+        self.selected_columns = validate_columns(columns, self._table_columns())
+        self.where = normalize_where(where, self._table_columns())
         download_url_list = self._query_list()
         
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="EVENT",
-                version="V2",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                table_type=self.table,
-                translation=self.translation
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
+        # Serve the whole range from the local mirror when it has every file
+        if self._mirrored(download_url_list):
+            self.bytes_fetched = {}
+            return self._project(concat_frames(list(self._read_mirror(download_url_list))))
         
-        # Apply incremental query
-        if self.use_incremental and not self.force_redownload:
-            all_files = download_url_list
-            new_files = self.incremental_manager.get_new_files(
-                all_files,
-                db_type="EVENT",
-                version="V2",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                table_type=self.table,
-                translation=self.translation
-            )
-            if len(new_files) == 0:
-                print("[+] No new files to download (incremental mode)")
-                if self.table == "events":
-                    return pd.DataFrame(columns=self.columns_name_events)
-                else:
-                    return pd.DataFrame(columns=self.columns_name_mentions)
-            download_url_list = new_files
+        # Serve the files already cached as granules
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
         
         # Use async download if enabled
-        if self.use_async:
+        if not download_url_list:
+            downloaded_dfs = []
+        elif self.use_async:
             print("[+] Using async download...")
-            downloaded_dfs, errors = run_async_download(
+            downloaded_dfs = list(self._checkpoint(self._cache_downloads(iter_async_download(
                 self.base_url,
                 download_url_list,
-                max_concurrent=20,
-                proxy=self.proxy
-            )
+                max_concurrent=self.max_concurrent,
+                parse_executor=self.parse_executor,
+                proxy=self.proxy,
+                chunk_size=self.chunk_size,
+                read_csv_kwargs=self._read_options(),
+                where=None if self.use_cache else self.where,
+                expected=self.file_info if self.verify_checksums else None
+            ))))
+            errors = [df for df in downloaded_dfs if not isinstance(df, pd.DataFrame)]
             if errors:
                 print(f"[+] {len(errors)} files failed to download")
         else:
             # Original synchronous download
-            pool = multiprocessing.Pool(self.cpu_num)
             try:
                 print("[+] Downloading... [startdate={} & enddate={}]".format(
                     self.start_date, self.end_date))
-                downloaded_dfs = list(
-                    tqdm.tqdm(pool.imap_unordered(self._download_file,
-                                                  download_url_list),
-                              total=len(download_url_list)))
-                pool.close()
-                pool.terminate()
-                pool.join()
+                downloaded_dfs = list(self._checkpoint(
+                    iter_pool(self._download_file, download_url_list, self.cpu_num)))
             except Exception as e:
                 return e
         
         # Process downloaded data
         downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        self.bytes_fetched = bytes_fetched(downloaded_dfs)
+        if self.bytes_fetched:
+            print("[+] Fetched {:.2f} MB in {} files".format(
+                sum(self.bytes_fetched.values()) / (1024 * 1024),
+                len(self.bytes_fetched)))
+        downloaded_dfs = list(self._load_granules(cached_files)) + downloaded_dfs
         if not downloaded_dfs:
             print("[+] No valid data downloaded")
-            if self.table == "events":
-                return pd.DataFrame(columns=self.columns_name_events)
-            else:
-                return pd.DataFrame(columns=self.columns_name_mentions)
+            return pd.DataFrame(columns=self._output_columns())
         
-        results = pd.concat(downloaded_dfs)
+        results = concat_frames(downloaded_dfs)
         del downloaded_dfs
-        results.reset_index(drop=True, inplace=True)
         
         # Set columns based on table type
-        if self.table == "events":
-            results.columns = self.columns_name_events
-        else:
-            results.columns = self.columns_name_mentions
-        
-        # Save to cache if enabled
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="EVENT",
-                              version="V2",
-                              start_date=self.start_date,
-                              end_date=self.end_date,
-                              table_type=self.table,
-                              translation=self.translation)
+        results = self._project(results)
         
         # Save incremental history if enabled
-        if self.use_incremental:
-            self.incremental_manager.save_query_history(
-                download_url_list,
-                db_type="EVENT",
-                version="V2",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                table_type=self.table,
-                translation=self.translation
-            )
+        self._save_history(download_url_list)
         
         return results
 
-    def query_nowtime(self, date: str = None, max_lookback: int = 8):
+    def iter_query(self, columns: list = None, where: list = None,
+                   batch_rows: int = None):
+        """
+        Stream Events V2 or Mentions files between start_date and end_date
+
+        DataFrames are yielded as the downloads complete instead of being
+        concatenated, so only one file (or batch) is held at a time. With
+        ``use_cache`` the files are served from and saved to the granule
+        cache as in ``query()``.
+
+        Args:
+            columns: Only parse and return these columns (default: all)
+            where: Row filter applied to each file,
+                see ``newsfeed.utils.predicates``
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the same columns and dtypes as ``query()``
+        """
+        self.selected_columns = validate_columns(columns, self._table_columns())
+        self.where = normalize_where(where, self._table_columns())
+        download_url_list = self._query_list()
+
+        if self._mirrored(download_url_list):
+            self.bytes_fetched = {}
+            yield from rebatch((self._project(df) for df in self._read_mirror(download_url_list)),
+                               batch_rows)
+            return
+
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
+
+        if not download_url_list:
+            downloaded = []
+        elif self.use_async:
+            print("[+] Using async download...")
+            downloaded = self._cache_downloads(iter_async_download(
+                self.base_url,
+                download_url_list,
+                max_concurrent=self.max_concurrent,
+                parse_executor=self.parse_executor,
+                proxy=self.proxy,
+                chunk_size=self.chunk_size,
+                read_csv_kwargs=self._read_options(),
+                where=None if self.use_cache else self.where,
+                expected=self.file_info if self.verify_checksums else None
+            ))
+        else:
+            print("[+] Downloading... [startdate={} & enddate={}]".format(
+                self.start_date, self.end_date))
+            downloaded = iter_pool(self._download_file, download_url_list,
+                                   self.cpu_num)
+
+        cached = (self._project(df) for df in self._load_granules(cached_files))
+        yield from rebatch(itertools.chain(cached, self._iter_frames(self._checkpoint(downloaded))),
+                           batch_rows)
+
+        self._save_history(download_url_list)
+
+    def sync(self, mirror=None) -> dict:
+        """
+        Download every file between start_date and end_date into the local mirror
+
+        Files already mirrored are skipped. Later queries whose range is
+        fully mirrored read from it instead of the network.
+
+        Args:
+            mirror: Mirror to fill (default: the global mirror)
+
+        Returns:
+            Dictionary with the numbers of files already mirrored,
+            downloaded and failed
+        """
+        self.mirror = mirror or self.mirror
+        self.selected_columns = None
+        self.where = None
+        return self.mirror.sync(self, self._query_list())
+
+    def query_nowtime(self, date: str = None, max_lookback: int = 8,
+                      columns: list = None, where: list = None):
         """Query the nearest available 15-minute Events V2 or Mentions file."""
+        self.selected_columns = validate_columns(columns, self._table_columns())
+        self.where = normalize_where(where, self._table_columns())
         if date == None:
             dt = datetime.now(timezone.utc)
         else:
@@ -470,7 +739,6 @@ class EventV2(object):
         rounded_dt = datetime(dt.year, dt.month, dt.day, dt.hour,
                               15 * (dt.minute // 15))
         last_error = None
-        columns = self.columns_name_mentions if self.table == "mentions" else self.columns_name_events
 
         for offset in range(max_lookback + 1):
             candidate_dt = rounded_dt - timedelta(minutes=15 * offset)
@@ -486,8 +754,7 @@ class EventV2(object):
             results = self._download_file(url=url)
             if isinstance(results, pd.DataFrame):
                 results.reset_index(drop=True, inplace=True)
-                results.columns = columns
-                return results
+                return self._project(results)
             last_error = results
             print(results)
 
@@ -5,30 +5,48 @@ updated: 2026 - Performance optimizations
 """
 import re
 import io
+import itertools
 import xml.etree.ElementTree as ET
 from multiprocessing.sharedctypes import Value
 import time
-import tqdm
-import requests
 import pandas as pd
 import multiprocessing
 from datetime import datetime, timedelta
-from fake_useragent import UserAgent
 from typing import Optional
 
 from tenacity import retry, stop_after_attempt
 
 from newsfeed.utils.cache import get_cache_manager
-from newsfeed.utils.incremental import get_incremental_manager
-from newsfeed.utils.async_downloader import run_async_download
+from newsfeed.utils.async_downloader import (run_async_download, iter_async_download,
+                                             DEFAULT_MAX_CONCURRENT)
+from newsfeed.utils.decoders import payload_for
+from newsfeed.utils.download import (tag_download, bytes_fetched, track_downloads,
+                                     get_session, worker_user_agent)
+from newsfeed.utils.stream import iter_pool, rebatch
+from newsfeed.news.db.base import GranuleStore
 
 import warnings
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
-class GEG(object):
+def _fetch_snapshot_async(base_url: str, file_name: str, proxy: Optional[dict], payload: str,
+                          error: str, read_csv_kwargs: Optional[dict] = None):
+    """Download one snapshot file with the async engine, or return a ValueError"""
+    downloaded_dfs, errors = run_async_download(
+        base_url, [file_name], proxy=proxy, show_progress=False,
+        read_csv_kwargs=read_csv_kwargs, payload=payload)
+    if not downloaded_dfs:
+        return ValueError(error)
+    result = downloaded_dfs[0]
+    result.attrs = {}
+    return result
+
+
+class GEG(GranuleStore):
     cpu_num = multiprocessing.cpu_count() * 2
+    max_concurrent = DEFAULT_MAX_CONCURRENT
+    granule_key = ("GEG", "V3")
     columns_name = [
         'date', 'url', 'lang', 'polarity', 'magnitude', 'score', 'entities'
     ]
@@ -44,16 +62,11 @@ class GEG(object):
         self.start_date = "".join(start_date.split("-")) + "000000"
         self.end_date = "".join(end_date.split("-")) + "000000"
         self.proxy = proxy
-        self.use_cache = use_cache
-        self.use_incremental = use_incremental
-        self.force_redownload = force_redownload
+        self._init_storage(use_cache, use_incremental, force_redownload)
         self.use_async = use_async
-        self.cache_manager = get_cache_manager() if use_cache else None
-        self.incremental_manager = get_incremental_manager() if use_incremental else None
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
     @retry(stop=stop_after_attempt(3))
@@ -75,8 +88,21 @@ class GEG(object):
                 end_date, url_list))
         return download_url_list
 
+    def _download_file(self, url: str):
+        """Download and parse one file, through the granule cache if enabled"""
+        if not self.use_cache:
+            return self._fetch_file(url)
+        response_df = self.cache_manager.get_or_compute_granule(
+            url, *self.granule_key,
+            compute=lambda: self._fetch_file(url),
+            refresh=self.force_redownload)
+        if isinstance(response_df, pd.DataFrame) and "source_file" not in response_df.attrs:
+            # Cached by another worker while this one waited
+            response_df = tag_download(response_df, url, 0)
+        return response_df
+
     @retry(stop=stop_after_attempt(3))
-    def _download_file(
+    def _fetch_file(
         self,
         url:
         str = "http://data.gdeltproject.org/gdeltv3/geg_gcnlapi/20160717144500.geg-gcnlapi.json.gz"
@@ -84,12 +110,12 @@ class GEG(object):
         download_url = url
         time.sleep(0.25)
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=10,
-                                    verify=False,
-                                    stream=True)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=10,
+                                         verify=False,
+                                         stream=True)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
@@ -100,7 +126,7 @@ class GEG(object):
                                            lines=True)
                 response_text.flush()
                 response_text.close()
-                return response_df
+                return tag_download(response_df, url, len(response.content))
 
         except Exception as e:
             return e
@@ -108,63 +134,39 @@ class GEG(object):
     def query(self):
         download_url_list = self._query_list()
         
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="GEG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-        
-        # Apply incremental query
-        if self.use_incremental and not self.force_redownload:
-            all_files = download_url_list
-            new_files = self.incremental_manager.get_new_files(
-                all_files,
-                db_type="GEG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
-            if len(new_files) == 0:
-                print("[+] No new files to download (incremental mode)")
-                return pd.DataFrame(columns=self.columns_name)
-            download_url_list = new_files
+        # Serve the files already cached as granules
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
         
         # Use async download if enabled
-        if self.use_async:
+        if not download_url_list:
+            downloaded_dfs = []
+        elif self.use_async:
             print("[+] Using async download...")
-            downloaded_dfs, errors = run_async_download(
+            downloaded_dfs = list(self._checkpoint(self._cache_downloads(iter_async_download(
                 "",
                 download_url_list,
-                max_concurrent=10,
+                max_concurrent=self.max_concurrent,
                 proxy=self.proxy,
-                is_full_url=True
-            )
+                is_full_url=True,
+                payload=payload_for("GEG")
+            ))))
+            errors = [df for df in downloaded_dfs if not isinstance(df, pd.DataFrame)]
             if errors:
                 print(f"[+] {len(errors)} files failed to download")
         else:
             # Original synchronous download
-            pool = multiprocessing.Pool(self.cpu_num)
             try:
                 print("[+] Downloading... [startdate={} & enddate={}]".format(
                     self.start_date, self.end_date))
-                downloaded_dfs = list(
-                    tqdm.tqdm(pool.imap_unordered(self._download_file,
-                                                  download_url_list),
-                              total=len(download_url_list)))
-                pool.close()
-                pool.terminate()
-                pool.join()
+                downloaded_dfs = list(self._checkpoint(
+                    iter_pool(self._download_file, download_url_list, self.cpu_num)))
             except Exception as e:
                 return e
         
         # Process downloaded data
         downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        self.bytes_fetched = bytes_fetched(downloaded_dfs)
+        downloaded_dfs = list(self._load_granules(cached_files)) + downloaded_dfs
         if not downloaded_dfs:
             print("[+] No valid data downloaded")
             return pd.DataFrame(columns=self.columns_name)
@@ -174,30 +176,60 @@ class GEG(object):
         results.reset_index(drop=True, inplace=True)
         results.columns = self.columns_name
         
-        # Save to cache if enabled
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="GEG",
-                              version="V3",
-                              start_date=self.start_date,
-                              end_date=self.end_date)
-        
         # Save incremental history if enabled
-        if self.use_incremental:
-            self.incremental_manager.save_query_history(
-                download_url_list,
-                db_type="GEG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
+        self._save_history(download_url_list)
         
         return results
 
 
-class VGEG(object):
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream GEG files between start_date and end_date
+
+        DataFrames are yielded as the downloads complete instead of being
+        concatenated. With ``use_cache`` the files are served from and saved
+        to the granule cache as in ``query()``.
+
+        Args:
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the columns of ``query()``
+        """
+        download_url_list = self._query_list()
+
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
+
+        if self.use_async and download_url_list:
+            print("[+] Using async download...")
+            fetched = self._cache_downloads(iter_async_download(
+                "",
+                download_url_list,
+                max_concurrent=self.max_concurrent,
+                proxy=self.proxy,
+                is_full_url=True,
+                payload=payload_for("GEG")
+            ))
+        else:
+            print("[+] Downloading... [startdate={} & enddate={}]".format(
+                self.start_date, self.end_date))
+            fetched = iter_pool(self._download_file, download_url_list, self.cpu_num)
+        self.bytes_fetched = {}
+        downloaded = itertools.chain(
+            self._load_granules(cached_files),
+            track_downloads(self._checkpoint(fetched), self.bytes_fetched))
+        frames = (df.set_axis(self.columns_name, axis=1)
+                  for df in downloaded if isinstance(df, pd.DataFrame))
+        yield from rebatch(frames, batch_rows)
+
+        self._save_history(download_url_list)
+
+
+class VGEG(GranuleStore):
 
     base_url = "http://data.gdeltproject.org/gdeltv3/iatv/vgegv2/"
+    granule_key = ("VGEG", "V2")
     columns_name_vgeg = [
         'date', 'showOffset', 'iaShowId', 'station', 'showName', 'iaClipUrl',
         'iaThumbnailUrl', 'processedDate', 'numOCRChars', 'OCRText',
@@ -220,19 +252,18 @@ class VGEG(object):
         self.domain = domain
         self.raw = raw
         self.proxy = proxy
-        self.use_cache = use_cache
-        self.use_incremental = use_incremental
-        self.force_redownload = force_redownload
+        self._init_storage(use_cache, use_incremental, force_redownload)
         self.use_async = use_async
         self.cpu_num = multiprocessing.cpu_count() * 2
-        self.cache_manager = get_cache_manager() if use_cache else None
-        self.incremental_manager = get_incremental_manager() if use_incremental else None
+        self.max_concurrent = DEFAULT_MAX_CONCURRENT
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
+    def _history_params(self) -> dict:
+        return dict(query_date=self.query_date, domain=self.domain, raw=self.raw)
+
     def _query_list(self) -> list:
         url = self.base_url + self.query_date + ".txt"
         print("[+] Scraping data from GDELT Project...")
@@ -267,7 +298,20 @@ class VGEG(object):
                 else:
                     return download_url_list
 
-    def _download_file(
+    def _download_file(self, url: str):
+        """Download and parse one file, through the granule cache if enabled"""
+        if not self.use_cache:
+            return self._fetch_file(url)
+        response_df = self.cache_manager.get_or_compute_granule(
+            url, *self.granule_key,
+            compute=lambda: self._fetch_file(url),
+            refresh=self.force_redownload)
+        if isinstance(response_df, pd.DataFrame) and "source_file" not in response_df.attrs:
+            # Cached by another worker while this one waited
+            response_df = tag_download(response_df, url, 0)
+        return response_df
+
+    def _fetch_file(
         self,
         url:
         str = "http://data.gdeltproject.org/gdeltv3/iatv/vgegv2/BBCNEWS_20200601_000000_BBC_World_News.vgeg.v2.json.gz"
@@ -275,12 +319,12 @@ class VGEG(object):
         download_url = url
         time.sleep(0.25)
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=10,
-                                    verify=False,
-                                    stream=True)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=10,
+                                         verify=False,
+                                         stream=True)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
@@ -291,7 +335,7 @@ class VGEG(object):
                                            lines=True)
                 response_text.flush()
                 response_text.close()
-                return response_df
+                return tag_download(response_df, url, len(response.content))
 
         except Exception as e:
             return e
@@ -299,68 +343,39 @@ class VGEG(object):
     def query(self):
         download_url_list = self._query_list()
         
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="VGEG",
-                version="V2",
-                query_date=self.query_date,
-                domain=self.domain,
-                raw=self.raw
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-        
-        # Apply incremental query
-        if self.use_incremental and not self.force_redownload:
-            all_files = download_url_list
-            new_files = self.incremental_manager.get_new_files(
-                all_files,
-                db_type="VGEG",
-                version="V2",
-                query_date=self.query_date,
-                domain=self.domain,
-                raw=self.raw
-            )
-            if len(new_files) == 0:
-                print("[+] No new files to download (incremental mode)")
-                if self.raw:
-                    return pd.DataFrame(columns=self.columns_names_raw)
-                else:
-                    return pd.DataFrame(columns=self.columns_name_vgeg)
-            download_url_list = new_files
+        # Serve the files already cached as granules
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
         
         # Use async download if enabled
-        if self.use_async:
+        if not download_url_list:
+            downloaded_dfs = []
+        elif self.use_async:
             print("[+] Using async download...")
-            downloaded_dfs, errors = run_async_download(
+            downloaded_dfs = list(self._checkpoint(self._cache_downloads(iter_async_download(
                 "",
                 download_url_list,
-                max_concurrent=10,
+                max_concurrent=self.max_concurrent,
                 proxy=self.proxy,
-                is_full_url=True
-            )
+                is_full_url=True,
+                payload=payload_for("VGEG")
+            ))))
+            errors = [df for df in downloaded_dfs if not isinstance(df, pd.DataFrame)]
             if errors:
                 print(f"[+] {len(errors)} files failed to download")
         else:
             # Original synchronous download
-            pool = multiprocessing.Pool(self.cpu_num)
             try:
                 print("[+] Downloading... [startdate={}]".format(
                     self.query_date))
-                downloaded_dfs = list(
-                    tqdm.tqdm(pool.imap_unordered(self._download_file,
-                                                  download_url_list),
-                              total=len(download_url_list)))
-                pool.close()
-                pool.terminate()
-                pool.join()
+                downloaded_dfs = list(self._checkpoint(
+                    iter_pool(self._download_file, download_url_list, self.cpu_num)))
             except Exception as e:
                 return e
         
         # Process downloaded data
         downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        self.bytes_fetched = bytes_fetched(downloaded_dfs)
+        downloaded_dfs = list(self._load_granules(cached_files)) + downloaded_dfs
         if not downloaded_dfs:
             print("[+] No valid data downloaded")
             if self.raw:
@@ -376,29 +391,56 @@ class VGEG(object):
         else:
             results.columns = self.columns_name_vgeg
         
-        # Save to cache if enabled
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="VGEG",
-                              version="V2",
-                              query_date=self.query_date,
-                              domain=self.domain,
-                              raw=self.raw)
-        
         # Save incremental history if enabled
-        if self.use_incremental:
-            self.incremental_manager.save_query_history(
-                download_url_list,
-                db_type="VGEG",
-                version="V2",
-                query_date=self.query_date,
-                domain=self.domain,
-                raw=self.raw
-            )
+        self._save_history(download_url_list)
         
         return results
 
 
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream the VGEG files of query_date
+
+        DataFrames are yielded as the downloads complete instead of being
+        concatenated. With ``use_cache`` the files are served from and saved
+        to the granule cache as in ``query()``.
+
+        Args:
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the columns of ``query()``
+        """
+        download_url_list = self._query_list()
+
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
+
+        if self.use_async and download_url_list:
+            print("[+] Using async download...")
+            fetched = self._cache_downloads(iter_async_download(
+                "",
+                download_url_list,
+                max_concurrent=self.max_concurrent,
+                proxy=self.proxy,
+                is_full_url=True,
+                payload=payload_for("VGEG")
+            ))
+        else:
+            print("[+] Downloading... [startdate={}]".format(self.query_date))
+            fetched = iter_pool(self._download_file, download_url_list, self.cpu_num)
+        columns = self.columns_names_raw if self.raw else self.columns_name_vgeg
+        self.bytes_fetched = {}
+        downloaded = itertools.chain(
+            self._load_granules(cached_files),
+            track_downloads(self._checkpoint(fetched), self.bytes_fetched))
+        frames = (df.set_axis(columns, axis=1)
+                  for df in downloaded if isinstance(df, pd.DataFrame))
+        yield from rebatch(frames, batch_rows)
+
+        self._save_history(download_url_list)
+
+
 class GDG(object):
 
     base_url = "http://data.gdeltproject.org/gdeltv3/gdg/"
@@ -407,54 +449,66 @@ class GDG(object):
                  query_date: str = "2018-07-27-14-00-00",
                  proxy: dict = None,
                  use_cache: bool = False,
-                 force_redownload: bool = False):
+                 force_redownload: bool = False,
+                 use_async: bool = False):
         self.query_date = "".join(query_date.split("-"))
         self.proxy = proxy
         self.use_cache = use_cache
         self.force_redownload = force_redownload
+        self.use_async = use_async
         self.cache_manager = get_cache_manager() if use_cache else None
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
     def query(self):
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="GDG",
-                version="V3",
-                query_date=self.query_date
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-        
-        url = self.base_url + datetime.strftime(
+        if not self.use_cache:
+            return self._fetch_snapshot()
+        # Concurrent queries for the same snapshot download it once
+        return self.cache_manager.get_or_compute(
+            self._fetch_snapshot,
+            refresh=self.force_redownload,
+            db_type="GDG",
+            version="V3",
+            query_date=self.query_date)
+
+    def _file_name(self) -> str:
+        return datetime.strftime(
             datetime.strptime(self.query_date, "%Y%m%d%H%M%S") +
             timedelta(minutes=1), "%Y%m%d%H%M%S") + ".gdg.v3.json.gz"
-        response = requests.get(url,
-                                headers=self._generate_header(),
-                                proxies=self.proxy)
+
+    def _fetch_snapshot(self):
+        if self.use_async:
+            return _fetch_snapshot_async(
+                self.base_url, self._file_name(), self.proxy, payload_for("GDG"),
+                error="GDELT does not contains GDG data of date: {}".format(self.query_date))
+        url = self.base_url + self._file_name()
+        response = get_session().get(url,
+                                     headers=self._generate_header(),
+                                     proxies=self.proxy)
         if response.ok:
             response = io.BytesIO(response.content)
-            result = pd.read_json(response, compression="gzip", lines=True)
-            
-            # Save to cache if enabled
-            if self.use_cache:
-                self.cache_manager.set(result,
-                                  db_type="GDG",
-                                  version="V3",
-                                  query_date=self.query_date)
-            
-            return result
+            return pd.read_json(response, compression="gzip", lines=True)
         else:
             return ValueError(
                 "GDELT does not contains GDG data of date: {}".format(
                     self.query_date))
 
 
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream the GDG snapshot of query_date
+
+        The snapshot is a single file, so this yields the result of
+        ``query()`` (split into batches of ``batch_rows`` rows if given).
+        """
+        result = self.query()
+        if isinstance(result, Exception):
+            raise result
+        yield from rebatch([result], batch_rows)
+
+
 class GFG(object):
 
     base_url = "http://data.gdeltproject.org/gdeltv3/gfg/alpha/"
@@ -464,17 +518,18 @@ class GFG(object):
                  query_date: str = "2018-07-27-14-00-00",
                  proxy: dict = None,
                  use_cache: bool = False,
-                 force_redownload: bool = False):
+                 force_redownload: bool = False,
+                 use_async: bool = False):
         self.query_date = "".join(query_date.split("-"))
         self.proxy = proxy
         self.use_cache = use_cache
         self.force_redownload = force_redownload
+        self.use_async = use_async
         self.cache_manager = get_cache_manager() if use_cache else None
         self.latest_date()
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
     def latest_date(self):
@@ -488,36 +543,34 @@ class GFG(object):
                               "%Y-%m-%d-%H-%M-%S")))
 
     def query(self):
-        # Check cache first
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="GFG",
-                version="V3",
-                query_date=self.query_date
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-        
+        if not self.use_cache:
+            return self._fetch_snapshot()
+        # Concurrent queries for the same snapshot download it once
+        return self.cache_manager.get_or_compute(
+            self._fetch_snapshot,
+            refresh=self.force_redownload,
+            db_type="GFG",
+            version="V3",
+            query_date=self.query_date)
+
+    def _fetch_snapshot(self):
+        if self.use_async:
+            # header=0 drops the first line, as pd.read_csv does below
+            return _fetch_snapshot_async(
+                self.base_url, self.query_date + ".LINKS.TXT.gz", self.proxy,
+                payload_for("GFG"), read_csv_kwargs={"header": 0, "names": self.columns_name},
+                error="GDELT does not contains GFG data of date: {}".format(self.query_date))
         url = self.base_url + self.query_date + ".LINKS.TXT.gz"
-        response = requests.get(url,
-                                headers=self._generate_header(),
-                                proxies=self.proxy)
+        response = get_session().get(url,
+                                     headers=self._generate_header(),
+                                     proxies=self.proxy)
         if response.ok:
             print("[+] Loading...")
-            result = pd.read_csv(url,
+            result = pd.read_csv(io.BytesIO(response.content),
                                  compression="gzip",
                                  sep="\t",
                                  on_bad_lines="skip")
             result.columns = self.columns_name
-            
-            # Save to cache if enabled
-            if self.use_cache:
-                self.cache_manager.set(result,
-                                  db_type="GFG",
-                                  version="V3",
-                                  query_date=self.query_date)
-            
             return result
         else:
             return ValueError(
@@ -525,9 +578,25 @@ class GFG(object):
                     self.query_date))
 
 
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream the GFG snapshot of query_date
+
+        The snapshot is a single file, so this yields the result of
+        ``query()`` (split into batches of ``batch_rows`` rows if given).
+        """
+        result = self.query()
+        if isinstance(result, Exception):
+            raise result
+        yield from rebatch([result], batch_rows)
+
+
 class GAL(object):
     base_url = "http://data.gdeltproject.org/gdeltv3/gal/"
     rss_url = base_url + "feed.rss"
+    cpu_num = multiprocessing.cpu_count() * 2
+    max_concurrent = DEFAULT_MAX_CONCURRENT
+    granule_key = ("GAL", "V3")
     columns_name = [
         "date", "url", "domain", "outletName", "outletLogo",
         "outletTwitter", "title", "image", "desc", "lang", "author"
@@ -540,18 +609,19 @@ class GAL(object):
                  proxy: dict = None,
                  use_cache: bool = False,
                  force_redownload: bool = False,
-                 drop_duplicates: bool = True):
+                 drop_duplicates: bool = True,
+                 use_async: bool = False):
         self.start_date = "".join(start_date.split("-"))
         self.end_date = "".join(end_date.split("-")) if end_date else self.start_date
         self.proxy = proxy
         self.use_cache = use_cache
         self.force_redownload = force_redownload
         self.drop_duplicates = drop_duplicates
+        self.use_async = use_async
         self.cache_manager = get_cache_manager() if use_cache else None
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
     def _query_list(self) -> list:
@@ -564,11 +634,11 @@ class GAL(object):
     def _download_file(self, url: str = "20200101000100.gal.json.gz"):
         download_url = self.base_url + url
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=10,
-                                    stream=True)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=10,
+                                         stream=True)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
@@ -578,28 +648,61 @@ class GAL(object):
                                        lines=True)
             response_text.flush()
             response_text.close()
-            return response_df
+            return tag_download(response_df, url, len(response.content))
         except Exception as e:
             return e
 
+    def _read_file(self, url: str):
+        """Read a GAL file from the granule cache, or download it once"""
+        if not self.use_cache:
+            return self._download_file(url)
+        response_df = self.cache_manager.get_or_compute_granule(
+            url, *self.granule_key,
+            compute=lambda: self._download_file(url),
+            refresh=self.force_redownload)
+        if isinstance(response_df, pd.DataFrame) and "source_file" not in response_df.attrs:
+            # Served from the cache
+            response_df = tag_download(response_df, url, 0)
+        return response_df
+
+    def _iter_async(self, download_url_list: list):
+        """Cached granules, then the other files as the async engine downloads them"""
+        cached_files = []
+        if self.use_cache and not self.force_redownload:
+            cached_files, download_url_list = self.cache_manager.split_granules(
+                download_url_list, *self.granule_key)
+        for url in cached_files:
+            df = self.cache_manager.get_granule(url, *self.granule_key)
+            if df is not None:
+                yield tag_download(df, url, 0)
+        if not download_url_list:
+            return
+        for df in iter_async_download(self.base_url, download_url_list,
+                                      max_concurrent=self.max_concurrent,
+                                      proxy=self.proxy,
+                                      payload=payload_for("GAL")):
+            if isinstance(df, pd.DataFrame) and self.use_cache:
+                self.cache_manager.set_granule(df, df.attrs["source_file"], *self.granule_key)
+            yield df
+
+    def _iter_files(self, download_url_list: list):
+        """Downloaded (or cached) GAL files, or the errors of the failed ones"""
+        if self.use_async:
+            print("[+] Using async download...")
+            return self._iter_async(download_url_list)
+        if not download_url_list:
+            return iter([])
+        return iter_pool(self._read_file, download_url_list, self.cpu_num)
+
     def query(self):
         download_url_list = self._query_list()
 
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="GAL",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-
         print("[+] Downloading GAL files... [startdate={} & enddate={}]".format(
             self.start_date, self.end_date))
-        downloaded_dfs = [self._download_file(url) for url in download_url_list]
-        downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        downloaded_dfs = [df for df in self._iter_files(download_url_list)
+                          if isinstance(df, pd.DataFrame)]
+        # Files complete out of order; keep the minute order for drop_duplicates
+        downloaded_dfs.sort(key=lambda df: df.attrs.get("source_file", ""))
         if not downloaded_dfs:
             print("[+] No valid GAL data downloaded")
             return pd.DataFrame(columns=self.columns_name)
@@ -613,20 +716,48 @@ class GAL(object):
         if self.drop_duplicates and "url" in results.columns:
             results = results.drop_duplicates(subset=["url"]).reset_index(drop=True)
 
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="GAL",
-                              version="V3",
-                              start_date=self.start_date,
-                              end_date=self.end_date)
-
         return results
 
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream GAL files between start_date and end_date
+
+        Files are downloaded concurrently, on a process pool or with
+        ``use_async``, and yielded as they arrive. With ``drop_duplicates``
+        an article URL is only yielded the first time it is seen. With
+        ``use_cache`` the files are served from and saved to the granule
+        cache as in ``query()``.
+
+        Args:
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the columns of ``query()``
+        """
+        download_url_list = self._query_list()
+
+        print("[+] Downloading GAL files... [startdate={} & enddate={}]".format(
+            self.start_date, self.end_date))
+        yield from rebatch(self._iter_frames(self._iter_files(download_url_list)), batch_rows)
+
+    def _iter_frames(self, downloaded):
+        seen_urls = set()
+        for df in downloaded:
+            if not isinstance(df, pd.DataFrame):
+                continue
+            df = df.reindex(columns=self.columns_name)
+            if self.drop_duplicates:
+                df = df.drop_duplicates(subset=["url"])
+                df = df[~df["url"].isin(seen_urls)]
+                seen_urls.update(df["url"].dropna())
+            yield df
+
     def query_rss_feed(self):
-        response = requests.get(self.rss_url,
-                                headers=self._generate_header(),
-                                proxies=self.proxy,
-                                timeout=10)
+        response = get_session().get(self.rss_url,
+                                     headers=self._generate_header(),
+                                     proxies=self.proxy,
+                                     timeout=10)
         if not response.ok:
             return ValueError(
                 "GDELT GAL RSS feed request failed with status {}".format(
@@ -645,9 +776,11 @@ class GAL(object):
         return pd.DataFrame(rows, columns=self.rss_columns_name)
 
 
-class GSG(object):
+class GSG(GranuleStore):
     docembed_base_url = "http://data.gdeltproject.org/gdeltv3/gsg_docembed/"
     iatv_base_url = "http://data.gdeltproject.org/gdeltv3/gsg_iatvsentembed/"
+    max_concurrent = DEFAULT_MAX_CONCURRENT
+    granule_key = ("GSG", "V3")
 
     def __init__(self,
                  start_date: str = "2020-01-01-00-00-00",
@@ -667,19 +800,27 @@ class GSG(object):
         self.start_date = "".join(start_date.split("-"))
         self.end_date = "".join(end_date.split("-")) if end_date else self.start_date
         self.proxy = proxy
-        self.use_cache = use_cache
-        self.use_incremental = use_incremental
-        self.force_redownload = force_redownload
+        self._init_storage(use_cache, use_incremental, force_redownload)
         self.use_async = use_async
         self.cpu_num = multiprocessing.cpu_count() * 2
-        self.cache_manager = get_cache_manager() if use_cache else None
-        self.incremental_manager = get_incremental_manager() if use_incremental else None
 
     def _generate_header(self):
-        ua = UserAgent()
-        header = {"User-Agent": str(ua.random)}
+        header = {"User-Agent": worker_user_agent()}
         return header
 
+    def _history_params(self) -> dict:
+        return dict(start_date=self.start_date, end_date=self.end_date,
+                    dataset=self.dataset, station=self.station)
+
+    def _async_options(self) -> dict:
+        """Arguments of the async downloader for the files of _query_list"""
+        # docembed lists file names, iatvsentembed lists absolute URLs
+        return dict(base_url=self.docembed_base_url if self.dataset == "docembed" else "",
+                    is_full_url=self.dataset != "docembed",
+                    max_concurrent=self.max_concurrent,
+                    proxy=self.proxy,
+                    payload=payload_for("GSG"))
+
     def _query_list(self) -> list:
         if self.dataset == "docembed":
             return [
@@ -704,16 +845,29 @@ class GSG(object):
         return download_url_list
 
     def _download_file(self, url: str):
+        """Download and parse one file, through the granule cache if enabled"""
+        if not self.use_cache:
+            return self._fetch_file(url)
+        response_df = self.cache_manager.get_or_compute_granule(
+            url, *self.granule_key,
+            compute=lambda: self._fetch_file(url),
+            refresh=self.force_redownload)
+        if isinstance(response_df, pd.DataFrame) and "source_file" not in response_df.attrs:
+            # Cached by another worker while this one waited
+            response_df = tag_download(response_df, url, 0)
+        return response_df
+
+    def _fetch_file(self, url: str):
         if self.dataset == "docembed":
             download_url = self.docembed_base_url + url
         else:
             download_url = url
         try:
-            response = requests.get(download_url,
-                                    headers=self._generate_header(),
-                                    proxies=self.proxy,
-                                    timeout=15,
-                                    stream=True)
+            response = get_session().get(download_url,
+                                         headers=self._generate_header(),
+                                         proxies=self.proxy,
+                                         timeout=15,
+                                         stream=True)
             if response.status_code == 404:
                 return "GDELT does not contains this url: {}".format(url)
 
@@ -723,59 +877,36 @@ class GSG(object):
                                        lines=True)
             response_text.flush()
             response_text.close()
-            return response_df
+            return tag_download(response_df, url, len(response.content))
         except Exception as e:
             return e
 
     def query(self):
         download_url_list = self._query_list()
 
-        if self.use_cache and not self.force_redownload:
-            cached_data = self.cache_manager.get(
-                db_type="GSG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                dataset=self.dataset,
-                station=self.station
-            )
-            if cached_data is not None:
-                print("[+] Loading from cache...")
-                return cached_data
-
-        if self.use_incremental and not self.force_redownload:
-            new_files = self.incremental_manager.get_new_files(
-                download_url_list,
-                db_type="GSG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                dataset=self.dataset,
-                station=self.station
-            )
-            if len(new_files) == 0:
-                print("[+] No new files to download (incremental mode)")
-                return pd.DataFrame()
-            download_url_list = new_files
-
-        if self.use_async:
-            print("[+] GSG async download is not available for gzip JSON-lines; using synchronous download.")
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
 
-        pool = multiprocessing.Pool(self.cpu_num)
-        try:
-            print("[+] Downloading GSG files... [dataset={} startdate={} & enddate={}]".format(
-                self.dataset, self.start_date, self.end_date))
-            downloaded_dfs = list(
-                tqdm.tqdm(pool.imap_unordered(self._download_file,
-                                              download_url_list),
-                          total=len(download_url_list)))
-            pool.close()
-            pool.terminate()
-            pool.join()
-        except Exception as e:
-            return e
+        if not download_url_list:
+            downloaded_dfs = []
+        elif self.use_async:
+            print("[+] Using async download...")
+            downloaded_dfs = list(self._checkpoint(self._cache_downloads(iter_async_download(
+                file_names=download_url_list, **self._async_options()))))
+            errors = [df for df in downloaded_dfs if not isinstance(df, pd.DataFrame)]
+            if errors:
+                print(f"[+] {len(errors)} files failed to download")
+        else:
+            try:
+                print("[+] Downloading GSG files... [dataset={} startdate={} & enddate={}]".format(
+                    self.dataset, self.start_date, self.end_date))
+                downloaded_dfs = list(self._checkpoint(
+                    iter_pool(self._download_file, download_url_list, self.cpu_num)))
+            except Exception as e:
+                return e
 
         downloaded_dfs = [df for df in downloaded_dfs if isinstance(df, pd.DataFrame)]
+        self.bytes_fetched = bytes_fetched(downloaded_dfs)
+        downloaded_dfs = list(self._load_granules(cached_files)) + downloaded_dfs
         if not downloaded_dfs:
             print("[+] No valid GSG data downloaded")
             return pd.DataFrame()
@@ -783,28 +914,46 @@ class GSG(object):
         results = pd.concat(downloaded_dfs)
         results.reset_index(drop=True, inplace=True)
 
-        if self.use_cache:
-            self.cache_manager.set(results,
-                              db_type="GSG",
-                              version="V3",
-                              start_date=self.start_date,
-                              end_date=self.end_date,
-                              dataset=self.dataset,
-                              station=self.station)
-
-        if self.use_incremental:
-            self.incremental_manager.save_query_history(
-                download_url_list,
-                db_type="GSG",
-                version="V3",
-                start_date=self.start_date,
-                end_date=self.end_date,
-                dataset=self.dataset,
-                station=self.station
-            )
+        self._save_history(download_url_list)
 
         return results
 
+    def iter_query(self, batch_rows: int = None):
+        """
+        Stream GSG files between start_date and end_date
+
+        DataFrames are yielded as the downloads complete instead of being
+        concatenated. With ``use_cache`` the files are served from and saved
+        to the granule cache as in ``query()``.
+
+        Args:
+            batch_rows: Yield batches of this many rows instead of one
+                DataFrame per file
+
+        Yields:
+            DataFrames with the columns of ``query()``
+        """
+        download_url_list = self._query_list()
+
+        cached_files, download_url_list = self._plan_downloads(download_url_list)
+
+        if self.use_async and download_url_list:
+            print("[+] Using async download...")
+            fetched = self._cache_downloads(iter_async_download(
+                file_names=download_url_list, **self._async_options()))
+        else:
+            print("[+] Downloading GSG files... [dataset={} startdate={} & enddate={}]".format(
+                self.dataset, self.start_date, self.end_date))
+            fetched = iter_pool(self._download_file, download_url_list, self.cpu_num)
+        self.bytes_fetched = {}
+        downloaded = itertools.chain(
+            self._load_granules(cached_files),
+            track_downloads(self._checkpoint(fetched), self.bytes_fetched))
+        frames = (df for df in downloaded if isinstance(df, pd.DataFrame))
+        yield from rebatch(frames, batch_rows)
+
+        self._save_history(download_url_list)
+
 
 if __name__ == "__main__":
     # GDELT Global Entity Graph
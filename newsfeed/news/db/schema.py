@@ -0,0 +1,159 @@
+"""
+Column dtype registry for the GDELT Events and Mentions tables
+author: Terence Junjie LIU
+date: 2026
+
+Codes (CAMEO event/actor codes, country and ADM codes) are parsed as
+categoricals so they keep their leading zeros and are stored once per
+distinct value. Counts, scales and coordinates use the smallest dtype that
+holds them; IDs and timestamps use nullable integers so empty fields do not
+force a float64 column.
+"""
+from typing import Dict, List, Optional
+
+ID = "Int64"
+TIMESTAMP = "Int64"
+DATE = "Int32"
+COUNT = "Int32"
+FLAG = "Int8"
+CODE = "category"
+SCALE = "float32"
+COORDINATE = "float32"
+TEXT = "object"
+
+
+def _actor_dtypes(prefix: str) -> Dict[str, str]:
+    return {
+        prefix + "Code": CODE,
+        prefix + "Name": TEXT,
+        prefix + "CountryCode": CODE,
+        prefix + "KnownGroupCode": CODE,
+        prefix + "EthnicCode": CODE,
+        prefix + "Religion1Code": CODE,
+        prefix + "Religion2Code": CODE,
+        prefix + "Type1Code": CODE,
+        prefix + "Type2Code": CODE,
+        prefix + "Type3Code": CODE,
+    }
+
+
+def _geo_dtypes(prefix: str, adm2: bool) -> Dict[str, str]:
+    dtypes = {
+        prefix + "_Type": FLAG,
+        prefix + "_FullName": TEXT,
+        prefix + "_CountryCode": CODE,
+        prefix + "_ADM1Code": CODE,
+    }
+    if adm2:
+        dtypes[prefix + "_ADM2Code"] = CODE
+    dtypes.update({
+        prefix + "_Lat": COORDINATE,
+        prefix + "_Long": COORDINATE,
+        prefix + "_FeatureID": CODE,
+    })
+    return dtypes
+
+
+def _event_dtypes(adm2: bool) -> Dict[str, str]:
+    dtypes = {
+        "GLOBALEVENTID": ID,
+        "SQLDATE": DATE,
+        "MonthYear": DATE,
+        "Year": "Int16",
+        "FractionDate": "float64",
+    }
+    dtypes.update(_actor_dtypes("Actor1"))
+    dtypes.update(_actor_dtypes("Actor2"))
+    dtypes.update({
+        "IsRootEvent": FLAG,
+        "EventCode": CODE,
+        "EventBaseCode": CODE,
+        "EventRootCode": CODE,
+        "QuadClass": FLAG,
+        "GoldsteinScale": SCALE,
+        "NumMentions": COUNT,
+        "NumSources": COUNT,
+        "NumArticles": COUNT,
+        "AvgTone": SCALE,
+    })
+    for prefix in ["Actor1Geo", "Actor2Geo", "ActionGeo"]:
+        dtypes.update(_geo_dtypes(prefix, adm2))
+    dtypes.update({
+        "DATEADDED": TIMESTAMP,
+        "SOURCEURL": TEXT,
+    })
+    return dtypes
+
+
+EVENTS_V1_DTYPES = _event_dtypes(adm2=False)
+
+EVENTS_V2_DTYPES = _event_dtypes(adm2=True)
+
+MENTIONS_V2_DTYPES = {
+    "GLOBALEVENTID": ID,
+    "EventTimeDate": TIMESTAMP,
+    "MentionTimeDate": TIMESTAMP,
+    "MentionType": FLAG,
+    "MentionSourceName": CODE,
+    "Mentionidentifier": TEXT,
+    "SentenceID": COUNT,
+    "Actor1CharOffset": COUNT,
+    "Actor2CharOffset": COUNT,
+    "ActionCharOffset": COUNT,
+    "InRawText": FLAG,
+    "Confidence": FLAG,
+    "MentionDocLen": COUNT,
+    "MentionDocTone": SCALE,
+    "MentionDocTranslationInfo": CODE,
+    "Extras": TEXT,
+}
+
+SCHEMAS = {
+    ("EVENT", "V1", "events"): EVENTS_V1_DTYPES,
+    ("EVENT", "V2", "events"): EVENTS_V2_DTYPES,
+    ("EVENT", "V2", "mentions"): MENTIONS_V2_DTYPES,
+}
+
+
+def get_dtypes(db_type: str, version: str, table: str = "events") -> Dict[str, str]:
+    """
+    Look up the column dtypes of a GDELT table
+
+    Args:
+        db_type: Database type, e.g. EVENT
+        version: V1 or V2
+        table: events or mentions
+
+    Returns:
+        Dictionary of {column name: dtype}, in file column order
+    """
+    try:
+        return SCHEMAS[(db_type.upper(), version.upper(), table.lower())]
+    except KeyError:
+        raise ValueError("No schema registered for {} {} {}".format(
+            db_type, version, table))
+
+
+def validate_columns(columns: Optional[List[str]], available: List[str]) -> Optional[List[str]]:
+    """
+    Check a column projection against the columns of a table
+
+    Args:
+        columns: Requested columns, or None for all columns
+        available: Columns of the table
+
+    Returns:
+        The requested columns as a list, or None
+
+    Raises:
+        ValueError: If a requested column does not exist
+    """
+    if columns is None:
+        return None
+    if isinstance(columns, str):
+        columns = [columns]
+    unknown = [column for column in columns if column not in available]
+    if unknown:
+        raise ValueError("Unknown column(s): {}. Available columns: {}".format(
+            ", ".join(unknown), ", ".join(available)))
+    return list(columns)
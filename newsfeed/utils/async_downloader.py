@@ -8,39 +8,344 @@ import aiohttp
 import aiofiles
 import pandas as pd
 import io
-from typing import List, Optional, Tuple
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 from fake_useragent import UserAgent
 from tqdm.asyncio import tqdm
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from newsfeed.utils.download import tag_download, verify_body, ChecksumMismatch
+from newsfeed.utils.decoders import get_decoder, SPOOL_MAX_MEMORY, NETWORK_BLOCK_SIZE
 
 logger = logging.getLogger(__name__)
 
+# Ceiling and starting point of the adaptive number of concurrent downloads
+DEFAULT_MAX_CONCURRENT = 32
+DEFAULT_INITIAL_CONCURRENT = 4
+# HTTP statuses telling the server is overloaded or rate limiting
+CONGESTION_STATUSES = {429, 500, 502, 503, 504}
+# Where downloaded files are decompressed and parsed
+PARSE_EXECUTORS = ["thread", "process"]
+
+
+def _parse_body(body: Union[bytes, str, BinaryIO], decode: Callable[..., pd.DataFrame],
+                chunk_size: Optional[int], read_csv_kwargs: dict,
+                where: Optional[list]) -> pd.DataFrame:
+    """
+    Decompress, parse and filter one downloaded file, in a parse worker
+
+    Args:
+        body: The file as bytes, as a file object (thread workers) or as
+            the path of a spool file (process workers)
+        decode: Payload decoder, see ``newsfeed.utils.decoders.DECODERS``
+        chunk_size: Parse in chunks of this many rows
+        read_csv_kwargs: Extra options for the parser
+        where: Normalized row filter
+
+    Returns:
+        Parsed and filtered DataFrame
+    """
+    if isinstance(body, bytes):
+        body = io.BytesIO(body)
+    elif isinstance(body, str):
+        body = open(body, "rb")
+    try:
+        return decode(body, chunk_size=chunk_size, where=where, **read_csv_kwargs)
+    finally:
+        body.close()
+
+
+def _log_refetch(retry_state) -> None:
+    """tenacity ``before_sleep`` callback reporting a body fetched again"""
+    logger.warning(f"{retry_state.outcome.exception()}, downloading it again")
+
+
+def _full_urls(base_url: str, file_names: List[str], is_full_url: bool) -> List[str]:
+    if is_full_url:
+        return list(file_names)
+    return [base_url + fname for fname in file_names]
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on the number of concurrent downloads
+
+    Used like an ``asyncio.Semaphore`` whose size changes. Completions are
+    grouped in rounds of ``limit`` downloads. After each round the limit
+    grows by one if throughput improved on the previous round, and shrinks
+    by one if it fell, so the limit settles where the link is saturated.
+    A timeout, 429 or 5xx halves the limit at once. Further congestion
+    during the next round is then ignored, so one burst of errors only
+    halves it once.
+    """
+
+    def __init__(self, maximum: int = DEFAULT_MAX_CONCURRENT, minimum: int = 1,
+                 initial: Optional[int] = None, tolerance: float = 0.05,
+                 decrease: float = 0.5):
+        """
+        Initialize limiter
+
+        Args:
+            maximum: Highest number of concurrent downloads
+            minimum: Lowest number of concurrent downloads
+            initial: Starting limit (default: DEFAULT_INITIAL_CONCURRENT)
+            tolerance: Relative throughput change treated as noise
+            decrease: Factor applied to the limit on congestion
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.tolerance = tolerance
+        self.decrease = decrease
+        self.limit = self._clamp(initial if initial is not None else DEFAULT_INITIAL_CONCURRENT)
+        self.peak = self.limit
+        self.in_flight = 0
+        self._condition = None
+        self._last_rate = None
+        self._congested = False
+        self._start_round()
+
+    def _clamp(self, limit: int) -> int:
+        return max(self.minimum, min(self.maximum, limit))
+
+    def _set_limit(self, limit: int) -> None:
+        limit = self._clamp(limit)
+        if limit != self.limit:
+            logger.debug(f"Concurrent downloads: {self.limit} -> {limit}")
+        self.limit = limit
+        self.peak = max(self.peak, limit)
+
+    def _start_round(self) -> None:
+        self._round_start = time.monotonic()
+        self._round_bytes = 0
+        self._round_done = 0
+
+    async def __aenter__(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _complete(self, num_bytes: int) -> None:
+        self._round_bytes += num_bytes
+        self._round_done += 1
+        if self._round_done < self.limit:
+            return
+        rate = self._round_bytes / max(time.monotonic() - self._round_start, 1e-6)
+        if self._congested:
+            # First round after a backoff only sets the new baseline
+            self._congested = False
+        elif self._last_rate is None or rate > self._last_rate * (1 + self.tolerance):
+            self._set_limit(self.limit + 1)
+        elif rate < self._last_rate * (1 - self.tolerance):
+            self._set_limit(self.limit - 1)
+        self._last_rate = rate
+        self._start_round()
+
+    def success(self, num_bytes: int) -> None:
+        """Record a completed download of ``num_bytes``"""
+        self._complete(num_bytes)
+
+    def failure(self, congested: bool = False) -> None:
+        """
+        Record a failed download
+
+        Args:
+            congested: The failure was a timeout, 429 or 5xx
+        """
+        if not congested or self._congested:
+            # Missing files say nothing about the link
+            return
+        self._set_limit(int(self.limit * self.decrease))
+        logger.info(f"Server congestion, backing off to {self.limit} concurrent downloads")
+        self._congested = True
+        self._last_rate = None
+        self._start_round()
+
 
 class AsyncDownloader:
     """Asynchronous downloader for multiple files"""
     
-    def __init__(self, max_concurrent: int = 20, timeout: int = 30, 
-                 proxy: Optional[dict] = None, retry_times: int = 3):
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, timeout: int = 30, 
+                 proxy: Optional[dict] = None, retry_times: int = 3,
+                 chunk_size: Optional[int] = None,
+                 read_csv_kwargs: Optional[dict] = None,
+                 where: Optional[list] = None,
+                 adaptive: bool = True,
+                 parse_executor: str = "thread",
+                 parse_workers: Optional[int] = None,
+                 parse_queue: Optional[int] = None,
+                 payload: str = "zip_tsv",
+                 expected: Optional[Dict[str, Tuple[int, str]]] = None):
         """
         Initialize async downloader
         
         Args:
-            max_concurrent: Maximum number of concurrent downloads
+            max_concurrent: Maximum number of concurrent downloads; with
+                ``adaptive`` the number actually used is chosen between 1
+                and this from the observed throughput
             timeout: Request timeout in seconds
-            proxy: Proxy configuration
+            proxy: requests-style proxies, e.g. ``{"http": ..., "https": ...}``;
+                the proxy of each URL's scheme is used. Without it the
+                HTTP(S)_PROXY environment variables apply, as with requests
             retry_times: Number of retry attempts
+            chunk_size: Stream each body to a spool file and parse it in
+                chunks of this many rows (None buffers the whole body)
+            read_csv_kwargs: Extra options for the parser, e.g. the
+                ``names`` and ``dtype`` of the table
+            where: Normalized row filter applied to each parsed file
+            adaptive: Adapt the number of concurrent file downloads with
+                ``AdaptiveLimiter`` instead of always using ``max_concurrent``
+            parse_executor: Decompress and parse files on a ``"thread"``
+                or ``"process"`` pool, off the event loop
+            parse_workers: Size of the parse pool (default: CPU count)
+            parse_queue: Downloaded files allowed to wait for a parse
+                worker (default: parse_workers); downloads hold their slot
+                while the queue is full
+            payload: Format of the files, a key of
+                ``newsfeed.utils.decoders.DECODERS`` such as ``"zip_tsv"``
+                or ``"gzip_jsonl"``; see ``payload_for`` for each dataset
+            expected: ``{file name: (size, md5)}``; the bodies of these
+                files are checked against it before they are parsed
         """
+        if parse_executor not in PARSE_EXECUTORS:
+            raise ValueError("parse_executor must be one of {}".format(PARSE_EXECUTORS))
         self.max_concurrent = max_concurrent
         self.timeout = timeout
         self.proxy = proxy
         self.retry_times = retry_times
+        self.chunk_size = chunk_size
+        self.read_csv_kwargs = read_csv_kwargs or {}
+        self.where = where
+        self.adaptive = adaptive
+        self.limiter = None
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parse_queue = parse_queue if parse_queue is not None else self.parse_workers
+        self._executor = None
+        self._parse_slots = None
+        self.payload = payload
+        self.decode = get_decoder(payload)
+        self.expected = expected or {}
         self.ua = UserAgent()
     
+    def _new_limiter(self) -> AdaptiveLimiter:
+        """Concurrency limit for one batch of file downloads"""
+        if self.adaptive:
+            self.limiter = AdaptiveLimiter(maximum=self.max_concurrent)
+        else:
+            self.limiter = AdaptiveLimiter(maximum=self.max_concurrent,
+                                           minimum=self.max_concurrent,
+                                           initial=self.max_concurrent)
+        return self.limiter
+    
+    @contextmanager
+    def _parsers(self) -> Iterator[Executor]:
+        """Parse pool for one batch of downloads, shut down afterwards"""
+        if self.parse_executor == "process":
+            executor = ProcessPoolExecutor(self.parse_workers)
+        else:
+            executor = ThreadPoolExecutor(self.parse_workers, thread_name_prefix="newsfeed-parse")
+        self._executor = executor
+        # Created in the running event loop by the first download
+        self._parse_slots = None
+        try:
+            yield executor
+        finally:
+            self._executor = None
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _report_concurrency(self) -> None:
+        if self.adaptive and self.limiter is not None:
+            print("[+] Adaptive concurrency settled at {} downloads (peak {}, max {})".format(
+                self.limiter.limit, self.limiter.peak, self.max_concurrent))
+    
     def _generate_header(self) -> dict:
         """Generate random user agent header"""
         return {"User-Agent": str(self.ua.random)}
     
+    def _proxy_for(self, url: str) -> Optional[str]:
+        """Proxy URL for one request, picked from the requests-style proxies"""
+        if not self.proxy:
+            return None
+        scheme = urlparse(url).scheme
+        return self.proxy.get(scheme) or self.proxy.get("all")
+    
+    def _session(self, connector) -> aiohttp.ClientSession:
+        # trust_env reads HTTP(S)_PROXY like requests does
+        return aiohttp.ClientSession(connector=connector, trust_env=True)
+    
+    @retry(stop=stop_after_attempt(3), retry=retry_if_exception_type(ChecksumMismatch),
+           before_sleep=_log_refetch, reraise=True)
+    async def _fetch_body(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        name: Optional[str],
+        spool_path: Optional[str] = None
+    ) -> Tuple[int, Union[bytes, str, BinaryIO, None], int]:
+        """
+        Download the body of one file, fetching it again if it fails its checksum
+
+        Args:
+            session: aiohttp session
+            url: File URL
+            name: File name looked up in ``expected`` (default: url)
+            spool_path: Stream the body into this file, for process parse
+                workers; the caller removes it
+
+        Returns:
+            Tuple of (HTTP status, body, number of bytes); the body is None
+            unless the status is 200
+        """
+        async with session.get(
+            url, 
+            headers=self._generate_header(),
+            proxy=self._proxy_for(url),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as response:
+            if response.status != 200:
+                return response.status, None, 0
+            
+            # Read content
+            expected = self.expected.get(name or url)
+            if self.chunk_size is None:
+                body = await response.read()
+                if expected is not None:
+                    verify_body(io.BytesIO(body), name or url, expected)
+                return response.status, body, len(body)
+            
+            spool = open(spool_path, "w+b") if spool_path is not None else \
+                tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            try:
+                async for block in response.content.iter_chunked(NETWORK_BLOCK_SIZE):
+                    spool.write(block)
+                num_bytes = spool.tell()
+                if expected is not None:
+                    verify_body(spool, name or url, expected)
+            except BaseException:
+                spool.close()
+                raise
+            if spool_path is not None:
+                spool.close()
+                return response.status, spool_path, num_bytes
+            spool.seek(0)
+            return response.status, spool, num_bytes
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10)
@@ -49,7 +354,8 @@ class AsyncDownloader:
         self, 
         session: aiohttp.ClientSession, 
         url: str,
-        semaphore: asyncio.Semaphore
+        limiter: AdaptiveLimiter,
+        name: Optional[str] = None
     ) -> Tuple[str, Optional[pd.DataFrame], Optional[str]]:
         """
         Download a single file asynchronously
@@ -57,49 +363,75 @@ class AsyncDownloader:
         Args:
             session: aiohttp session
             url: File URL
-            semaphore: Semaphore for limiting concurrency
+            limiter: Limit on concurrent downloads, told how each one went
+            name: File name recorded as the source of the DataFrame
+                (default: url)
             
+        The body is downloaded in the event loop, up to three times if it
+        fails its checksum, and handed to the parse pool, so the next
+        downloads proceed while it is decompressed and parsed. The download
+        slot is kept until the parse queue has room.
+        
         Returns:
             Tuple of (url, dataframe, error_message)
         """
-        async with semaphore:
-            try:
-                async with session.get(
-                    url, 
-                    headers=self._generate_header(),
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status == 404:
+        if self._parse_slots is None:
+            self._parse_slots = asyncio.Semaphore(self.parse_workers + self.parse_queue)
+        parse_slots = self._parse_slots
+        spool_path = None
+        if self.chunk_size is not None and self.parse_executor == "process" \
+                and self._executor is not None:
+            # Process workers read the spool from disk
+            fd, spool_path = tempfile.mkstemp(prefix="newsfeed-")
+            os.close(fd)
+        try:
+            async with limiter:
+                try:
+                    status, body, num_bytes = await self._fetch_body(session, url, name, spool_path)
+                    if status == 404:
+                        limiter.failure()
                         return url, None, f"404 Not Found: {url}"
+                    if status != 200:
+                        limiter.failure(congested=status in CONGESTION_STATUSES)
+                        return url, None, f"HTTP {status}: {url}"
+                    limiter.success(num_bytes)
                     
-                    if response.status != 200:
-                        return url, None, f"HTTP {response.status}: {url}"
-                    
-                    # Read content
-                    content = await response.read()
-                    
-                    # Parse CSV from zip file
-                    df = pd.read_csv(
-                        io.BytesIO(content),
-                        compression="zip",
-                        sep="\t",
-                        header=None,
-                        on_bad_lines='skip',
-                        low_memory=False
-                    )
-                    
-                    return url, df, None
-                    
-            except asyncio.TimeoutError:
-                return url, None, f"Timeout: {url}"
+                    # Wait for room in the parse queue before giving up the download slot
+                    await parse_slots.acquire()
+                        
+                except ChecksumMismatch as e:
+                    limiter.failure()
+                    return url, None, f"Checksum mismatch: {e}"
+                except asyncio.TimeoutError:
+                    limiter.failure(congested=True)
+                    return url, None, f"Timeout: {url}"
+                except aiohttp.ClientError as e:
+                    limiter.failure(congested=True)
+                    return url, None, f"Error: {str(e)} - {url}"
+                except Exception as e:
+                    return url, None, f"Error: {str(e)} - {url}"
+            
+            # Decompress and parse the file off the event loop
+            try:
+                df = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _parse_body, body, self.decode, self.chunk_size,
+                    self.read_csv_kwargs, self.where)
             except Exception as e:
                 return url, None, f"Error: {str(e)} - {url}"
+            finally:
+                parse_slots.release()
+            return url, tag_download(df, name or url, num_bytes), None
+        finally:
+            # Also on errors and cancellation, whether or not the file was parsed
+            if spool_path is not None:
+                os.unlink(spool_path)
     
     async def download_files(
         self, 
         base_url: str, 
         file_names: List[str],
-        show_progress: bool = True
+        show_progress: bool = True,
+        is_full_url: bool = False
     ) -> Tuple[List[pd.DataFrame], List[Tuple[str, str]]]:
         """
         Download multiple files asynchronously
@@ -108,42 +440,159 @@ class AsyncDownloader:
             base_url: Base URL for files
             file_names: List of file names to download
             show_progress: Whether to show progress bar
+            is_full_url: The file names are absolute URLs; base_url is ignored
             
         Returns:
             Tuple of (list of dataframes, list of (url, error) tuples)
         """
-        full_urls = [base_url + fname for fname in file_names]
+        full_urls = _full_urls(base_url, file_names, is_full_url)
         
-        # Create semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(self.max_concurrent)
+        # Limit concurrency, adapting it to the throughput
+        limiter = self._new_limiter()
         
         # Create aiohttp session
         connector = aiohttp.TCPConnector(limit=self.max_concurrent)
         
-        async with aiohttp.ClientSession(connector=connector) as session:
-            tasks = []
-            for url in full_urls:
-                task = self._download_single_file(session, url, semaphore)
-                tasks.append(task)
+        with self._parsers():
+            async with self._session(connector) as session:
+                tasks = []
+                for url, name in zip(full_urls, file_names):
+                    task = self._download_single_file(session, url, limiter, name)
+                    tasks.append(task)
             
-            # Execute all tasks with progress bar
-            if show_progress:
-                results = await tqdm.gather(*tasks, total=len(tasks), desc="Downloading files")
-            else:
-                results = await asyncio.gather(*tasks)
+                # Execute all tasks with progress bar
+                if show_progress:
+                    results = await tqdm.gather(*tasks, total=len(tasks), desc="Downloading files")
+                else:
+                    results = await asyncio.gather(*tasks)
+                self._report_concurrency()
             
-            # Separate successful and failed downloads
-            dataframes = []
-            errors = []
+                # Separate successful and failed downloads
+                dataframes = []
+                errors = []
             
-            for url, df, error in results:
-                if df is not None:
-                    dataframes.append(df)
-                if error is not None:
-                    errors.append((url, error))
+                for url, df, error in results:
+                    if df is not None:
+                        dataframes.append(df)
+                    if error is not None:
+                        errors.append((url, error))
             
-            return dataframes, errors
+                return dataframes, errors
     
+    async def _download_into(
+        self,
+        full_urls: List[Tuple[str, str]],
+        results: queue.Queue,
+        stop: threading.Event,
+        show_progress: bool = True
+    ):
+        """
+        Download (url, name) pairs and put each (url, dataframe, error) on a
+        queue as it completes
+
+        Only as many downloads as the limiter allows are in flight, plus the
+        files in the parse queue, and a new one starts once a finished file
+        has been handed to the queue, so a slow consumer holds back the
+        downloads instead of letting parsed files pile up.
+        """
+        limiter = self._new_limiter()
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent)
+        loop = asyncio.get_running_loop()
+        remaining = iter(full_urls)
+        # Insertion ordered, so files finishing together are handed over in request order
+        pending = {}
+        progress = tqdm(total=len(full_urls), desc="Downloading files") if show_progress else None
+
+        with self._parsers():
+            async with self._session(connector) as session:
+                def launch():
+                    # Files being parsed no longer hold a download slot
+                    while len(pending) < limiter.limit + self.parse_workers + self.parse_queue:
+                        url, name = next(remaining, (None, None))
+                        if url is None:
+                            return
+                        pending[asyncio.ensure_future(
+                            self._download_single_file(session, url, limiter, name))] = None
+
+                try:
+                    launch()
+                    while pending and not stop.is_set():
+                        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in [task for task in pending if task in done]:
+                            del pending[task]
+                            if progress is not None:
+                                progress.set_postfix(concurrency=limiter.limit, refresh=False)
+                                progress.update(1)
+                            await loop.run_in_executor(None, results.put, task.result())
+                        if not stop.is_set():
+                            launch()
+                finally:
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    if progress is not None:
+                        progress.close()
+                    self._report_concurrency()
+
+    def iter_files(
+        self,
+        base_url: str,
+        file_names: List[str],
+        show_progress: bool = True,
+        max_pending: Optional[int] = None,
+        is_full_url: bool = False
+    ) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+        """
+        Download multiple files, yielding each one as soon as it is parsed
+
+        The event loop runs in a background thread. At most ``max_pending``
+        parsed files wait for the consumer; abandoning the iteration cancels
+        the downloads still in flight.
+
+        Args:
+            base_url: Base URL for files
+            file_names: List of file names to download
+            show_progress: Whether to show progress bar
+            max_pending: Parsed files buffered ahead of the consumer
+                (default: max_concurrent)
+            is_full_url: The file names are absolute URLs; base_url is ignored
+
+        Yields:
+            Tuples of (url, dataframe, error_message) in completion order
+        """
+        full_urls = list(zip(_full_urls(base_url, file_names, is_full_url), file_names))
+        results = queue.Queue(maxsize=max_pending or self.max_concurrent)
+        stop = threading.Event()
+        finished = object()
+        failure = []
+
+        def run():
+            try:
+                asyncio.run(self._download_into(full_urls, results, stop, show_progress))
+            except Exception as e:
+                failure.append(e)
+            finally:
+                results.put(finished)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is finished:
+                    break
+                yield item
+        finally:
+            stop.set()
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+        if failure:
+            raise failure[0]
+
     async def download_fulltext_async(
         self,
         session: aiohttp.ClientSession,
@@ -172,6 +621,7 @@ class AsyncDownloader:
                     async with session.get(
                         url_root,
                         headers=self._generate_header(),
+                        proxy=self._proxy_for(url_root),
                         timeout=aiohttp.ClientTimeout(total=10)
                     ) as root_response:
                         if root_response.status == 200:
@@ -184,6 +634,7 @@ class AsyncDownloader:
                 async with session.get(
                     url,
                     headers=self._generate_header(),
+                    proxy=self._proxy_for(url),
                     timeout=aiohttp.ClientTimeout(total=30)
                 ) as response:
                     if response.status != 200:
@@ -231,7 +682,7 @@ class AsyncDownloader:
         
         connector = aiohttp.TCPConnector(limit=self.max_concurrent)
         
-        async with aiohttp.ClientSession(connector=connector) as session:
+        async with self._session(connector) as session:
             tasks = []
             for url in urls:
                 task = self.download_fulltext_async(session, semaphore, url)
@@ -259,10 +710,19 @@ class AsyncDownloader:
 def run_async_download(
     base_url: str,
     file_names: List[str],
-    max_concurrent: int = 20,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
     timeout: int = 30,
     proxy: Optional[dict] = None,
-    show_progress: bool = True
+    show_progress: bool = True,
+    chunk_size: Optional[int] = None,
+    read_csv_kwargs: Optional[dict] = None,
+    where: Optional[list] = None,
+    adaptive: bool = True,
+    parse_executor: str = "thread",
+    parse_workers: Optional[int] = None,
+    is_full_url: bool = False,
+    payload: str = "zip_tsv",
+    expected: Optional[Dict[str, Tuple[int, str]]] = None
 ) -> Tuple[List[pd.DataFrame], List[Tuple[str, str]]]:
     """
     Synchronous wrapper for async file download
@@ -274,6 +734,15 @@ def run_async_download(
         timeout: Request timeout in seconds
         proxy: Proxy configuration
         show_progress: Whether to show progress bar
+        chunk_size: Parse each file in chunks of this many rows
+        read_csv_kwargs: Extra options for the CSV parser
+        where: Normalized row filter applied to each parsed file
+        adaptive: Adapt concurrency to the throughput, up to max_concurrent
+        parse_executor: Parse files on a "thread" or "process" pool
+        parse_workers: Size of the parse pool (default: CPU count)
+        is_full_url: The file names are absolute URLs; base_url is ignored
+        payload: Format of the files, a key of decoders.DECODERS
+        expected: ``{file name: (size, md5)}`` to check the bodies against
         
     Returns:
         Tuple of (list of dataframes, list of (url, error) tuples)
@@ -281,10 +750,64 @@ def run_async_download(
     downloader = AsyncDownloader(
         max_concurrent=max_concurrent,
         timeout=timeout,
-        proxy=proxy
+        proxy=proxy,
+        chunk_size=chunk_size,
+        read_csv_kwargs=read_csv_kwargs,
+        where=where,
+        adaptive=adaptive,
+        parse_executor=parse_executor,
+        parse_workers=parse_workers,
+        payload=payload,
+        expected=expected
     )
     
-    return asyncio.run(downloader.download_files(base_url, file_names, show_progress))
+    return asyncio.run(downloader.download_files(base_url, file_names, show_progress,
+                                                 is_full_url=is_full_url))
+
+
+def iter_async_download(
+    base_url: str,
+    file_names: List[str],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    timeout: int = 30,
+    proxy: Optional[dict] = None,
+    show_progress: bool = True,
+    chunk_size: Optional[int] = None,
+    read_csv_kwargs: Optional[dict] = None,
+    where: Optional[list] = None,
+    adaptive: bool = True,
+    parse_executor: str = "thread",
+    parse_workers: Optional[int] = None,
+    is_full_url: bool = False,
+    payload: str = "zip_tsv",
+    expected: Optional[Dict[str, Tuple[int, str]]] = None
+) -> Iterator[Union[pd.DataFrame, str]]:
+    """
+    Streaming counterpart of ``run_async_download``
+
+    Args:
+        Same as ``run_async_download``
+
+    Yields:
+        A DataFrame for each downloaded file, or an error message for each
+        failed one, in completion order
+    """
+    downloader = AsyncDownloader(
+        max_concurrent=max_concurrent,
+        timeout=timeout,
+        proxy=proxy,
+        chunk_size=chunk_size,
+        read_csv_kwargs=read_csv_kwargs,
+        where=where,
+        adaptive=adaptive,
+        parse_executor=parse_executor,
+        parse_workers=parse_workers,
+        payload=payload,
+        expected=expected
+    )
+    for url, df, error in downloader.iter_files(base_url, file_names, show_progress,
+                                                is_full_url=is_full_url):
+        yield df if df is not None else error
 
 
 def run_async_fulltext_download(
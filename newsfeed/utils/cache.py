@@ -4,25 +4,386 @@ author: Terence Junjie LIU
 date: 2026
 """
 import os
+import time
+import sqlite3
 import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import joblib
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Optional, Any
+from typing import Optional, Any, Callable, List, Tuple
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows: entries are only locked within the process
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _process_lock(key: str) -> threading.Lock:
+    with _process_locks_guard:
+        return _process_locks.setdefault(key, threading.Lock())
+
+
+def _to_arrow(data: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    nested = [field.name for field in table.schema if pa.types.is_nested(field.type)]
+    if nested:
+        # Lists and dicts would come back as numpy arrays; pickle them instead
+        raise TypeError("Nested columns are not stored columnar: {}".format(", ".join(nested)))
+    return table
+
+
+class PickleBackend:
+    """Whole-object joblib pickles, the original cache format"""
+
+    name = "pickle"
+    suffix = ".pkl"
+
+    def write(self, data: pd.DataFrame, path: Path) -> None:
+        joblib.dump(data, path)
+
+    def read(self, path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        data = joblib.load(path)
+        return data[columns] if columns is not None else data
+
+
+class ParquetBackend:
+    """
+    Compressed Parquet files
+
+    Reads are column-selective, multi-threaded and memory-mapped, and the
+    pandas dtypes (categoricals, nullable integers) are restored on load.
+    Parquet drops the dictionary type of a column with no values, so
+    all-null categoricals are cast back from the pandas metadata.
+    """
+
+    name = "parquet"
+    suffix = ".parquet"
+
+    def __init__(self, compression: str = "zstd"):
+        self.compression = compression
+
+    def write(self, data: pd.DataFrame, path: Path) -> None:
+        table = _to_arrow(data)
+        pq.write_table(table, path, compression=self.compression)
+
+    def read(self, path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        table = pq.read_table(path, columns=columns, memory_map=True, use_threads=True)
+        data = table.to_pandas()
+        categorical = [
+            column["name"] for column in (table.schema.pandas_metadata or {}).get("columns", [])
+            if column["pandas_type"] == "categorical" and column["name"] in data.columns
+            and not isinstance(data[column["name"]].dtype, pd.CategoricalDtype)
+        ]
+        if categorical:
+            data = data.astype({name: "category" for name in categorical})
+        return data
+
+
+class ArrowBackend:
+    """
+    Arrow IPC files, opened through a memory map
+
+    Only the pages of the requested columns are touched on load. With
+    ``compression=None`` the buffers are used in place without a copy;
+    lz4/zstd trade that for smaller files.
+    """
+
+    name = "arrow"
+    suffix = ".arrow"
+
+    def __init__(self, compression: Optional[str] = "lz4"):
+        self.compression = compression
+
+    def write(self, data: pd.DataFrame, path: Path) -> None:
+        table = _to_arrow(data)
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+
+    def read(self, path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas()
+
+
+CACHE_BACKENDS = {
+    "parquet": ParquetBackend,
+    "arrow": ArrowBackend,
+    "pickle": PickleBackend,
+}
+
+
+EVICTION_POLICIES = ["lru", "lfu"]
+
+
+class CacheIndex:
+    """
+    SQLite index of the cache entries
+
+    Records the size, last access time and hit count of every cache file,
+    and the checksum of the source file it was parsed from when it was
+    verified. Running totals are kept up to date by triggers, so cache statistics are
+    answered without walking the cache directory, and eviction picks its
+    victims with one ordered query. Each process keeps one WAL connection
+    open, so lookups and hit counts do not reopen the database.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._init_db()
+
+    def __getstate__(self):
+        # Pool workers open their own connection
+        return {"db_path": str(self.db_path)}
+
+    def __setstate__(self, state):
+        self.__init__(state["db_path"])
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection of this process, opening it on first use"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=30,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _init_db(self):
+        """Initialize database schema"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executescript('''
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        created REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        hits INTEGER NOT NULL DEFAULT 0,
+                        checksum TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS cache_entries_last_access
+                        ON cache_entries (last_access);
+
+                    CREATE TABLE IF NOT EXISTS cache_totals (
+                        id INTEGER PRIMARY KEY CHECK (id = 0),
+                        num_files INTEGER NOT NULL,
+                        total_bytes INTEGER NOT NULL
+                    );
+                    INSERT OR IGNORE INTO cache_totals VALUES (0, 0, 0);
+
+                    CREATE TRIGGER IF NOT EXISTS cache_entries_insert
+                    AFTER INSERT ON cache_entries BEGIN
+                        UPDATE cache_totals SET num_files = num_files + 1,
+                                                total_bytes = total_bytes + NEW.size;
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS cache_entries_delete
+                    AFTER DELETE ON cache_entries BEGIN
+                        UPDATE cache_totals SET num_files = num_files - 1,
+                                                total_bytes = total_bytes - OLD.size;
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS cache_entries_resize
+                    AFTER UPDATE OF size ON cache_entries BEGIN
+                        UPDATE cache_totals SET total_bytes = total_bytes + NEW.size - OLD.size;
+                    END;
+                ''')
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(cache_entries)')]
+                if 'checksum' not in columns:
+                    conn.execute('ALTER TABLE cache_entries ADD COLUMN checksum TEXT')
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params)
+
+    def _fetch(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def is_empty(self) -> bool:
+        return self.totals()[0] == 0
+
+    def record_write(self, path: str, size: int, checksum: Optional[str] = None) -> None:
+        """Register a new or rewritten cache file"""
+        now = time.time()
+        self._execute('''
+            INSERT INTO cache_entries (path, size, created, last_access, hits, checksum)
+            VALUES (?, ?, ?, ?, 0, ?)
+            ON CONFLICT(path) DO UPDATE SET size = excluded.size,
+                created = excluded.created, last_access = excluded.last_access, hits = 0,
+                checksum = excluded.checksum
+        ''', (path, size, now, now, checksum))
+
+    def record_hit(self, path: str) -> None:
+        """Count a read of a cache file"""
+        self._execute('''
+            UPDATE cache_entries SET hits = hits + 1, last_access = ?
+            WHERE path = ?
+        ''', (time.time(), path))
+
+    def remove(self, paths: List[str]) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany('DELETE FROM cache_entries WHERE path = ?', [(p,) for p in paths])
+
+    def clear(self) -> None:
+        self._execute('DELETE FROM cache_entries')
+
+    def totals(self) -> Tuple[int, int]:
+        """Number of files and total bytes in the cache"""
+        row = self._fetch('SELECT num_files, total_bytes FROM cache_totals')[0]
+        return row[0], row[1]
+
+    def entry(self, path: str) -> Optional[dict]:
+        rows = self._fetch('''
+            SELECT size, created, last_access, hits FROM cache_entries WHERE path = ?
+        ''', (path,))
+        if not rows:
+            return None
+        return dict(zip(["size", "created", "last_access", "hits"], rows[0]))
+
+    def checksum(self, path: str) -> Optional[str]:
+        """Checksum of the source file a cache file was parsed from, if verified"""
+        rows = self._fetch('SELECT checksum FROM cache_entries WHERE path = ?', (path,))
+        return rows[0][0] if rows else None
+
+    def candidates(self, policy: str = "lru") -> List[Tuple[str, int]]:
+        """Entries in eviction order: least recently or least frequently used first"""
+        order = "hits ASC, last_access ASC" if policy == "lfu" else "last_access ASC"
+        return self._fetch('SELECT path, size FROM cache_entries ORDER BY ' + order)
+
+    def created_before(self, cutoff: float) -> List[str]:
+        rows = self._fetch('SELECT path FROM cache_entries WHERE created < ?', (cutoff,))
+        return [row[0] for row in rows]
+
+
+class MemoryTier:
+    """
+    In-process LRU cache of DataFrames, bounded by their memory usage
+
+    Sits in front of the disk cache so that hot entries are not read and
+    decoded again. Hits return a shallow copy: the column data is shared
+    with the cached frame, so renaming or adding columns on the result is
+    safe, but values must not be modified in place.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Pool workers get an empty tier of the same size
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"])
+
+    def get(self, key) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy(deep=False)
+
+    def put(self, key, data: pd.DataFrame) -> None:
+        size = int(data.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (data.copy(deep=False), size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def invalidate(self, stem: str) -> None:
+        """Drop every cached read of a cache entry"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == stem]:
+                self.total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "num_entries": len(self._entries),
+                "total_size_bytes": self.total_bytes,
+                "max_size_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
+
 
 class CacheManager:
-    """Simple file-based cache manager for query results"""
+    """
+    Simple file-based cache manager for query results
+
+    Besides whole query results keyed by their parameters, the manager
+    keeps granules: the parsed content of single GDELT source files (e.g.
+    ``20210101001500.export.CSV.zip``), stored under
+    ``granules/<db_type>_<version>/``. A query over any date range can be
+    assembled from the granules it covers, so only the missing files have
+    to be downloaded.
+    """
     
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(self, cache_dir: Optional[str] = None, backend: str = "parquet",
+                 max_bytes: Optional[int] = None, eviction: str = "lru",
+                 memory_bytes: Optional[int] = None):
         """
         Initialize cache manager
         
         Args:
             cache_dir: Custom cache directory path. If None, uses ~/.cache/newsfeed/
+            backend: Storage format of new entries: parquet, arrow or pickle.
+                Entries written by the other backends are still read.
+            max_bytes: Byte budget of the cache. When a write exceeds it,
+                entries are evicted until it fits (default: unbounded)
+            eviction: Which entries to evict first: lru (least recently
+                used) or lfu (least frequently used)
+            memory_bytes: Size of an in-process LRU tier in front of the
+                disk cache (default: no memory tier)
         """
         if cache_dir is None:
             home = Path.home()
@@ -30,8 +391,165 @@ class CacheManager:
         else:
             cache_dir = Path(cache_dir)
         
+        if backend not in CACHE_BACKENDS:
+            raise ValueError("Unknown cache backend: {}. Choose from {}".format(
+                backend, ", ".join(CACHE_BACKENDS)))
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError("Unknown eviction policy: {}. Choose from {}".format(
+                eviction, ", ".join(EVICTION_POLICIES)))
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.backend = CACHE_BACKENDS[backend]()
+        # New entries use the primary backend; the rest are read for old entries
+        self.backends = [self.backend] + [
+            CACHE_BACKENDS[name]() for name in CACHE_BACKENDS if name != backend
+        ]
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.memory = MemoryTier(memory_bytes) if memory_bytes else None
+        self.index = CacheIndex(self.cache_dir / "cache_index.db")
+        if self.index.is_empty():
+            # First use of the index: register the files already cached
+            self.rebuild_index()
+        
+    def _cache_files(self) -> List[Path]:
+        return [cache_file for backend in self.backends
+                for cache_file in self.cache_dir.rglob("*" + backend.suffix)]
+    
+    def _find_entry(self, stem: Path):
+        for backend in self.backends:
+            cache_file = stem.with_name(stem.name + backend.suffix)
+            if cache_file.exists():
+                return backend, cache_file
+        return None, None
+    
+    def _index_key(self, cache_file: Path) -> str:
+        return cache_file.relative_to(self.cache_dir).as_posix()
+    
+    def _matches(self, stem: Path, checksum: Optional[str]) -> bool:
+        # Whether an entry was stored from a source file with this checksum
+        if checksum is None:
+            return True
+        _, cache_file = self._find_entry(stem)
+        if cache_file is None:
+            return False
+        if self.index.checksum(self._index_key(cache_file)) != checksum:
+            logger.warning(f"Cache {cache_file} was not stored from a file with MD5 {checksum}")
+            return False
+        return True
+    
+    def _read_entry(self, stem: Path,
+                    read_columns: Optional[List[str]] = None,
+                    checksum: Optional[str] = None) -> Optional[pd.DataFrame]:
+        if not self._matches(stem, checksum):
+            return None
+        memory_key = (str(stem), tuple(read_columns) if read_columns is not None else None)
+        if self.memory is not None:
+            data = self.memory.get(memory_key)
+            if data is not None:
+                return data
+        
+        backend, cache_file = self._find_entry(stem)
+        if cache_file is None:
+            return None
+        try:
+            logger.info(f"Loading from cache: {cache_file}")
+            data = backend.read(cache_file, columns=read_columns)
+        except Exception as e:
+            logger.warning(f"Failed to load cache {cache_file}: {e}")
+            return None
+        self.index.record_hit(self._index_key(cache_file))
+        if self.memory is not None:
+            self.memory.put(memory_key, data)
+        return data
+    
+    @contextmanager
+    def _key_lock(self, stem: Path):
+        """
+        Exclusive lock on one cache entry
+
+        Held while an entry is written or computed. It is a ``flock`` on a
+        per-entry lock file, so it is shared by threads, pool workers and
+        separate processes using the same cache directory.
+        """
+        lock_dir = self.cache_dir / "locks"
+        lock_dir.mkdir(exist_ok=True)
+        lock_path = lock_dir / (hashlib.md5(str(stem).encode()).hexdigest() + ".lock")
+        if fcntl is None:
+            with _process_lock(str(lock_path)):
+                yield
+            return
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _write_entry(self, data: pd.DataFrame, stem: Path,
+                     checksum: Optional[str] = None) -> None:
+        with self._key_lock(stem):
+            self._store(data, stem, checksum)
+    
+    def _store(self, data: pd.DataFrame, stem: Path, checksum: Optional[str] = None) -> None:
+        # Written to a temporary file and renamed into place, so readers
+        # never see a partly written entry
+        for backend in [self.backend, PickleBackend()]:
+            cache_file = stem.with_name(stem.name + backend.suffix)
+            tmp_file = stem.with_name(".{}.{}.{}.tmp".format(
+                cache_file.name, os.getpid(), threading.get_ident()))
+            try:
+                backend.write(data, tmp_file)
+                os.replace(tmp_file, cache_file)
+            except Exception as e:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+                if isinstance(backend, PickleBackend):
+                    logger.warning(f"Failed to save cache {cache_file}: {e}")
+                else:
+                    logger.info(f"Pickling {stem.name}, {backend.name} cannot store it: {e}")
+                continue
+            logger.info(f"Saved to cache: {cache_file}")
+            self._remove_entries(stem, keep=cache_file)
+            self.index.record_write(self._index_key(cache_file),
+                                    cache_file.stat().st_size, checksum)
+            if self.max_bytes is not None:
+                self.evict(keep=[cache_file])
+            return
+    
+    def _get_or_compute(self, stem: Path, compute: Callable[[], Any],
+                        read_columns: Optional[List[str]], refresh: bool,
+                        checksum: Optional[str] = None):
+        # Returns the data and whether it was computed by this call
+        if not refresh:
+            data = self._read_entry(stem, read_columns, checksum)
+            if data is not None:
+                return data, False
+        with self._key_lock(stem):
+            if not refresh:
+                # Filled by another thread or process while we waited
+                data = self._read_entry(stem, read_columns, checksum)
+                if data is not None:
+                    return data, False
+            data = compute()
+            if isinstance(data, pd.DataFrame):
+                self._store(data, stem, checksum)
+                if read_columns is not None:
+                    data = data[read_columns]
+            return data, True
+    
+    def _remove_entries(self, stem: Path, keep: Optional[Path] = None) -> None:
+        if self.memory is not None:
+            self.memory.invalidate(str(stem))
+        for backend in self.backends:
+            cache_file = stem.with_name(stem.name + backend.suffix)
+            if cache_file != keep and cache_file.exists():
+                try:
+                    cache_file.unlink()
+                    self.index.remove([self._index_key(cache_file)])
+                    logger.info(f"Deleted cache: {cache_file}")
+                except Exception as e:
+                    logger.warning(f"Failed to delete cache {cache_file}: {e}")
         
     def _generate_cache_key(self, **kwargs) -> str:
         """
@@ -48,46 +566,173 @@ class CacheManager:
         key_string = str(sorted_items)
         return hashlib.md5(key_string.encode()).hexdigest()
     
-    def get(self, **kwargs) -> Optional[pd.DataFrame]:
+    def get(self, read_columns: Optional[List[str]] = None, **kwargs) -> Optional[pd.DataFrame]:
         """
         Retrieve cached data if exists
         
         Args:
+            read_columns: Only load these columns of the entry (default: all)
             **kwargs: Query parameters
             
         Returns:
             Cached DataFrame or None if not found
         """
         cache_key = self._generate_cache_key(**kwargs)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        
-        if cache_file.exists():
-            try:
-                logger.info(f"Loading from cache: {cache_file}")
-                data = joblib.load(cache_file)
-                return data
-            except Exception as e:
-                logger.warning(f"Failed to load cache {cache_file}: {e}")
-                return None
-        
-        return None
+        return self._read_entry(self.cache_dir / cache_key, read_columns)
     
     def set(self, data: pd.DataFrame, **kwargs) -> None:
         """
         Store data in cache
         
+        Frames that the columnar backends cannot represent (e.g. columns of
+        mixed Python objects) are pickled instead.
+        
         Args:
             data: DataFrame to cache
             **kwargs: Query parameters
         """
         cache_key = self._generate_cache_key(**kwargs)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
+        self._write_entry(data, self.cache_dir / cache_key)
+    
+    def get_or_compute(self, compute: Callable[[], Any],
+                       read_columns: Optional[List[str]] = None,
+                       refresh: bool = False, **kwargs):
+        """
+        Retrieve cached data, or compute and store it exactly once
         
-        try:
-            joblib.dump(data, cache_file)
-            logger.info(f"Saved to cache: {cache_file}")
-        except Exception as e:
-            logger.warning(f"Failed to save cache {cache_file}: {e}")
+        Concurrent callers with the same key (threads, pool workers or other
+        processes) are deduplicated: one of them runs ``compute`` while the
+        others wait for its result and read it from the cache.
+        
+        Args:
+            compute: Function returning the DataFrame to cache. Any other
+                return value (e.g. an error) is passed through uncached.
+            read_columns: Only return these columns (default: all)
+            refresh: Recompute even if the entry is cached
+            **kwargs: Query parameters
+            
+        Returns:
+            The cached or computed data
+        """
+        cache_key = self._generate_cache_key(**kwargs)
+        data, _ = self._get_or_compute(self.cache_dir / cache_key, compute,
+                                       read_columns, refresh)
+        return data
+    
+    def _granule_stem(self, file_name: str, db_type: str, version: str) -> Path:
+        # Full URLs (GEG, VGEG, GSG) are keyed by their file name as well
+        name = file_name.rstrip("/").rsplit("/", 1)[-1]
+        return self.cache_dir / "granules" / f"{db_type}_{version}" / name
+    
+    def get_granule(self, file_name: str, db_type: str, version: str,
+                    read_columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Retrieve the cached content of one source file
+        
+        Args:
+            file_name: Source file name or URL
+            db_type: Database type, e.g. EVENT or GKG
+            version: Database version, e.g. V2
+            read_columns: Only load these columns of the granule (default: all)
+            
+        Returns:
+            Cached DataFrame or None if not found
+        """
+        data = self._read_entry(self._granule_stem(file_name, db_type, version),
+                                read_columns)
+        if data is not None:
+            data.attrs = {}
+        return data
+    
+    def set_granule(self, data: pd.DataFrame, file_name: str, db_type: str,
+                    version: str, checksum: Optional[str] = None) -> None:
+        """
+        Store the parsed content of one source file
+        
+        Granules should hold every column of the file, so that any later
+        projection or filter can be served from them.
+        
+        Args:
+            data: DataFrame parsed from the file
+            file_name: Source file name or URL
+            db_type: Database type, e.g. EVENT or GKG
+            version: Database version, e.g. V2
+            checksum: MD5 the file was verified against, recorded as in
+                ``get_or_compute_granule``
+        """
+        stem = self._granule_stem(file_name, db_type, version)
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        self._write_entry(data, stem, checksum)
+    
+    def get_or_compute_granule(self, file_name: str, db_type: str, version: str,
+                               compute: Callable[[], Any],
+                               read_columns: Optional[List[str]] = None,
+                               refresh: bool = False,
+                               checksum: Optional[str] = None):
+        """
+        Retrieve a granule, or parse the source file once and store it
+        
+        Like ``get_or_compute``, for the granule of one source file: if two
+        queries need the same file at once, it is downloaded once.
+        
+        With ``checksum``, only a granule stored from a source file with
+        that checksum is a hit; any other granule is parsed again and
+        replaced. ``compute`` is expected to verify the file it downloads.
+        
+        Args:
+            file_name: Source file name or URL
+            db_type: Database type, e.g. EVENT or GKG
+            version: Database version, e.g. V2
+            compute: Function downloading and parsing the whole file
+            read_columns: Only return these columns (default: all)
+            refresh: Download again even if the granule is cached
+            checksum: MD5 of the source file, e.g. from the GDELT manifest
+            
+        Returns:
+            The granule, or whatever ``compute`` returned on failure
+        """
+        stem = self._granule_stem(file_name, db_type, version)
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        data, computed = self._get_or_compute(stem, compute, read_columns, refresh, checksum)
+        if not computed:
+            # Stored download metadata does not describe this read
+            data.attrs = {}
+        return data
+    
+    def has_granule(self, file_name: str, db_type: str, version: str,
+                    checksum: Optional[str] = None) -> bool:
+        """Whether a source file is cached as a granule, stored from a file with ``checksum`` if given"""
+        stem = self._granule_stem(file_name, db_type, version)
+        if checksum is not None:
+            return self._matches(stem, checksum)
+        _, cache_file = self._find_entry(stem)
+        return cache_file is not None
+    
+    def split_granules(self, file_names: List[str], db_type: str,
+                       version: str, checksums: Optional[dict] = None) -> Tuple[List[str], List[str]]:
+        """
+        Split source files into those cached as granules and those to download
+        
+        Args:
+            file_names: Source file names or URLs of a query
+            db_type: Database type, e.g. EVENT or GKG
+            version: Database version, e.g. V2
+            checksums: Optional {file name: MD5}; granules of these files
+                only count as cached if they were stored from a file with
+                that checksum
+            
+        Returns:
+            Tuple of (cached file names, file names without a valid granule)
+        """
+        checksums = checksums or {}
+        cached = []
+        missing = []
+        for file_name in file_names:
+            if self.has_granule(file_name, db_type, version, checksums.get(file_name)):
+                cached.append(file_name)
+            else:
+                missing.append(file_name)
+        return cached, missing
     
     def clear(self, **kwargs) -> None:
         """
@@ -97,14 +742,7 @@ class CacheManager:
             **kwargs: Query parameters to identify cache entry
         """
         cache_key = self._generate_cache_key(**kwargs)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        
-        if cache_file.exists():
-            try:
-                cache_file.unlink()
-                logger.info(f"Deleted cache: {cache_file}")
-            except Exception as e:
-                logger.warning(f"Failed to delete cache {cache_file}: {e}")
+        self._remove_entries(self.cache_dir / cache_key)
     
     def clear_all(self) -> int:
         """
@@ -114,12 +752,17 @@ class CacheManager:
             Number of cache files deleted
         """
         count = 0
-        for cache_file in self.cache_dir.glob("*.pkl"):
+        for cache_file in self._cache_files():
             try:
                 cache_file.unlink()
                 count += 1
             except Exception as e:
                 logger.warning(f"Failed to delete {cache_file}: {e}")
+        for leftover in list(self.cache_dir.rglob(".*.tmp")) + list(self.cache_dir.glob("locks/*.lock")):
+            leftover.unlink(missing_ok=True)
+        self.index.clear()
+        if self.memory is not None:
+            self.memory.clear()
         
         logger.info(f"Cleared {count} cache files")
         return count
@@ -128,19 +771,104 @@ class CacheManager:
         """
         Get cache statistics
         
+        Read from the cache index, without walking the cache directory.
+        
         Returns:
             Dictionary with cache statistics
         """
-        cache_files = list(self.cache_dir.glob("*.pkl"))
-        total_size = sum(f.stat().st_size for f in cache_files)
+        num_files, total_size = self.index.totals()
         
         return {
             "cache_dir": str(self.cache_dir),
-            "num_files": len(cache_files),
+            "num_files": num_files,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
-            "total_size_bytes": total_size
+            "total_size_bytes": total_size,
+            "max_size_bytes": self.max_bytes,
+            "eviction": self.eviction,
+            "memory": self.memory.stats() if self.memory is not None else None
         }
     
+    def get_entry_stats(self, **kwargs) -> Optional[dict]:
+        """
+        Get size, creation time, last access time and hit count of a cache entry
+        
+        Args:
+            **kwargs: Query parameters to identify cache entry
+            
+        Returns:
+            Dictionary with entry statistics, or None if not cached
+        """
+        _, cache_file = self._find_entry(self.cache_dir / self._generate_cache_key(**kwargs))
+        if cache_file is None:
+            return None
+        return self.index.entry(self._index_key(cache_file))
+    
+    def _delete_indexed(self, paths: List[str]) -> int:
+        removed = []
+        for path in paths:
+            cache_file = self.cache_dir / path
+            if self.memory is not None:
+                self.memory.invalidate(str(cache_file.with_suffix("")))
+            try:
+                if cache_file.exists():
+                    cache_file.unlink()
+                removed.append(path)
+            except Exception as e:
+                logger.warning(f"Failed to remove {cache_file}: {e}")
+        self.index.remove(removed)
+        return len(removed)
+    
+    def evict(self, max_bytes: Optional[int] = None, keep: Optional[List[Path]] = None) -> int:
+        """
+        Evict entries until the cache fits its byte budget
+        
+        Entries are removed in the order of the eviction policy: least
+        recently used first (lru) or least often read first (lfu).
+        
+        Args:
+            max_bytes: Byte budget (default: the manager's max_bytes)
+            keep: Cache files that must not be evicted, e.g. the one just written
+            
+        Returns:
+            Number of files removed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return 0
+        _, total_size = self.index.totals()
+        if total_size <= max_bytes:
+            return 0
+        
+        keep = {self._index_key(cache_file) for cache_file in keep or []}
+        victims = []
+        for path, size in self.index.candidates(self.eviction):
+            if total_size <= max_bytes:
+                break
+            if path in keep:
+                continue
+            victims.append(path)
+            total_size -= size
+        
+        count = self._delete_indexed(victims)
+        logger.info(f"Evicted {count} cache files ({self.eviction}) to fit {max_bytes} bytes")
+        return count
+    
+    def rebuild_index(self) -> int:
+        """
+        Rebuild the cache index from the files in the cache directory
+        
+        Needed once for caches written before the index existed, or after
+        files were added or deleted by hand.
+        
+        Returns:
+            Number of indexed files
+        """
+        self.index.clear()
+        cache_files = self._cache_files()
+        for cache_file in cache_files:
+            self.index.record_write(self._index_key(cache_file), cache_file.stat().st_size)
+        return len(cache_files)
+    
     def prune_old_files(self, days: int = 7) -> int:
         """
         Remove cache files older than specified days
@@ -151,20 +879,8 @@ class CacheManager:
         Returns:
             Number of files removed
         """
-        import time
-        
-        current_time = time.time()
-        cutoff_time = current_time - (days * 24 * 60 * 60)
-        count = 0
-        
-        for cache_file in self.cache_dir.glob("*.pkl"):
-            if cache_file.stat().st_mtime < cutoff_time:
-                try:
-                    cache_file.unlink()
-                    count += 1
-                    logger.info(f"Removed old cache file: {cache_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove {cache_file}: {e}")
+        cutoff_time = time.time() - (days * 24 * 60 * 60)
+        count = self._delete_indexed(self.index.created_before(cutoff_time))
         
         logger.info(f"Pruned {count} cache files older than {days} days")
         return count
@@ -174,9 +890,32 @@ class CacheManager:
 _global_cache_manager: Optional[CacheManager] = None
 
 
-def get_cache_manager() -> CacheManager:
-    """Get global cache manager instance"""
+def get_cache_manager(backend: Optional[str] = None,
+                      max_bytes: Optional[int] = None,
+                      memory_bytes: Optional[int] = None) -> CacheManager:
+    """
+    Get global cache manager instance
+    
+    Args:
+        backend: Storage format for new entries (parquet, arrow or pickle);
+            None keeps the current one (parquet by default)
+        max_bytes: Byte budget of the cache; None keeps the current one
+            (unbounded by default). A smaller budget evicts right away.
+        memory_bytes: Size of the in-process memory tier; None keeps the
+            current one (off by default), 0 turns it off
+    """
     global _global_cache_manager
     if _global_cache_manager is None:
-        _global_cache_manager = CacheManager()
+        _global_cache_manager = CacheManager(backend=backend or "parquet")
+    elif backend is not None and _global_cache_manager.backend.name != backend:
+        previous = _global_cache_manager
+        _global_cache_manager = CacheManager(previous.cache_dir, backend=backend,
+                                             max_bytes=previous.max_bytes,
+                                             eviction=previous.eviction)
+        _global_cache_manager.memory = previous.memory
+    if max_bytes is not None:
+        _global_cache_manager.max_bytes = max_bytes
+        _global_cache_manager.evict()
+    if memory_bytes is not None:
+        _global_cache_manager.memory = MemoryTier(memory_bytes) if memory_bytes else None
     return _global_cache_manager
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Payload decoders for GDELT data files
+author: Terence Junjie LIU
+date: 2026
+"""
+import zipfile
+import tempfile
+import logging
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from newsfeed.utils.predicates import apply_where
+
+logger = logging.getLogger(__name__)
+
+# Compressed bodies larger than this are spooled to a temporary file on disk
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+# Size of the blocks pulled from the network while spooling
+NETWORK_BLOCK_SIZE = 1024 * 1024
+
+TSV_OPTIONS = {
+    "sep": "\t",
+    "header": None,
+    "on_bad_lines": "skip",
+}
+
+
+def spool_response(response, block_size: int = NETWORK_BLOCK_SIZE) -> BinaryIO:
+    """
+    Copy a streamed ``requests`` response body into a spooled temporary file
+
+    Only the compressed body is kept, in memory while it is small and on
+    disk once it grows beyond ``SPOOL_MAX_MEMORY``.
+
+    Args:
+        response: requests response opened with ``stream=True``
+        block_size: Number of bytes read from the socket at a time
+
+    Returns:
+        Seekable file object positioned at the start of the body
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    for block in response.iter_content(chunk_size=block_size):
+        if block:
+            spool.write(block)
+    spool.seek(0)
+    return spool
+
+
+def iter_zip_tsv(fileobj: BinaryIO,
+                 chunk_size: int,
+                 **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Inflate the first member of a zip archive and parse it in chunks
+
+    The member is decompressed incrementally while pandas consumes it, so
+    at most ``chunk_size`` rows are tokenised at any time.
+
+    Args:
+        fileobj: Seekable file object holding the zip archive
+        chunk_size: Number of rows per yielded DataFrame
+        **read_csv_kwargs: Extra options passed to ``pd.read_csv``
+
+    Yields:
+        DataFrames of at most ``chunk_size`` rows
+    """
+    options = dict(TSV_OPTIONS)
+    options.update(read_csv_kwargs)
+    with zipfile.ZipFile(fileobj) as archive:
+        member = archive.namelist()[0]
+        with archive.open(member) as stream:
+            with pd.read_csv(stream, chunksize=chunk_size, **options) as reader:
+                for chunk in reader:
+                    yield chunk
+
+
+def read_zip_tsv(fileobj: BinaryIO,
+                 chunk_size: Optional[int] = None,
+                 where: Optional[list] = None,
+                 **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Parse a zipped, tab-separated GDELT export into a DataFrame
+
+    If a ``dtype`` mapping is given and a value does not fit it, the file
+    is parsed again as strings and coerced column by column, so one
+    malformed field does not lose the whole file and codes keep their
+    leading zeros.
+
+    Args:
+        fileobj: Seekable file object holding the zip archive
+        chunk_size: Parse in chunks of this many rows; None parses the
+            whole member in one pass
+        where: Normalized row filter, applied to each chunk before it is
+            kept, see ``newsfeed.utils.predicates``
+        **read_csv_kwargs: Extra options passed to ``pd.read_csv``
+
+    Returns:
+        Parsed DataFrame
+    """
+    try:
+        return _read_zip_tsv(fileobj, chunk_size, where, **read_csv_kwargs)
+    except (ValueError, TypeError):
+        dtypes = read_csv_kwargs.pop("dtype", None)
+        if dtypes is None:
+            raise
+        logger.warning("Typed parse failed, coercing columns instead")
+        fileobj.seek(0)
+        read_csv_kwargs["dtype"] = str
+        return _read_zip_tsv(fileobj, chunk_size, where, coerce=dtypes, **read_csv_kwargs)
+
+
+def _read_zip_tsv(fileobj: BinaryIO,
+                  chunk_size: Optional[int] = None,
+                  where: Optional[list] = None,
+                  coerce: Optional[Dict[str, str]] = None,
+                  **read_csv_kwargs) -> pd.DataFrame:
+    if chunk_size is None:
+        options = dict(TSV_OPTIONS, low_memory=False)
+        options.update(read_csv_kwargs)
+        df = pd.read_csv(fileobj, compression="zip", **options)
+        return apply_where(df if coerce is None else coerce_dtypes(df, coerce), where)
+
+    chunks = iter_zip_tsv(fileobj, chunk_size, **read_csv_kwargs)
+    if coerce is not None:
+        chunks = (coerce_dtypes(chunk, coerce) for chunk in chunks)
+    return _filter_chunks(chunks, where, read_csv_kwargs.get("usecols")
+                          or read_csv_kwargs.get("names"))
+
+
+def _filter_chunks(chunks: Iterable[pd.DataFrame],
+                   where: Optional[list],
+                   columns: Optional[list] = None) -> pd.DataFrame:
+    """Filter each parsed chunk as it arrives, keeping only its matching rows"""
+    kept = [apply_where(chunk, where) for chunk in chunks]
+    if not kept:
+        return pd.DataFrame(columns=columns)
+    return concat_frames(kept)
+
+
+def read_gzip_jsonl(fileobj: BinaryIO,
+                    chunk_size: Optional[int] = None,
+                    where: Optional[list] = None,
+                    **read_json_kwargs) -> pd.DataFrame:
+    """
+    Parse a gzipped JSON-lines GDELT 3.0 file (GEG, VGEG, GAL, GSG) into a DataFrame
+
+    Args:
+        fileobj: Seekable file object holding the gzip stream
+        chunk_size: Parse in chunks of this many lines; None parses the
+            whole file in one pass
+        where: Normalized row filter, applied to each chunk before it is kept
+        **read_json_kwargs: Extra options passed to ``pd.read_json``
+
+    Returns:
+        Parsed DataFrame
+    """
+    if chunk_size is None:
+        return apply_where(pd.read_json(fileobj, compression="gzip", lines=True,
+                                        **read_json_kwargs), where)
+
+    with pd.read_json(fileobj, compression="gzip", lines=True, chunksize=chunk_size,
+                      **read_json_kwargs) as reader:
+        return _filter_chunks(reader, where)
+
+
+def read_gzip_tsv(fileobj: BinaryIO,
+                  chunk_size: Optional[int] = None,
+                  where: Optional[list] = None,
+                  **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Parse a gzipped, tab-separated GDELT 3.0 file (e.g. GFG links) into a DataFrame
+
+    Args:
+        fileobj: Seekable file object holding the gzip stream
+        chunk_size: Parse in chunks of this many rows; None parses the
+            whole file in one pass
+        where: Normalized row filter, applied to each chunk before it is kept
+        **read_csv_kwargs: Extra options passed to ``pd.read_csv``
+
+    Returns:
+        Parsed DataFrame
+    """
+    options = dict(TSV_OPTIONS, compression="gzip")
+    options.update(read_csv_kwargs)
+    if chunk_size is None:
+        return apply_where(pd.read_csv(fileobj, low_memory=False, **options), where)
+
+    with pd.read_csv(fileobj, chunksize=chunk_size, **options) as reader:
+        return _filter_chunks(reader, where, read_csv_kwargs.get("names"))
+
+
+# Decoders by payload name; each takes (fileobj, chunk_size=None, where=None, **options)
+DECODERS: Dict[str, Callable[..., pd.DataFrame]] = {
+    "zip_tsv": read_zip_tsv,
+    "gzip_jsonl": read_gzip_jsonl,
+    "gzip_tsv": read_gzip_tsv,
+}
+# Payload of the files of each dataset
+DATASET_PAYLOADS: Dict[str, str] = {
+    "EVENT": "zip_tsv",
+    "GKG": "zip_tsv",
+    "GEG": "gzip_jsonl",
+    "VGEG": "gzip_jsonl",
+    "GAL": "gzip_jsonl",
+    "GSG": "gzip_jsonl",
+    "GDG": "gzip_jsonl",
+    "GFG": "gzip_tsv",
+}
+
+
+def register_decoder(payload: str,
+                     decoder: Callable[..., pd.DataFrame],
+                     datasets: Iterable[str] = ()) -> None:
+    """
+    Register a payload decoder for the async downloader
+
+    Args:
+        payload: Name of the payload, e.g. ``"zip_tsv"``
+        decoder: Function ``(fileobj, chunk_size=None, where=None, **options)``
+            returning the rows matching ``where`` as a DataFrame. It must be
+            a module-level function to be usable from process parse workers
+        datasets: Datasets whose files use this payload
+    """
+    DECODERS[payload] = decoder
+    for dataset in datasets:
+        DATASET_PAYLOADS[dataset.upper()] = payload
+
+
+def get_decoder(payload: str) -> Callable[..., pd.DataFrame]:
+    """Decoder registered for a payload name"""
+    try:
+        return DECODERS[payload]
+    except KeyError:
+        raise ValueError("payload must be one of {}".format(sorted(DECODERS))) from None
+
+
+def payload_for(dataset: str) -> str:
+    """Payload name of the files of a dataset, e.g. ``payload_for("GSG")``"""
+    return DATASET_PAYLOADS[dataset.upper()]
+
+
+def coerce_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Cast the columns of a DataFrame to a dtype mapping, tolerating bad values
+
+    Numeric values that cannot be parsed become missing values. Columns
+    cast to ``category`` or ``object`` keep their values as read, so parse
+    them as strings to keep leading zeros.
+
+    Args:
+        df: DataFrame to cast
+        dtypes: Dictionary of {column name: dtype}
+
+    Returns:
+        The cast DataFrame
+    """
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        try:
+            df[column] = df[column].astype(dtype)
+        except (ValueError, TypeError):
+            numeric = pd.to_numeric(df[column], errors="coerce")
+            if pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+                numeric = numeric.where(numeric == numeric.round())
+            df[column] = numeric.astype(dtype)
+    return df
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate DataFrames without losing categorical columns
+
+    ``pd.concat`` falls back to object dtype when categoricals have
+    different categories, so the categories are unioned first.
+
+    Args:
+        frames: DataFrames with the same columns
+
+    Returns:
+        Concatenated DataFrame with a fresh RangeIndex
+    """
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    # Shallow copies, so filtered slices and the callers' frames are left alone
+    frames = [df.copy(deep=False) for df in frames]
+    for column in frames[0].columns:
+        series = [df[column] for df in frames if column in df.columns]
+        if len(series) == len(frames) and all(
+                isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+            categories = union_categoricals(series, ignore_order=True).categories
+            for df in frames:
+                df[column] = df[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
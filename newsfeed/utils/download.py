@@ -0,0 +1,197 @@
+"""
+Shared HTTP helpers for the synchronous GDELT file downloaders
+author: Terence Junjie LIU
+date: 2026
+"""
+import io
+import os
+import hashlib
+import logging
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from fake_useragent import UserAgent
+
+from newsfeed.utils.decoders import spool_response
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive connections per host held by each worker's session
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+# Bytes hashed at a time when verifying a download
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Per-process state; re-created after a fork so workers never share sockets
+_worker_pid: Optional[int] = None
+_worker_session: Optional[requests.Session] = None
+_worker_user_agent: Optional[str] = None
+
+
+def _reset_if_forked() -> None:
+    global _worker_pid, _worker_session, _worker_user_agent
+    if _worker_pid != os.getpid():
+        _worker_pid = os.getpid()
+        _worker_session = None
+        _worker_user_agent = None
+
+
+def worker_user_agent() -> str:
+    """
+    Get the User-Agent string of the current worker process
+
+    A random User-Agent is chosen the first time this is called in a
+    process and reused afterwards, so the fake_useragent database is only
+    loaded once per worker.
+
+    Returns:
+        User-Agent string
+    """
+    global _worker_user_agent
+    _reset_if_forked()
+    if _worker_user_agent is None:
+        _worker_user_agent = str(UserAgent().random)
+    return _worker_user_agent
+
+
+def get_session() -> requests.Session:
+    """
+    Get the keep-alive HTTP session of the current worker process
+
+    The session mounts a pooled adapter for http and https and carries the
+    worker's User-Agent header, so consecutive downloads in the same
+    process reuse their TCP/TLS connections.
+
+    Returns:
+        requests Session
+    """
+    global _worker_session
+    _reset_if_forked()
+    if _worker_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                              pool_maxsize=POOL_MAXSIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": worker_user_agent()})
+        _worker_session = session
+    return _worker_session
+
+
+def tag_download(df: pd.DataFrame, url: str, num_bytes: int) -> pd.DataFrame:
+    """
+    Record the source file and the number of bytes fetched on a DataFrame
+
+    The values are stored in ``df.attrs`` so they survive the trip back
+    from multiprocessing pool workers.
+
+    Args:
+        df: DataFrame parsed from the downloaded file
+        url: Source file name or URL
+        num_bytes: Number of bytes received over the wire
+
+    Returns:
+        The same DataFrame
+    """
+    df.attrs["source_file"] = url
+    df.attrs["bytes_fetched"] = int(num_bytes)
+    logger.debug(f"Fetched {num_bytes} bytes for {url}")
+    return df
+
+
+def bytes_fetched(frames: Iterable[pd.DataFrame]) -> Dict[str, int]:
+    """
+    Collect the per-file byte counters recorded by ``tag_download``
+
+    Args:
+        frames: DataFrames returned by the downloaders
+
+    Returns:
+        Dictionary of {source_file: bytes_fetched}
+    """
+    counters = {}
+    for df in frames:
+        source_file = df.attrs.get("source_file")
+        if source_file is not None:
+            counters[source_file] = df.attrs.get("bytes_fetched", 0)
+    return counters
+
+
+def track_downloads(results: Iterable, counters: Dict[str, int]) -> Iterator[pd.DataFrame]:
+    """
+    Yield the DataFrames among download results, recording their byte counters
+
+    Args:
+        results: Return values of the downloaders, DataFrames or errors
+        counters: Dictionary updated with {source_file: bytes_fetched} as
+            the results are consumed
+
+    Yields:
+        The DataFrames of ``results``
+    """
+    for result in results:
+        if isinstance(result, pd.DataFrame):
+            counters.update(bytes_fetched([result]))
+            yield result
+
+
+def open_body(response, streaming: bool = False) -> Tuple[BinaryIO, int]:
+    """
+    Expose a response body as a seekable file object
+
+    Args:
+        response: requests response
+        streaming: Spool the body from the socket instead of reading
+            ``response.content`` into memory (the request must have been
+            sent with ``stream=True``)
+
+    Returns:
+        Tuple of (file object, number of bytes fetched)
+    """
+    if streaming:
+        body = spool_response(response)
+        num_bytes = body.seek(0, io.SEEK_END)
+        body.seek(0)
+    else:
+        body = io.BytesIO(response.content)
+        num_bytes = len(response.content)
+    return body, num_bytes
+
+
+class ChecksumMismatch(IOError):
+    """A downloaded file does not have the size or MD5 GDELT published for it"""
+
+
+def verify_body(body: BinaryIO, url: str, expected: Tuple[int, str]) -> None:
+    """
+    Check a downloaded body against the size and MD5 of the GDELT manifest
+
+    Args:
+        body: Seekable file object returned by ``open_body``; it is
+            rewound afterwards
+        url: Source file name, for the error message
+        expected: ``(size, md5)`` of the file
+
+    Raises:
+        ChecksumMismatch: If the size or the MD5 differs
+    """
+    size, md5 = expected
+    digest = hashlib.md5()
+    num_bytes = 0
+    body.seek(0)
+    for chunk in iter(lambda: body.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+        num_bytes += len(chunk)
+    body.seek(0)
+    if num_bytes != size:
+        raise ChecksumMismatch("{}: received {} bytes, expected {}".format(url, num_bytes, size))
+    if digest.hexdigest() != md5:
+        raise ChecksumMismatch("{}: MD5 {} does not match {}".format(url, digest.hexdigest(), md5))
+
+
+def return_last_error(retry_state):
+    """tenacity ``retry_error_callback`` returning the last error instead of raising it"""
+    return retry_state.outcome.exception()
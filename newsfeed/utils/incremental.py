@@ -3,65 +3,162 @@ Incremental query management for GDELT
 author: Terence Junjie LIU
 date: 2026
 """
+import os
 import sqlite3
 import json
+import threading
 from pathlib import Path
-from typing import Optional, List, Set
+from typing import Iterable, Iterator, Optional, List, Set, Tuple
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Status of a file in the history; failed files are retried by the next query
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+# Downloaded files recorded in the history at a time while a query runs
+CHECKPOINT_FILES = 32
+
+QUERY_HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS query_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query_key TEXT UNIQUE NOT NULL,
+        db_type TEXT NOT NULL,
+        version TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        num_files INTEGER NOT NULL DEFAULT 0,
+        query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        table_type TEXT,
+        translation INTEGER DEFAULT 0
+    )
+'''
+
 
 class IncrementalManager:
-    """Manage incremental query history"""
-    
+    """
+    Manage incremental query history
+
+    Every attempted file is one row keyed by ``(db_type, version, file)``,
+    so queries over overlapping date ranges share their history, and the
+    files still to download are found with one indexed query. Files whose
+    download failed are kept with a ``failed`` status and fetched again by
+    the next incremental query. The database runs in WAL mode over a single
+    connection per process.
+    """
+
     def __init__(self, db_path: Optional[str] = None):
         """
         Initialize incremental manager
-        
+
         Args:
             db_path: Path to SQLite database. If None, uses ~/.cache/newsfeed/query_history.db
         """
         if db_path is None:
             home = Path.home()
             db_path = home / ".cache" / "newsfeed" / "query_history.db"
-        
+
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
         self._init_db()
-    
+
+    def __getstate__(self):
+        # Pool workers open their own connection
+        return {"db_path": str(self.db_path)}
+
+    def __setstate__(self, state):
+        self.__init__(state["db_path"])
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection of this process, opening it on first use"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=30,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # Scratch table for the set difference in get_new_files
+            self._conn.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS candidate_files (
+                    pos INTEGER PRIMARY KEY,
+                    file TEXT NOT NULL
+                )
+            ''')
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
     def _init_db(self):
-        """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create query history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS query_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query_key TEXT UNIQUE NOT NULL,
-                db_type TEXT NOT NULL,
-                version TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                downloaded_files TEXT NOT NULL,
-                query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                table_type TEXT,
-                translation INTEGER DEFAULT 0
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
+        """Initialize database schema, migrating the JSON file lists of older versions"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executescript('''
+                    CREATE TABLE IF NOT EXISTS downloaded_files (
+                        db_type TEXT NOT NULL,
+                        version TEXT NOT NULL,
+                        file TEXT NOT NULL,
+                        downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        status TEXT NOT NULL DEFAULT 'ok',
+                        attempts INTEGER NOT NULL DEFAULT 1,
+                        PRIMARY KEY (db_type, version, file)
+                    ) WITHOUT ROWID;
+                ''')
+                file_columns = [row[1] for row in conn.execute("PRAGMA table_info(downloaded_files)")]
+                if "status" not in file_columns:
+                    conn.execute("ALTER TABLE downloaded_files ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+                    conn.execute("ALTER TABLE downloaded_files ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1")
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(query_history)")]
+                if "downloaded_files" in columns:
+                    self._migrate_file_lists(conn)
+                conn.execute(QUERY_HISTORY_SCHEMA)
+
+    @staticmethod
+    def _migrate_file_lists(conn: sqlite3.Connection) -> None:
+        """Move the JSON file lists of the old query_history table into downloaded_files"""
+        rows = conn.execute('''
+            SELECT query_key, db_type, version, start_date, end_date,
+                   downloaded_files, query_time, table_type, translation
+            FROM query_history
+        ''').fetchall()
+        history = []
+        for row in rows:
+            try:
+                files = json.loads(row[5])
+            except Exception as e:
+                logger.warning(f"Failed to parse downloaded files of {row[0]}: {e}")
+                files = []
+            conn.executemany('''
+                INSERT OR IGNORE INTO downloaded_files (db_type, version, file, downloaded_at)
+                VALUES (?, ?, ?, ?)
+            ''', [(row[1], row[2], file, row[6]) for file in files])
+            history.append(row[:5] + (len(files),) + row[6:])
+        conn.execute("DROP TABLE query_history")
+        conn.execute(QUERY_HISTORY_SCHEMA)
+        conn.executemany('''
+            INSERT INTO query_history
+            (query_key, db_type, version, start_date, end_date, num_files,
+             query_time, table_type, translation)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', history)
+        logger.info(f"Migrated {len(rows)} query history record(s) to per-file rows")
+
     def _generate_query_key(self, **kwargs) -> str:
         """
         Generate unique key for query
-        
+
         Args:
             **kwargs: Query parameters
-            
+
         Returns:
             Query key string
         """
@@ -71,174 +168,245 @@ class IncrementalManager:
             if value is not None:
                 key_parts.append(f"{key}={value}")
         return "|".join(key_parts)
-    
+
     def get_downloaded_files(self, **kwargs) -> Set[str]:
         """
-        Get list of previously downloaded files for a query
-        
+        Get the files previously downloaded for a database
+
         Args:
-            **kwargs: Query parameters
-            
+            **kwargs: Query parameters; only db_type and version are used
+
         Returns:
             Set of downloaded file names
         """
-        query_key = self._generate_query_key(**kwargs)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT downloaded_files FROM query_history
-            WHERE query_key = ?
-            ORDER BY query_time DESC
-            LIMIT 1
-        ''', (query_key,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            try:
-                files_json = result[0]
-                return set(json.loads(files_json))
-            except Exception as e:
-                logger.warning(f"Failed to parse downloaded files: {e}")
-                return set()
-        
-        return set()
-    
-    def save_query_history(self, downloaded_files: List[str], **kwargs) -> None:
+        return self._files_with_status(STATUS_OK, **kwargs)
+
+    def get_failed_files(self, **kwargs) -> Set[str]:
+        """
+        Get the files whose last download failed for a database
+
+        Args:
+            **kwargs: Query parameters; only db_type and version are used
+
+        Returns:
+            Set of file names to be retried
+        """
+        return self._files_with_status(STATUS_FAILED, **kwargs)
+
+    def _files_with_status(self, status: str, **kwargs) -> Set[str]:
+        with self._lock:
+            rows = self._connect().execute('''
+                SELECT file FROM downloaded_files
+                WHERE db_type = ? AND version = ? AND status = ?
+            ''', (kwargs.get('db_type'), kwargs.get('version'), status)).fetchall()
+        return {row[0] for row in rows}
+
+    @staticmethod
+    def _record_downloaded(conn: sqlite3.Connection, db_type: str, version: str,
+                           files: List[str]) -> None:
+        conn.executemany('''
+            INSERT INTO downloaded_files (db_type, version, file, status)
+            VALUES (?, ?, ?, 'ok')
+            ON CONFLICT (db_type, version, file) DO UPDATE SET
+                status = 'ok', attempts = attempts + 1,
+                downloaded_at = CURRENT_TIMESTAMP
+        ''', [(db_type, version, file) for file in files])
+
+    def record_downloaded(self, downloaded_files: List[str], **kwargs) -> None:
+        """
+        Add downloaded files to the history while a query is still running
+
+        Unlike ``save_query_history`` no query record is written, so the
+        files of an interrupted query are not downloaded again.
+
+        Args:
+            downloaded_files: Successfully downloaded file names
+            **kwargs: Query parameters; only db_type and version are used
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._record_downloaded(conn, kwargs.get('db_type'), kwargs.get('version'),
+                                        downloaded_files)
+        logger.debug(f"Checkpointed {len(downloaded_files)} files of "
+                     f"{kwargs.get('db_type')} {kwargs.get('version')}")
+
+    def save_query_history(self, downloaded_files: List[str],
+                           failed_files: Optional[List[str]] = None,
+                           **kwargs) -> None:
         """
         Save query history with downloaded files
-        
+
+        The files are added to the history of the database; files recorded
+        by earlier queries are kept. Failed files are recorded for a retry
+        by the next query, unless an earlier query already downloaded them.
+
         Args:
-            downloaded_files: List of downloaded file names
+            downloaded_files: List of successfully downloaded file names
+            failed_files: List of file names whose download failed
             **kwargs: Query parameters
         """
         query_key = self._generate_query_key(**kwargs)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Use OR REPLACE to update existing entry
-        cursor.execute('''
-            INSERT OR REPLACE INTO query_history
-            (query_key, db_type, version, start_date, end_date, downloaded_files, table_type, translation)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            query_key,
-            kwargs.get('db_type'),
-            kwargs.get('version'),
-            kwargs.get('start_date'),
-            kwargs.get('end_date'),
-            json.dumps(downloaded_files),
-            kwargs.get('table_type', ''),
-            int(kwargs.get('translation', False))
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"Saved query history for {query_key}: {len(downloaded_files)} files")
-    
+        db_type = kwargs.get('db_type')
+        version = kwargs.get('version')
+        failed_files = failed_files or []
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._record_downloaded(conn, db_type, version, downloaded_files)
+                conn.executemany('''
+                    INSERT INTO downloaded_files (db_type, version, file, status)
+                    VALUES (?, ?, ?, 'failed')
+                    ON CONFLICT (db_type, version, file) DO UPDATE SET
+                        attempts = attempts + 1
+                    WHERE status = 'failed'
+                ''', [(db_type, version, file) for file in failed_files])
+                conn.execute('''
+                    INSERT OR REPLACE INTO query_history
+                    (query_key, db_type, version, start_date, end_date, num_files, table_type, translation)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    query_key,
+                    db_type,
+                    version,
+                    kwargs.get('start_date'),
+                    kwargs.get('end_date'),
+                    len(downloaded_files),
+                    kwargs.get('table_type', ''),
+                    int(kwargs.get('translation', False))
+                ))
+
+        logger.info(f"Saved query history for {query_key}: {len(downloaded_files)} files, "
+                    f"{len(failed_files)} failed")
+
     def get_new_files(self, all_files: List[str], **kwargs) -> List[str]:
         """
         Get list of files that haven't been downloaded yet
-        
+
+        Files downloaded by any earlier query of the same db_type and
+        version count, whatever its date range was. Files that failed
+        before are returned again.
+
         Args:
             all_files: Complete list of files to download
             **kwargs: Query parameters
-            
+
         Returns:
-            List of new files to download
+            List of new files to download, in the order of ``all_files``
         """
-        downloaded_files = self.get_downloaded_files(**kwargs)
-        new_files = [f for f in all_files if f not in downloaded_files]
-        
-        logger.info(f"Total files: {len(all_files)}, Already downloaded: {len(downloaded_files)}, New files: {len(new_files)}")
-        
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM candidate_files")
+                conn.executemany("INSERT INTO candidate_files (pos, file) VALUES (?, ?)",
+                                 enumerate(all_files))
+                new_files = [row[0] for row in conn.execute('''
+                    SELECT c.file FROM candidate_files AS c
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM downloaded_files AS d
+                        WHERE d.db_type = ? AND d.version = ? AND d.file = c.file
+                          AND d.status = 'ok'
+                    )
+                    ORDER BY c.pos
+                ''', (kwargs.get('db_type'), kwargs.get('version')))]
+                conn.execute("DELETE FROM candidate_files")
+
+        logger.info(f"Total files: {len(all_files)}, Already downloaded: {len(all_files) - len(new_files)}, New files: {len(new_files)}")
+
         return new_files
-    
+
     def clear_history(self, **kwargs) -> int:
         """
-        Clear query history for specific query
-        
+        Clear the history of a database
+
+        The file history is shared by all date ranges, so this forgets every
+        file downloaded for the db_type and version of the query.
+
         Args:
             **kwargs: Query parameters
-            
+
         Returns:
-            Number of records deleted
+            Number of file records deleted
         """
-        query_key = self._generate_query_key(**kwargs)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM query_history WHERE query_key = ?', (query_key,))
-        count = cursor.rowcount
-        
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"Cleared history for {query_key}: {count} record(s) deleted")
+        db_type = kwargs.get('db_type')
+        version = kwargs.get('version')
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                count = conn.execute('''
+                    DELETE FROM downloaded_files WHERE db_type = ? AND version = ?
+                ''', (db_type, version)).rowcount
+                conn.execute('''
+                    DELETE FROM query_history WHERE db_type = ? AND version = ?
+                ''', (db_type, version))
+
+        logger.info(f"Cleared history for {db_type} {version}: {count} file record(s) deleted")
         return count
-    
+
     def clear_all_history(self) -> int:
         """
         Clear all query history
-        
+
         Returns:
-            Number of records deleted
+            Number of query records deleted
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM query_history')
-        count = cursor.rowcount
-        
-        conn.commit()
-        conn.close()
-        
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                count = conn.execute('DELETE FROM query_history').rowcount
+                conn.execute('DELETE FROM downloaded_files')
+
         logger.info(f"Cleared all history: {count} record(s) deleted")
         return count
-    
+
     def get_history_stats(self) -> dict:
         """
         Get statistics about query history
-        
+
         Returns:
             Dictionary with history statistics
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total queries
-        cursor.execute('SELECT COUNT(*) FROM query_history')
-        total_queries = cursor.fetchone()[0]
-        
-        # Queries by database type
-        cursor.execute('''
-            SELECT db_type, COUNT(*) as count 
-            FROM query_history 
-            GROUP BY db_type
-        ''')
-        by_db_type = dict(cursor.fetchall())
-        
-        # Most recent query
-        cursor.execute('''
-            SELECT db_type, version, start_date, end_date, query_time
-            FROM query_history
-            ORDER BY query_time DESC
-            LIMIT 1
-        ''')
-        most_recent = cursor.fetchone()
-        
-        conn.close()
-        
+        with self._lock:
+            conn = self._connect()
+
+            # Total queries
+            total_queries = conn.execute('SELECT COUNT(*) FROM query_history').fetchone()[0]
+
+            # Queries by database type
+            by_db_type = dict(conn.execute('''
+                SELECT db_type, COUNT(*) as count
+                FROM query_history
+                GROUP BY db_type
+            ''').fetchall())
+
+            # Downloaded files by database type
+            files_by_db_type = dict(conn.execute('''
+                SELECT db_type, COUNT(*) as count
+                FROM downloaded_files
+                WHERE status = 'ok'
+                GROUP BY db_type
+            ''').fetchall())
+            failed_files = conn.execute('''
+                SELECT COUNT(*) FROM downloaded_files WHERE status = 'failed'
+            ''').fetchone()[0]
+
+            # Most recent query
+            most_recent = conn.execute('''
+                SELECT db_type, version, start_date, end_date, query_time
+                FROM query_history
+                ORDER BY query_time DESC, id DESC
+                LIMIT 1
+            ''').fetchone()
+
         return {
             "db_path": str(self.db_path),
             "total_queries": total_queries,
             "by_db_type": by_db_type,
+            "total_files": sum(files_by_db_type.values()),
+            "files_by_db_type": files_by_db_type,
+            "failed_files": failed_files,
             "most_recent": {
                 "db_type": most_recent[0] if most_recent else None,
                 "version": most_recent[1] if most_recent else None,
@@ -249,6 +417,66 @@ class IncrementalManager:
         }
 
 
+def split_downloads(attempted_files: List[str],
+                    downloaded: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split the files a query tried to download by outcome
+
+    Args:
+        attempted_files: Files the query tried to download
+        downloaded: Source files of the DataFrames it got back, e.g. the
+            keys of ``bytes_fetched``
+
+    Returns:
+        The downloaded and the failed files, in the order of ``attempted_files``
+    """
+    downloaded = set(downloaded)
+    return ([file for file in attempted_files if file in downloaded],
+            [file for file in attempted_files if file not in downloaded])
+
+
+def checkpoint_downloads(results: Iterable,
+                         manager: Optional[IncrementalManager],
+                         every: int = CHECKPOINT_FILES,
+                         **kwargs) -> Iterator:
+    """
+    Pass download results through, recording the downloaded files as they arrive
+
+    A file counts as downloaded once the consumer asks for the next
+    result. The source files are written to the history every ``every``
+    files and when the iteration ends, also when it is interrupted (error,
+    Ctrl-C or an abandoned stream). Together with the
+    granule cache, which stores each file as soon as it is parsed, this
+    lets an interrupted backfill resume where it stopped.
+
+    Args:
+        results: Return values of the downloaders, DataFrames or errors
+        manager: History to record into; None passes the results through
+        every: Number of files recorded at a time
+        **kwargs: Query parameters; only db_type and version are used
+
+    Yields:
+        The items of ``results``
+    """
+    if manager is None:
+        yield from results
+        return
+    pending = []
+    try:
+        for result in results:
+            source_file = getattr(result, "attrs", {}).get("source_file")
+            yield result
+            # Recorded once the consumer is done with it
+            if source_file is not None:
+                pending.append(source_file)
+                if len(pending) >= every:
+                    manager.record_downloaded(pending, **kwargs)
+                    pending = []
+    finally:
+        if pending:
+            manager.record_downloaded(pending, **kwargs)
+
+
 # Global incremental manager instance
 _global_incremental_manager: Optional[IncrementalManager] = None
 
@@ -258,4 +486,4 @@ def get_incremental_manager() -> IncrementalManager:
     global _global_incremental_manager
     if _global_incremental_manager is None:
         _global_incremental_manager = IncrementalManager()
-    return _global_incremental_manager
\ No newline at end of file
+    return _global_incremental_manager
@@ -0,0 +1,290 @@
+"""
+Index of the files published by GDELT 2.0
+author: Terence Junjie LIU
+date: 2026
+
+GDELT lists every 15-minute file it publishes, with its size and MD5, in
+``masterfilelist.txt`` and announces the newest slice in ``lastupdate.txt``.
+The index loads the master list once into SQLite and then follows
+``lastupdate.txt``, so URL lists only name files that exist and slices lost
+to GDELT outages are never requested. The master list only ever grows, so
+after a gap only the part appended since the last read is fetched.
+"""
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from newsfeed.utils.download import get_session
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "http://data.gdeltproject.org/gdeltv2/"
+FEEDS = {
+    "english": ("masterfilelist.txt", "lastupdate.txt"),
+    "translation": ("masterfilelist-translation.txt", "lastupdate-translation.txt"),
+}
+# Seconds between two checks of lastupdate.txt; GDELT publishes every 15 minutes
+DEFAULT_MAX_AGE = 15 * 60
+# Minutes between two consecutive slices
+SLICE_MINUTES = 15
+INSERT_BATCH_ROWS = 50_000
+
+
+def parse_manifest_line(line: str) -> Optional[Tuple[str, str, str, int, str]]:
+    """
+    Parse one ``size md5 url`` line of a GDELT file list
+
+    Args:
+        line: Line of masterfilelist.txt or lastupdate.txt
+
+    Returns:
+        ``(file, slice, kind, size, md5)``, e.g. ``("20210101001500.export.CSV.zip",
+        "20210101001500", "export.CSV.zip", 152830, "...")``, or None for
+        malformed lines
+    """
+    parts = line.split()
+    if len(parts) != 3 or not parts[0].isdigit():
+        return None
+    size, md5, url = parts
+    file_name = os.path.basename(url)
+    slice_time, _, kind = file_name.partition(".")
+    if len(slice_time) != 14 or not slice_time.isdigit() or not kind:
+        return None
+    return file_name, slice_time, kind, int(size), md5
+
+
+def _next_slice(slice_time: str) -> str:
+    next_time = datetime.strptime(slice_time, "%Y%m%d%H%M%S") + timedelta(minutes=SLICE_MINUTES)
+    return next_time.strftime("%Y%m%d%H%M%S")
+
+
+def _slice_bound(date: str) -> str:
+    """
+    A query date as a YYYYMMDDHHMMSS slice stamp
+
+    Shorter dates stand for the start of their day, hour or minute, as in
+    ``pd.date_range``, e.g. 20210102 -> 20210102000000.
+    """
+    return date.ljust(14, "0")
+
+
+class ManifestIndex:
+    """SQLite index of the GDELT 2.0 master file lists"""
+
+    def __init__(self, db_path: Optional[str] = None, max_age: int = DEFAULT_MAX_AGE):
+        """
+        Initialize manifest index
+
+        Args:
+            db_path: Path to SQLite database. If None, uses ~/.cache/newsfeed/manifest.db
+            max_age: Seconds before lastupdate.txt is checked again
+        """
+        if db_path is None:
+            db_path = Path.home() / ".cache" / "newsfeed" / "manifest.db"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        """Initialize database schema"""
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS manifest_files (
+                file TEXT PRIMARY KEY,
+                feed TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                slice TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                md5 TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS manifest_files_kind_slice
+                ON manifest_files (kind, slice);
+
+            CREATE TABLE IF NOT EXISTS manifest_state (
+                feed TEXT PRIMARY KEY,
+                last_slice TEXT NOT NULL,
+                checked REAL NOT NULL,
+                master_bytes INTEGER
+            );
+        ''')
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(manifest_state)')]
+        if 'master_bytes' not in columns:
+            conn.execute('ALTER TABLE manifest_state ADD COLUMN master_bytes INTEGER')
+        conn.commit()
+        conn.close()
+
+    def _fetch_lines(self, name: str, proxy: Optional[dict],
+                     offset: Optional[int] = None) -> Tuple[Optional[Iterator[str]], Optional[int]]:
+        """
+        Stream the lines of a file list
+
+        Args:
+            name: File list name, e.g. masterfilelist.txt
+            proxy: requests proxies
+            offset: Only read the part of the list after this many bytes
+
+        Returns:
+            ``(lines, size)``, where size is the length of the whole list
+            in bytes if the server reports it. Lines is None if the list no
+            longer starts with the part already read
+        """
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            # Start at the newline ending the part already read
+            headers["Range"] = "bytes={}-".format(offset - 1)
+        response = get_session().get(BASE_URL + name, headers=headers, proxies=proxy,
+                                     timeout=60, stream=True)
+        response.raise_for_status()
+        lines = response.iter_lines(decode_unicode=True)
+        if response.status_code == 206:
+            size = response.headers.get("Content-Range", "").rpartition("/")[2]
+            if next(lines, None) != "":
+                return None, None
+        else:
+            size = response.headers.get("Content-Length")
+        return (line for line in lines if line), int(size) if size and size.isdigit() else None
+
+    def _store(self, conn: sqlite3.Connection, feed: str, lines: Iterable[str]) -> Optional[str]:
+        """Insert the entries of a file list; returns the newest slice seen"""
+        last_slice = None
+        batch = []
+        for line in lines:
+            entry = parse_manifest_line(line)
+            if entry is None:
+                continue
+            file_name, slice_time, kind, size, md5 = entry
+            batch.append((file_name, feed, kind, slice_time, size, md5))
+            last_slice = max(last_slice or slice_time, slice_time)
+            if len(batch) >= INSERT_BATCH_ROWS:
+                conn.executemany("INSERT OR REPLACE INTO manifest_files VALUES (?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+        conn.executemany("INSERT OR REPLACE INTO manifest_files VALUES (?, ?, ?, ?, ?, ?)", batch)
+        return last_slice
+
+    def state(self, translation: bool = False) -> Optional[Tuple[str, float, Optional[int]]]:
+        """
+        Newest indexed slice of a feed, when lastupdate.txt was last checked
+        and how many bytes of the master list were read
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT last_slice, checked, master_bytes FROM manifest_state WHERE feed = ?",
+                           ("translation" if translation else "english",)).fetchone()
+        conn.close()
+        return row
+
+    def refresh(self, translation: bool = False, proxy: Optional[dict] = None,
+                force: bool = False, until: Optional[str] = None) -> str:
+        """
+        Bring the index up to date
+
+        The first refresh loads the whole master file list. Later refreshes
+        only read lastupdate.txt, unless slices were published in between,
+        in which case the part of the master list appended since it was
+        last read is fetched.
+
+        Args:
+            translation: Refresh the translated feed instead of the English one
+            proxy: requests proxies
+            force: Check lastupdate.txt even if it was checked recently
+            until: Newest slice the caller needs, YYYYMMDD[HHMMSS]; an
+                index that already reaches it is not refreshed
+
+        Returns:
+            The newest indexed slice, e.g. 20210101001500
+        """
+        feed = "translation" if translation else "english"
+        master_list, last_update = FEEDS[feed]
+        state = self.state(translation)
+        if state is not None and not force and (
+                (until is not None and _slice_bound(until) <= state[0])
+                or time.time() - state[1] < self.max_age):
+            return state[0]
+
+        conn = self._connect()
+        try:
+            master_bytes = state[2] if state is not None else None
+            if state is None:
+                print("[+] Indexing GDELT {} ...".format(master_list))
+                last_slice, master_bytes = self._store_master(conn, feed, proxy)
+            else:
+                update, _ = self._fetch_lines(last_update, proxy)
+                update = list(update)
+                entries = [entry for entry in map(parse_manifest_line, update) if entry]
+                newest = max((entry[1] for entry in entries), default=state[0])
+                if newest > _next_slice(state[0]):
+                    # Missed more than one slice since the last check
+                    last_slice, master_bytes = self._store_master(conn, feed, proxy, master_bytes)
+                else:
+                    last_slice = self._store(conn, feed, update)
+                last_slice = max(last_slice or state[0], state[0])
+            if last_slice is None:
+                raise ValueError("GDELT {} lists no files".format(master_list))
+            conn.execute("INSERT OR REPLACE INTO manifest_state VALUES (?, ?, ?, ?)",
+                         (feed, last_slice, time.time(), master_bytes))
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"GDELT {feed} manifest indexed up to {last_slice}")
+        return last_slice
+
+    def _store_master(self, conn: sqlite3.Connection, feed: str, proxy: Optional[dict],
+                      offset: Optional[int] = None) -> Tuple[Optional[str], Optional[int]]:
+        """Index the master list, from ``offset`` bytes if it was read before"""
+        master_list = FEEDS[feed][0]
+        lines, size = self._fetch_lines(master_list, proxy, offset)
+        if lines is None:
+            logger.warning(f"GDELT {master_list} was rewritten, reading it again")
+            lines, size = self._fetch_lines(master_list, proxy)
+        return self._store(conn, feed, lines), size
+
+    def files(self, kind: str, start: str, end: str) -> List[Tuple[str, int, str]]:
+        """
+        Files of one kind published between two slices
+
+        Args:
+            kind: File name after the timestamp, e.g. export.CSV.zip,
+                mentions.CSV.zip, gkg.csv.zip or translation.export.CSV.zip
+            start: First slice, YYYYMMDD[HHMMSS]
+            end: Last slice (inclusive), YYYYMMDD[HHMMSS]; a date alone
+                ends at its 00:00 slice, as in ``pd.date_range``
+
+        Returns:
+            ``(file, size, md5)`` tuples in time order
+        """
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT file, size, md5 FROM manifest_files
+            WHERE kind = ? AND slice BETWEEN ? AND ?
+            ORDER BY slice
+        ''', (kind, _slice_bound(start), _slice_bound(end))).fetchall()
+        conn.close()
+        return rows
+
+    def entry(self, file_name: str) -> Optional[Tuple[int, str]]:
+        """``(size, md5)`` of one file, or None if it is not indexed"""
+        conn = self._connect()
+        row = conn.execute("SELECT size, md5 FROM manifest_files WHERE file = ?",
+                           (file_name,)).fetchone()
+        conn.close()
+        return row
+
+
+# Global manifest index instance
+_global_manifest_index: Optional[ManifestIndex] = None
+
+
+def get_manifest_index() -> ManifestIndex:
+    """Get global manifest index instance"""
+    global _global_manifest_index
+    if _global_manifest_index is None:
+        _global_manifest_index = ManifestIndex()
+    return _global_manifest_index
@@ -0,0 +1,218 @@
+"""
+Local Parquet mirror of GDELT files
+author: Terence Junjie LIU
+date: 2026
+
+``python -m newsfeed sync`` downloads whole GDELT files into a directory
+tree partitioned by database, table and date:
+
+    <root>/EVENT_V2/events/date=2021-01-01/20210101001500.export.CSV.parquet
+
+Each file is parsed once with all columns. Queries whose range is fully
+mirrored are answered from these files without touching the network.
+"""
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from newsfeed.utils.cache import ParquetBackend
+from newsfeed.utils.incremental import IncrementalManager, split_downloads, checkpoint_downloads
+from newsfeed.utils.stream import iter_pool
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIRROR_DIR = Path.home() / ".cache" / "newsfeed" / "mirror"
+HISTORY_FILE = "sync_history.db"
+
+
+def _partition_date(file_name: str) -> str:
+    """Date partition of a GDELT file, e.g. 2021-01-01 for 20210101001500.export.CSV.zip"""
+    match = re.match(r"(\d{4})(\d{2})(\d{2})", os.path.basename(file_name))
+    if match is None:
+        raise ValueError("Cannot tell the date of {}".format(file_name))
+    return "-".join(match.groups())
+
+
+class Mirror:
+    """
+    Parquet mirror of GDELT files, partitioned by database, table and date
+
+    Which files are mirrored is recorded with an ``IncrementalManager`` in
+    the mirror directory, so a sync only downloads the files it is missing
+    and retries the ones that failed.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize mirror
+
+        Args:
+            root: Mirror directory. If None, uses ~/.cache/newsfeed/mirror
+        """
+        self.root = Path(root) if root is not None else DEFAULT_MIRROR_DIR
+        self.backend = ParquetBackend()
+        self._history = None
+
+    def __getstate__(self):
+        return {"root": str(self.root)}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"])
+
+    @property
+    def history(self) -> IncrementalManager:
+        """History of the synced files, created on first use"""
+        if self._history is None:
+            self._history = IncrementalManager(self.root / HISTORY_FILE)
+        return self._history
+
+    def exists(self) -> bool:
+        """Whether anything was ever synced into this mirror"""
+        return (self.root / HISTORY_FILE).exists()
+
+    def path(self, file_name: str, db_type: str, version: str, table: str) -> Path:
+        """
+        Location of a mirrored file
+
+        Args:
+            file_name: Source file name or URL
+            db_type: Database type, e.g. EVENT or GKG
+            version: Database version, e.g. V2
+            table: Table, e.g. events, mentions or gkg
+
+        Returns:
+            Path of the Parquet file
+        """
+        base_name = os.path.basename(file_name)
+        if base_name.endswith(".zip"):
+            base_name = base_name[:-len(".zip")]
+        return (self.root / f"{db_type}_{version}" / table /
+                f"date={_partition_date(base_name)}" / (base_name + self.backend.suffix))
+
+    def write(self, data: pd.DataFrame, file_name: str, db_type: str,
+              version: str, table: str) -> Path:
+        """
+        Store a fully parsed file, replacing any earlier copy atomically
+
+        Returns:
+            Path of the Parquet file
+        """
+        path = self.path(file_name, db_type, version, table)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(".{}.{}.{}.tmp".format(
+            path.name, os.getpid(), threading.get_ident()))
+        try:
+            self.backend.write(data, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return path
+
+    def covers(self, file_names: List[str], db_type: str, version: str, table: str) -> bool:
+        """
+        Whether every file of a query is in the mirror
+
+        Args:
+            file_names: Files of the query, as returned by ``_query_list``
+            db_type: Database type
+            version: Database version
+            table: Table
+
+        Returns:
+            True if the query can be answered from the mirror alone
+        """
+        if not file_names or not self.exists():
+            return False
+        if self.history.get_new_files(file_names, db_type=db_type, version=version):
+            return False
+        return all(self.path(file_name, db_type, version, table).exists()
+                   for file_name in file_names)
+
+    def read(self, file_names: List[str], db_type: str, version: str, table: str,
+             columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read mirrored files one by one
+
+        Args:
+            file_names: Files to read
+            db_type: Database type
+            version: Database version
+            table: Table
+            columns: Only read these columns (default: all)
+
+        Yields:
+            One DataFrame per file, in the order of ``file_names``
+        """
+        for file_name in file_names:
+            yield self.backend.read(self.path(file_name, db_type, version, table), columns)
+
+    def sync(self, db, file_names: List[str]) -> dict:
+        """
+        Download the files missing from the mirror
+
+        Args:
+            db: Database object whose ``_download_file`` parses a whole file
+                and whose ``mirror_key`` is ``(db_type, version, table)``
+            file_names: Files of the range to mirror
+
+        Returns:
+            Dictionary with the numbers of files already mirrored,
+            downloaded and failed
+        """
+        db_type, version, table = db.mirror_key
+        missing = self.history.get_new_files(file_names, db_type=db_type, version=version)
+        print("[+] {} of {} files already mirrored, downloading {}...".format(
+            len(file_names) - len(missing), len(file_names), len(missing)))
+
+        written = []
+        downloaded = iter_pool(db._download_file, missing, db.cpu_num) if missing else []
+        # Record progress as files are written, so an interrupted sync resumes
+        for df in checkpoint_downloads(downloaded, self.history,
+                                       db_type=db_type, version=version):
+            if not isinstance(df, pd.DataFrame):
+                continue
+            source_file = df.attrs["source_file"]
+            df.attrs = {}
+            self.write(df, source_file, db_type, version, table)
+            written.append(source_file)
+
+        downloaded_files, failed_files = split_downloads(missing, written)
+        self.history.save_query_history(
+            downloaded_files,
+            failed_files=failed_files,
+            db_type=db_type,
+            version=version,
+            start_date=file_names[0] if file_names else "",
+            end_date=file_names[-1] if file_names else "",
+            table_type=table
+        )
+        logger.info(f"Mirrored {len(downloaded_files)} {db_type} {version} files into {self.root}")
+        return {
+            "mirrored": len(file_names) - len(missing),
+            "downloaded": len(downloaded_files),
+            "failed": len(failed_files),
+        }
+
+
+# Global mirror instance
+_global_mirror: Optional[Mirror] = None
+
+
+def get_mirror(root: Optional[str] = None) -> Mirror:
+    """
+    Get global mirror instance
+
+    Args:
+        root: Mirror directory; replaces the global mirror if it differs
+    """
+    global _global_mirror
+    if _global_mirror is None or (root is not None and Path(root) != _global_mirror.root):
+        _global_mirror = Mirror(root)
+    return _global_mirror
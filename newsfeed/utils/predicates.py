@@ -0,0 +1,143 @@
+"""
+Row predicates applied to each downloaded GDELT file
+author: Terence Junjie LIU
+date: 2026
+
+A ``where`` filter follows the ``filters`` convention of ``pd.read_parquet``:
+a list of ``(column, op, value)`` tuples that must all hold, or a list of
+such lists, any of which may hold. A dictionary ``{column: value}`` is a
+shorthand for equality (or ``in`` when the value is a list).
+
+    where=[("Actor1CountryCode", "==", "USA"), ("QuadClass", "in", [3, 4])]
+    where=[[("Actor1CountryCode", "==", "USA"), ("Actor2CountryCode", "==", "CHN")],
+           [("Actor1CountryCode", "==", "CHN"), ("Actor2CountryCode", "==", "USA")]]
+"""
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+OPERATORS = ["==", "=", "!=", "<", "<=", ">", ">=", "in", "not in",
+             "contains", "icontains"]
+
+
+def normalize_where(where, available: List[str]) -> Optional[List[List[Tuple]]]:
+    """
+    Validate a ``where`` filter and bring it into disjunctive normal form
+
+    Args:
+        where: Filter as described in the module docstring, or None
+        available: Columns of the table
+
+    Returns:
+        A list of AND-groups of ``(column, op, value)`` tuples, or None
+
+    Raises:
+        ValueError: If a column or operator is unknown
+    """
+    if where is None:
+        return None
+    if isinstance(where, dict):
+        where = [(column, "in" if isinstance(value, (list, tuple, set)) else "==", value)
+                 for column, value in where.items()]
+    where = list(where)
+    if not where:
+        return None
+    groups = where if all(isinstance(group, list) for group in where) else [where]
+
+    normalized = []
+    for group in groups:
+        predicates = []
+        for predicate in group:
+            if not isinstance(predicate, (tuple, list)) or len(predicate) != 3:
+                raise ValueError("Predicates must be (column, op, value) tuples, got {}".format(
+                    predicate))
+            column, op, value = predicate
+            op = op.lower()
+            if column not in available:
+                raise ValueError("Unknown column in where: {}".format(column))
+            if op not in OPERATORS:
+                raise ValueError("Unknown operator in where: {}. Supported operators: {}".format(
+                    op, ", ".join(OPERATORS)))
+            if op in ["in", "not in"]:
+                value = list(value)
+            predicates.append((column, op, value))
+        normalized.append(predicates)
+    return normalized
+
+
+def where_columns(where: Optional[List[List[Tuple]]]) -> List[str]:
+    """Columns referenced by a normalized ``where`` filter, in first-use order."""
+    columns = []
+    for group in where or []:
+        for column, _, _ in group:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def _mask(series: pd.Series, op: str, value) -> pd.Series:
+    if op in ["==", "="]:
+        return series == value
+    if op == "!=":
+        return series != value
+    if op == "in":
+        return series.isin(value)
+    if op == "not in":
+        return ~series.isin(value)
+    if op in ["contains", "icontains"]:
+        return series.astype("string").str.contains(
+            value, case=op == "contains", na=False, regex=True).astype(bool)
+
+    # Codes are unordered categoricals, so range comparisons use their values
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if op == "<":
+        return series < value
+    if op == "<=":
+        return series <= value
+    if op == ">":
+        return series > value
+    return series >= value
+
+
+def apply_where(df: pd.DataFrame, where: Optional[List[List[Tuple]]]) -> pd.DataFrame:
+    """
+    Keep the rows of a DataFrame that match a normalized ``where`` filter
+
+    Missing values never match, except for ``!=`` and ``not in``.
+
+    Args:
+        df: DataFrame holding every column referenced by the filter
+        where: Output of ``normalize_where``, or None to keep all rows
+
+    Returns:
+        The matching rows, keeping the DataFrame ``attrs``
+    """
+    if not where:
+        return df
+    keep = pd.Series(False, index=df.index)
+    for group in where:
+        group_mask = pd.Series(True, index=df.index)
+        for column, op, value in group:
+            group_mask &= _mask(df[column], op, value).fillna(op in ["!=", "not in"]).astype(bool)
+        keep |= group_mask
+    result = df[keep]
+    result.attrs = dict(df.attrs)
+    return result
+
+
+def parse_columns(columns: Optional[List[str]],
+                  where: Optional[List[List[Tuple]]]) -> Optional[List[str]]:
+    """
+    Columns that must be parsed to project ``columns`` after filtering
+
+    Args:
+        columns: Projected columns, or None for all columns
+        where: Normalized ``where`` filter
+
+    Returns:
+        ``columns`` plus any filter column they leave out, or None
+    """
+    if columns is None:
+        return None
+    return columns + [column for column in where_columns(where) if column not in columns]
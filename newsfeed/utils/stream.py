@@ -0,0 +1,75 @@
+"""
+Helpers for streaming query results file by file
+author: Terence Junjie LIU
+date: 2026
+"""
+import multiprocessing
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import tqdm
+import pandas as pd
+
+from newsfeed.utils.decoders import concat_frames
+
+
+def iter_pool(func: Callable, items: List, processes: int) -> Iterator:
+    """
+    Map a download function over a process pool, yielding results as they complete
+
+    The pool is torn down when the iteration finishes or is abandoned.
+
+    Args:
+        func: Picklable function, usually a bound ``_download_file``
+        items: Arguments to map over
+        processes: Number of worker processes
+
+    Yields:
+        Return values of ``func`` in completion order
+    """
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in tqdm.tqdm(pool.imap_unordered(func, items), total=len(items)):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def rebatch(frames: Iterable[pd.DataFrame],
+            batch_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Regroup a stream of DataFrames into batches of a fixed number of rows
+
+    Args:
+        frames: DataFrames with the same columns
+        batch_rows: Rows per yielded batch; None yields the frames as they are
+
+    Yields:
+        DataFrames with a fresh RangeIndex; only the last batch may be shorter
+    """
+    if batch_rows is None:
+        for frame in frames:
+            yield frame.reset_index(drop=True)
+        return
+
+    if batch_rows < 1:
+        raise ValueError("batch_rows must be a positive integer")
+    pending = []
+    pending_rows = 0
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        pending.append(frame)
+        pending_rows += len(frame)
+        if pending_rows < batch_rows:
+            continue
+        merged = concat_frames(pending)
+        start = 0
+        while len(merged) - start >= batch_rows:
+            yield merged.iloc[start:start + batch_rows].reset_index(drop=True)
+            start += batch_rows
+        pending = [merged.iloc[start:]] if start < len(merged) else []
+        pending_rows = len(merged) - start
+    if pending_rows:
+        yield concat_frames(pending)
@@ -0,0 +1,290 @@
+"""
+Incremental writers for query results
+author: Terence Junjie LIU
+date: 2026
+
+Each writer appends one DataFrame at a time, so a stream of frames from
+``iter_query()`` is written in bounded memory and reaches the disk while
+the query is still running. Frames may differ in their columns: the output
+has the union of them, in the order they were first seen.
+"""
+import csv
+import os
+from typing import Iterable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows serialised at a time by the text writers
+WRITE_CHUNK_ROWS = 100_000
+# Maximum rows per Parquet row group
+PARQUET_ROW_GROUP_ROWS = 1_000_000
+
+
+def _chunks(df: pd.DataFrame, rows: int = WRITE_CHUNK_ROWS):
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+class FrameWriter:
+    """Base class of the incremental writers"""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.rows = 0
+        self.columns = None
+
+    def write(self, df: pd.DataFrame):
+        """Append a DataFrame to the output"""
+        self._write(self._align(df))
+        self.rows += len(df)
+
+    def _align(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Reindex a frame to the output columns, adding the ones it is the first to have"""
+        if self.columns is None:
+            self.columns = list(df.columns)
+            return df
+        new_columns = [column for column in df.columns if column not in self.columns]
+        if new_columns:
+            self._add_columns(new_columns)
+            self.columns += new_columns
+        if list(df.columns) == self.columns:
+            return df
+        return df.reindex(columns=self.columns)
+
+    def _add_columns(self, columns: list):
+        """Make room for columns first seen in a later frame"""
+
+    def _write(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the output file"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CSVWriter(FrameWriter):
+    """Append DataFrames to a CSV file, writing the header once"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, 'w', encoding='utf-8', newline='')
+
+    def _write(self, df: pd.DataFrame):
+        df.to_csv(self.file, index=False, header=self.file.tell() == 0)
+        self.file.flush()
+
+    def _add_columns(self, columns: list):
+        """Rewrite the rows written so far with empty values in the new columns"""
+        if self.file.tell() == 0:
+            return
+        self.file.close()
+        temporary_path = self.output_path + ".tmp"
+        with open(self.output_path, encoding='utf-8', newline='') as written, \
+                open(temporary_path, 'w', encoding='utf-8', newline='') as widened:
+            rows = csv.reader(written)
+            writer = csv.writer(widened, lineterminator=os.linesep)
+            writer.writerow(next(rows) + columns)
+            for row in rows:
+                writer.writerow(row + [""] * len(columns))
+        os.replace(temporary_path, self.output_path)
+        self.file = open(self.output_path, 'a', encoding='utf-8', newline='')
+
+    def close(self):
+        self.file.close()
+
+
+class NDJSONWriter(FrameWriter):
+    """Append DataFrames to a newline-delimited JSON file, one record per line"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, 'w', encoding='utf-8')
+
+    def _write(self, df: pd.DataFrame):
+        for chunk in _chunks(df):
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            self.file.write(text if text.endswith("\n") else text + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JSONArrayWriter(FrameWriter):
+    """Write DataFrames as one JSON array of records, streamed record by record"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.file = open(output_path, 'w', encoding='utf-8')
+        self.file.write("[")
+        self.empty = True
+
+    def _write(self, df: pd.DataFrame):
+        for chunk in _chunks(df):
+            for line in chunk.to_json(orient='records', lines=True, force_ascii=False).splitlines():
+                self.file.write("\n" if self.empty else ",\n")
+                self.file.write(line)
+                self.empty = False
+        self.file.flush()
+
+    def close(self):
+        self.file.write("]" if self.empty else "\n]")
+        self.file.close()
+
+
+class ParquetWriter(FrameWriter):
+    """
+    Append DataFrames to a Parquet file as row groups
+
+    The schema is taken from the first frame. Categorical columns are
+    written as plain values (Parquet dictionary-encodes them anyway) and
+    all-null columns as strings, so later frames with different categories
+    or first non-null values still fit the schema. When a later frame's
+    column type drifts (an integer column that gains missing or fractional
+    values, or a number column that gains text), the column is widened to
+    float64 or string, and when it brings new columns they are appended as
+    nullable columns. The row groups already written are then copied, one
+    at a time, into a file with the new schema. Columns a frame lacks are
+    written as nulls.
+    """
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.writer = None
+        self.schema = None
+        # File being written; a sibling temporary file once widened
+        self.path = output_path
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        df = df.copy(deep=False)
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(df[column].cat.categories.dtype)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    @staticmethod
+    def _common_type(written: pa.DataType, new: pa.DataType) -> pa.DataType:
+        """Narrowest type holding the values of both column types"""
+        if written == new or pa.types.is_null(new):
+            return written
+        if pa.types.is_integer(written) and pa.types.is_integer(new):
+            return pa.int64()
+        if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (written, new)):
+            return pa.float64()
+        return pa.string()
+
+    @staticmethod
+    def _storable(field: pa.Field) -> pa.Field:
+        return field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+
+    def _align(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Aligned on the Arrow schema, so missing columns keep their written type
+        return df
+
+    def _unify(self, schema: pa.Schema) -> pa.Schema:
+        fields = [
+            field.with_type(self._common_type(field.type, schema.field(field.name).type))
+            if field.name in schema.names else field
+            for field in self.schema
+        ]
+        fields += [self._storable(field) for field in schema
+                   if field.name not in self.schema.names]
+        # The pandas metadata of the first frame would not list the new columns
+        metadata = self.schema.metadata if len(fields) == len(self.schema) else None
+        return pa.schema(fields, metadata=metadata)
+
+    @staticmethod
+    def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+        """Cast a table to a schema, in its column order, with nulls for missing columns"""
+        return pa.Table.from_arrays([
+            table.column(field.name).cast(field.type) if field.name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+            for field in schema
+        ], schema=schema)
+
+    def _widen(self, schema: pa.Schema):
+        """Copy the row groups written so far into a new file with a wider schema"""
+        self.writer.close()
+        written_path = self.path
+        self.path = (self.output_path + ".tmp" if written_path == self.output_path
+                     else self.output_path)
+        self.schema = schema
+        self.writer = pq.ParquetWriter(self.path, schema)
+        with pq.ParquetFile(written_path) as written:
+            for index in range(written.num_row_groups):
+                self.writer.write_table(self._conform(written.read_row_group(index), schema))
+        os.remove(written_path)
+
+    def _write(self, df: pd.DataFrame):
+        table = self._to_table(df)
+        if self.writer is None:
+            self.schema = pa.schema([self._storable(field) for field in table.schema],
+                                    metadata=table.schema.metadata)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        schema = self._unify(table.schema)
+        if not schema.equals(self.schema):
+            self._widen(schema)
+        self.writer.write_table(self._conform(table, self.schema),
+                                row_group_size=PARQUET_ROW_GROUP_ROWS)
+
+    def close(self):
+        if self.writer is None:
+            # Nothing was written; still leave a valid, empty file behind
+            pq.write_table(pa.table({}), self.output_path)
+            return
+        self.writer.close()
+        if self.path != self.output_path:
+            os.replace(self.path, self.output_path)
+
+
+WRITERS = {
+    "csv": CSVWriter,
+    "ndjson": NDJSONWriter,
+    "json": JSONArrayWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def get_writer(output_path: str, output_format: str) -> FrameWriter:
+    """
+    Open an incremental writer for an output format
+
+    Args:
+        output_path: Destination file path
+        output_format: csv, ndjson, json or parquet
+
+    Returns:
+        A FrameWriter; use it as a context manager to close the file
+    """
+    output_format = output_format.lower()
+    if output_format not in WRITERS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    return WRITERS[output_format](output_path)
+
+
+def write_frames(frames: Iterable[pd.DataFrame],
+                 output_path: str,
+                 output_format: str) -> int:
+    """
+    Write a stream of DataFrames to one file, appending each as it arrives
+
+    Args:
+        frames: Iterable of DataFrames; their columns are unioned
+        output_path: Destination file path
+        output_format: csv, ndjson, json or parquet
+
+    Returns:
+        The number of rows written
+    """
+    with get_writer(output_path, output_format) as writer:
+        for df in frames:
+            writer.write(df)
+    return writer.rows
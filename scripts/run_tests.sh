@@ -15,6 +15,15 @@ FOCUSED_TESTS=(
   test/test_others_db.py
   test/test_query_nowtime.py
   test/test_cli.py
+  test/test_download.py
+  test/test_schema.py
+  test/test_predicates.py
+  test/test_stream.py
+  test/test_writers.py
+  test/test_cache.py
+  test/test_incremental.py
+  test/test_mirror.py
+  test/test_manifest.py
 )
 
 if [[ "${1:-}" == "--all" ]]; then
@@ -65,28 +65,22 @@ def search_topics(days: int = 1, keywords: list = None, output: str = None, use_
         use_cache=use_cache,
         use_async=True
     )
-    results = gkg.query()
+    # Keywords are matched inside each download worker, so only matching
+    # articles are kept in memory
+    keyword_pattern = '|'.join(keywords)
+    filtered_news = gkg.query(
+        where=[('V2ENHANCEDTHEMES', 'icontains', keyword_pattern)]
+    )
     
-    if len(results) == 0:
-        print("No data found for the specified date range.")
+    if len(filtered_news) == 0:
+        print("No articles matching keywords found for the specified date range.")
         return None
     
-    # Filter by keywords
-    print(f"\nFiltering by keywords...")
-    keyword_pattern = '|'.join(keywords)
-    filtered_news = results[
-        results['V2ENHANCEDTHEMES'].str.contains(
-            keyword_pattern, case=False, na=False
-        )
-    ]
-    
     print(f"Found {len(filtered_news)} articles matching keywords")
     
     # Show statistics
     print(f"\nStatistics:")
-    print(f"  Total articles: {len(results)}")
     print(f"  Matching articles: {len(filtered_news)}")
-    print(f"  Percentage: {len(filtered_news)/len(results)*100:.2f}%")
     
     # Show sample results
     print(f"\nSample results (first 5):")
@@ -151,26 +145,21 @@ def view_bilateral_events(days: int = 7, country1: str = None, country2: str = N
         use_cache=use_cache,
         use_async=True
     )
-    results = events.query()
-    
-    if len(results) == 0:
-        print("No data found for the specified date range.")
+    # Bilateral events are filtered inside each download worker
+    print(f"Filtering bilateral events between {country1} and {country2}...")
+    bilateral_events = events.query(where=[
+        [('Actor1CountryCode', '==', country1), ('Actor2CountryCode', '==', country2)],
+        [('Actor1CountryCode', '==', country2), ('Actor2CountryCode', '==', country1)],
+    ])
+    
+    if len(bilateral_events) == 0:
+        print("No bilateral events found for the specified date range.")
         return None
     
-    # Filter bilateral events
-    print(f"\nFiltering bilateral events between {country1} and {country2}...")
-    bilateral_events = results[
-        (
-            ((results['Actor1CountryCode'] == country1) & (results['Actor2CountryCode'] == country2)) |
-            ((results['Actor1CountryCode'] == country2) & (results['Actor2CountryCode'] == country1))
-        )
-    ]
-    
     print(f"Found {len(bilateral_events)} bilateral events")
     
     # Show statistics
     print(f"\nStatistics:")
-    print(f"  Total events: {len(results)}")
     print(f"  Bilateral events: {len(bilateral_events)}")
     
     # Event type distribution
@@ -241,17 +230,17 @@ def view_event_mentions(event_id: str = None, days: int = 7, output: str = None,
         use_cache=use_cache,
         use_async=True
     )
-    results = mentions.query()
+    # A specific event is filtered inside each download worker
+    where = [('GLOBALEVENTID', '==', int(event_id))] if event_id else None
+    results = mentions.query(where=where)
     
     if len(results) == 0:
         print("No data found for the specified date range.")
         return None
     
-    # Filter by event ID if provided
     if event_id:
-        print(f"\nFiltering by event ID: {event_id}")
-        filtered_results = results[results['GLOBALEVENTID'] == event_id]
-        print(f"Found {len(filtered_results)} mentions for this event")
+        filtered_results = results
+        print(f"Found {len(filtered_results)} mentions for event ID: {event_id}")
     else:
         print(f"\nFinding most mentioned events...")
         # Find top mentioned events
@@ -0,0 +1,160 @@
+import gzip
+import io
+import json
+import zipfile
+
+import newsfeed.utils.async_downloader as async_downloader
+import newsfeed.utils.manifest as manifest
+
+
+def zipped_tsv(rows, name="20210101000000.export.CSV"):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, "\n".join("\t".join(map(str, row)) for row in rows) + "\n")
+    return buffer.getvalue()
+
+
+def gzip_jsonl(rows):
+    return gzip.compress("".join(json.dumps(row) + "\n" for row in rows).encode())
+
+
+def event_row(event_code, country, columns):
+    row = {column: "" for column in columns}
+    row.update({
+        "GLOBALEVENTID": 968456117,
+        "SQLDATE": 20210101,
+        "EventCode": event_code,
+        "EventRootCode": event_code[:2],
+        "Actor1CountryCode": country,
+        "GoldsteinScale": "-2.5",
+        "ActionGeo_Lat": "38.8951",
+        "DATEADDED": 20210101001500,
+        "SOURCEURL": "https://example.com/a",
+    })
+    return [row[column] for column in columns]
+
+
+def bilateral_payload(columns):
+    rows = []
+    for actor1, actor2 in [("USA", "CHN"), ("CHN", "USA"), ("USA", "RUS"), ("FRA", "CHN")]:
+        row = event_row("040", actor1, columns)
+        row[columns.index("Actor2CountryCode")] = actor2
+        rows.append(row)
+    return zipped_tsv(rows)
+
+
+class FakePool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def imap_unordered(self, func, iterable):
+        return [func(item) for item in iterable]
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+class Response:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+
+class Session:
+
+    def __init__(self, get):
+        self.get = get
+
+
+class ListResponse:
+
+    def __init__(self, lines, status_code=200, headers=None):
+        self.lines = lines
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def serve(monkeypatch, lists):
+    """
+    Serve GDELT's file lists by name, honouring byte ranges
+
+    Returns the names fetched, as (name, first byte) for ranged requests
+    """
+    fetched = []
+
+    def get(url, headers=None, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        text = "".join(line + "\n" for line in lists[name])
+        byte_range = (headers or {}).get("Range")
+        if byte_range is None:
+            fetched.append(name)
+            return ListResponse(lists[name], headers={"Content-Length": str(len(text))})
+        start = int(byte_range[len("bytes="):-1])
+        fetched.append((name, start))
+        return ListResponse(text[start:].splitlines(), status_code=206, headers={
+            "Content-Range": "bytes {}-{}/{}".format(start, len(text) - 1, len(text))})
+
+    monkeypatch.setattr(manifest, "get_session", lambda: Session(get))
+    return fetched
+
+
+class ZipResponse:
+    status = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.content = self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def read(self):
+        return self.payload
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.payload), size):
+            yield self.payload[start:start + size]
+
+
+def serve_zips(monkeypatch, payload, *retries):
+    """
+    Serve ``payload`` to the async downloader, returning the (url, proxy) requested
+
+    Later requests get the ``retries`` in turn, then the last one again
+    """
+    requested = []
+    payloads = [payload, *retries]
+
+    class ZipSession:
+        def __init__(self, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        def get(self, url, **kwargs):
+            requested.append((url, kwargs.get("proxy")))
+            return ZipResponse(payloads[min(len(requested), len(payloads)) - 1])
+
+    monkeypatch.setattr(async_downloader.aiohttp, "ClientSession", ZipSession)
+    monkeypatch.setattr(async_downloader.aiohttp, "TCPConnector", lambda **kwargs: None)
+    return requested
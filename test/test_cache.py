@@ -0,0 +1,396 @@
+import gzip
+import json
+import pickle
+import threading
+import time
+
+import joblib
+import pandas as pd
+import pytest
+
+import newsfeed.news.db.base as base
+import newsfeed.news.db.events as events
+import newsfeed.news.db.others as others
+from newsfeed.news.db.events import EventV2
+from newsfeed.news.db.others import GAL, GEG
+from newsfeed.utils.cache import CacheManager, get_cache_manager
+import newsfeed.utils.cache as cache_module
+from test.helpers import FakePool, Response, Session, bilateral_payload
+
+
+def cache_files(cache_dir):
+    return sorted(path for path in cache_dir.iterdir()
+                  if not path.name.startswith("cache_index.db") and path.name != "locks")
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "GLOBALEVENTID": pd.array([1, 2, None], dtype="Int64"),
+        "EventCode": pd.Categorical(["010", "190", "010"]),
+        "GoldsteinScale": pd.array([1.5, -10.0, 0.0], dtype="float32"),
+        "SOURCEURL": ["https://a", "https://b", None],
+    })
+
+
+@pytest.mark.parametrize("backend, suffix", [
+    ("parquet", ".parquet"), ("arrow", ".arrow"), ("pickle", ".pkl"),
+])
+def test_round_trip_keeps_dtypes(tmp_path, backend, suffix):
+    cache = CacheManager(tmp_path, backend=backend)
+    df = sample_frame()
+
+    cache.set(df, db_type="EVENT", version="V2")
+
+    assert [path.suffix for path in cache_files(tmp_path)] == [suffix]
+    pd.testing.assert_frame_equal(cache.get(db_type="EVENT", version="V2"), df)
+    assert cache.get(db_type="EVENT", version="V1") is None
+
+
+@pytest.mark.parametrize("backend", ["parquet", "arrow"])
+def test_reads_only_requested_columns(tmp_path, backend):
+    cache = CacheManager(tmp_path, backend=backend)
+    cache.set(sample_frame(), db_type="EVENT")
+
+    result = cache.get(read_columns=["SOURCEURL", "EventCode"], db_type="EVENT")
+
+    assert list(result.columns) == ["SOURCEURL", "EventCode"]
+    assert isinstance(result["EventCode"].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize("backend", ["parquet", "arrow"])
+def test_all_null_categoricals_stay_categorical(tmp_path, backend):
+    cache = CacheManager(tmp_path, backend=backend)
+    df = sample_frame().assign(ActionGeo_CountryCode=pd.Categorical([None, None, None]))
+    cache.set(df, db_type="EVENT")
+
+    for result in (cache.get(db_type="EVENT"),
+                   cache.get(read_columns=["ActionGeo_CountryCode"], db_type="EVENT")):
+        assert isinstance(result["ActionGeo_CountryCode"].dtype, pd.CategoricalDtype)
+        assert result["ActionGeo_CountryCode"].isna().all()
+
+
+def test_legacy_pickle_entries_are_still_read(tmp_path):
+    cache = CacheManager(tmp_path)
+    key = cache._generate_cache_key(db_type="EVENT")
+    joblib.dump(sample_frame(), tmp_path / f"{key}.pkl")
+
+    assert len(cache.get(db_type="EVENT")) == 3
+
+    # Rewriting the entry replaces the legacy file
+    cache.set(sample_frame().head(1), db_type="EVENT")
+    assert [path.name for path in cache_files(tmp_path)] == [f"{key}.parquet"]
+    assert cache.get_cache_size()["num_files"] == 1
+    assert cache.clear_all() == 1
+
+
+def test_frames_arrow_cannot_store_fall_back_to_pickle(tmp_path):
+    cache = CacheManager(tmp_path)
+    mixed = pd.DataFrame({"value": [1, "a", {"b": 2}]})
+
+    cache.set(mixed, db_type="GEG")
+
+    assert [path.suffix for path in cache_files(tmp_path)] == [".pkl"]
+    assert cache.get(db_type="GEG")["value"].tolist() == [1, "a", {"b": 2}]
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="feather"):
+        CacheManager(tmp_path, backend="feather")
+
+
+def test_global_manager_switches_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "_global_cache_manager", CacheManager(tmp_path))
+
+    assert get_cache_manager().backend.name == "parquet"
+    manager = get_cache_manager(backend="arrow")
+
+    assert manager.backend.name == "arrow"
+    assert manager.cache_dir == tmp_path
+    assert get_cache_manager() is manager
+
+
+def test_granules_are_keyed_by_file_name(tmp_path):
+    cache = CacheManager(tmp_path)
+    cache.set_granule(sample_frame(), "http://data.gdeltproject.org/x/20200101.geg.json.gz",
+                      "GEG", "V3")
+
+    assert cache.split_granules(["20200101.geg.json.gz", "20200102.geg.json.gz"], "GEG", "V3") == \
+        (["20200101.geg.json.gz"], ["20200102.geg.json.gz"])
+    assert not cache.has_granule("20200101.geg.json.gz", "GAL", "V3")
+    assert list(cache.get_granule("20200101.geg.json.gz", "GEG", "V3",
+                                  read_columns=["EventCode"]).columns) == ["EventCode"]
+    assert cache.get_cache_size()["num_files"] == 1
+
+
+def test_overlapping_event_queries_only_download_missing_granules(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    requested = []
+
+    def get(url, **kwargs):
+        requested.append(url.rsplit("/", 1)[-1])
+        return Response(bilateral_payload(EventV2.columns_name_events))
+
+    monkeypatch.setattr(base, "get_cache_manager", lambda: cache)
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+
+    first = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-15-00",
+                    use_cache=True)
+    monkeypatch.setattr(first, "_generate_header", lambda: {})
+    first.query(columns=["SOURCEURL"], where=[("Actor1CountryCode", "==", "USA")])
+
+    second = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-30-00",
+                     use_cache=True)
+    monkeypatch.setattr(second, "_generate_header", lambda: {})
+    result = second.query(columns=["Actor2CountryCode"], where=[("Actor1CountryCode", "==", "CHN")])
+
+    assert requested == ["20210101000000.export.CSV.zip", "20210101001500.export.CSV.zip",
+                         "20210101003000.export.CSV.zip"]
+    # Granules keep every column, so a different projection and filter are served from them
+    assert list(result.columns) == ["Actor2CountryCode"]
+    assert result["Actor2CountryCode"].tolist() == ["USA", "USA", "USA"]
+    assert second.bytes_fetched == {"20210101003000.export.CSV.zip": len(
+        bilateral_payload(EventV2.columns_name_events))}
+
+    third = EventV2(start_date="2021-01-01-00-15-00", end_date="2021-01-01-00-30-00",
+                    use_cache=True)
+    frames = list(third.iter_query(columns=["EventCode"]))
+    assert len(requested) == 3
+    assert sum(len(frame) for frame in frames) == 8
+
+
+def test_geg_granules_keep_nested_entities(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    record = {"date": "2020-01-01T00:00:00Z", "url": "https://a", "lang": "en",
+              "polarity": 0.1, "magnitude": 0.2, "score": 0.3,
+              "entities": [{"name": "Paris", "type": "LOCATION"}]}
+    payload = gzip.compress((json.dumps(record) + "\n").encode())
+    requested = []
+
+    def get(url, **kwargs):
+        requested.append(url)
+        return Response(payload)
+
+    monkeypatch.setattr(base, "get_cache_manager", lambda: cache)
+    monkeypatch.setattr(others, "get_session", lambda: Session(get))
+    monkeypatch.setattr(others.multiprocessing, "Pool", FakePool)
+    url = "http://data.gdeltproject.org/gdeltv3/geg_gcnlapi/20200101000000.geg-gcnlapi.json.gz"
+
+    results = []
+    for _ in range(2):
+        geg = GEG(start_date="2020-01-01", end_date="2020-01-02", use_cache=True)
+        monkeypatch.setattr(geg, "_query_list", lambda: [url])
+        monkeypatch.setattr(geg, "_generate_header", lambda: {})
+        results.append(geg.query())
+
+    assert requested == [url]
+    assert results[1]["entities"].tolist() == [[{"name": "Paris", "type": "LOCATION"}]]
+    pd.testing.assert_frame_equal(results[0], results[1])
+
+
+def test_gal_reads_cached_granules_in_file_order(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    cache.set_granule(pd.DataFrame([{"url": "https://a", "title": "cached"}]),
+                      "20200101000100.gal.json.gz", "GAL", "V3")
+    monkeypatch.setattr(others, "get_cache_manager", lambda: cache)
+    gal = GAL(start_date="2020-01-01-00-01-00", end_date="2020-01-01-00-02-00", use_cache=True)
+    downloaded = []
+
+    def fake_download_file(url):
+        downloaded.append(url)
+        return pd.DataFrame([{"url": "https://a", "title": "downloaded"},
+                             {"url": "https://b", "title": "downloaded"}])
+
+    monkeypatch.setattr(gal, "_download_file", fake_download_file)
+    monkeypatch.setattr(others.multiprocessing, "Pool", FakePool)
+
+    result = gal.query()
+
+    assert downloaded == ["20200101000200.gal.json.gz"]
+    assert result["title"].tolist() == ["cached", "downloaded"]
+
+
+def test_index_tracks_sizes_and_hits_without_walking_the_directory(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    cache.set(sample_frame(), db_type="EVENT")
+    cache.get(db_type="EVENT")
+    cache.get(db_type="EVENT")
+    monkeypatch.setattr(CacheManager, "_cache_files", lambda self: pytest.fail("walked the cache"))
+
+    stats = cache.get_cache_size()
+    entry = cache.get_entry_stats(db_type="EVENT")
+
+    assert stats["num_files"] == 1
+    assert stats["total_size_bytes"] == entry["size"] > 0
+    assert entry["hits"] == 2
+
+
+def test_writes_evict_least_recently_used_entries_over_budget(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    cache = CacheManager(tmp_path)
+    for day in ["a", "b", "c"]:
+        cache.set(sample_frame(), day=day)
+    entry_size = cache.get_cache_size()["total_size_bytes"] // 3
+    cache.get(day="a")
+
+    cache.max_bytes = 3 * entry_size
+    cache.set(sample_frame(), day="d")
+
+    assert cache.get(day="b") is None
+    assert all(cache.get(day=day) is not None for day in ["a", "c", "d"])
+    assert cache.get_cache_size()["total_size_bytes"] <= 3 * entry_size
+
+
+def test_lfu_eviction_keeps_frequently_read_entries(tmp_path):
+    cache = CacheManager(tmp_path, eviction="lfu")
+    for day in ["a", "b"]:
+        cache.set(sample_frame(), day=day)
+    for _ in range(3):
+        cache.get(day="a")
+    cache.get(day="b")
+
+    assert cache.evict(max_bytes=cache.get_cache_size()["total_size_bytes"] - 1) == 1
+    assert cache.get(day="a") is not None
+    assert cache.get(day="b") is None
+
+
+def test_index_is_rebuilt_for_existing_cache_files(tmp_path):
+    joblib.dump(sample_frame(), tmp_path / "0123.pkl")
+    (tmp_path / "granules" / "GAL_V3").mkdir(parents=True)
+    joblib.dump(sample_frame(), tmp_path / "granules" / "GAL_V3" / "x.gal.json.gz.pkl")
+
+    cache = CacheManager(tmp_path)
+
+    assert cache.get_cache_size()["num_files"] == 2
+    assert cache.prune_old_files(days=0) == 2
+    assert cache.get_cache_size()["num_files"] == 0
+    assert cache_files(tmp_path) == [tmp_path / "granules"]
+
+
+def test_index_keeps_one_connection_per_process(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    connections = []
+    real_connect = cache_module.sqlite3.connect
+
+    def connect(*args, **kwargs):
+        connections.append(args)
+        return real_connect(*args, **kwargs)
+
+    monkeypatch.setattr(cache_module.sqlite3, "connect", connect)
+
+    cache.set(sample_frame(), db_type="EVENT")
+    for _ in range(3):
+        cache.get(db_type="EVENT")
+    assert connections == []
+
+    worker_copy = pickle.loads(pickle.dumps(cache.index))
+
+    assert worker_copy.totals() == cache.index.totals()
+    assert len(connections) == 1
+    journal_mode = worker_copy._connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+
+
+def test_memory_tier_serves_hot_entries_without_reading_disk(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path, memory_bytes=10 * 1024 * 1024)
+    cache.set(sample_frame(), db_type="EVENT")
+    first = cache.get(db_type="EVENT")
+    monkeypatch.setattr(cache_module.ParquetBackend, "read",
+                        lambda *args, **kwargs: pytest.fail("read from disk"))
+
+    second = cache.get(db_type="EVENT")
+    second.columns = ["a", "b", "c", "d"]
+
+    pd.testing.assert_frame_equal(cache.get(db_type="EVENT"), first)
+    stats = cache.get_cache_size()["memory"]
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["total_size_bytes"] > 0
+
+
+def test_memory_tier_is_bounded_and_invalidated_on_write(tmp_path):
+    frame_bytes = int(sample_frame().memory_usage(index=True, deep=True).sum())
+    cache = CacheManager(tmp_path, memory_bytes=frame_bytes * 2)
+    for day in ["a", "b", "c"]:
+        cache.set(sample_frame(), day=day)
+        cache.get(day=day)
+
+    assert cache.memory.stats()["num_entries"] == 2
+    assert cache.memory.total_bytes <= frame_bytes * 2
+
+    cache.set(sample_frame().head(1), day="c")
+    assert len(cache.get(day="c")) == 1
+
+
+def test_memory_tier_is_not_shipped_to_pool_workers(tmp_path):
+    cache = CacheManager(tmp_path, memory_bytes=1024 * 1024)
+    cache.set(sample_frame(), db_type="EVENT")
+    cache.get(db_type="EVENT")
+
+    worker_copy = pickle.loads(pickle.dumps(cache))
+
+    assert worker_copy.memory.max_bytes == 1024 * 1024
+    assert worker_copy.memory.stats()["num_entries"] == 0
+
+
+def test_failed_write_keeps_the_previous_entry(tmp_path, monkeypatch):
+    cache = CacheManager(tmp_path)
+    cache.set(sample_frame(), db_type="EVENT")
+
+    def interrupted_write(data, path):
+        path.write_bytes(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache.backend, "write", interrupted_write)
+    monkeypatch.setattr(cache_module.PickleBackend, "write",
+                        lambda self, data, path: interrupted_write(data, path))
+    cache.set(sample_frame().head(1), db_type="EVENT")
+
+    assert [path.suffix for path in cache_files(tmp_path)] == [".parquet"]
+    pd.testing.assert_frame_equal(cache.get(db_type="EVENT"), sample_frame())
+
+
+def test_concurrent_get_or_compute_computes_once(tmp_path):
+    cache = CacheManager(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return sample_frame()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.get_or_compute_granule("20210101000000.export.CSV.zip", "EVENT", "V2",
+                                     compute, read_columns=["EventCode"])))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [list(result.columns) for result in results] == [["EventCode"]] * 4
+
+
+def test_get_or_compute_passes_errors_through_uncached(tmp_path):
+    cache = CacheManager(tmp_path)
+
+    result = cache.get_or_compute(lambda: "GDELT does not contains this url", db_type="GDG")
+
+    assert result == "GDELT does not contains this url"
+    assert cache.get(db_type="GDG") is None
+    refreshed = cache.get_or_compute(sample_frame, refresh=True, db_type="GDG")
+    pd.testing.assert_frame_equal(refreshed, sample_frame())
+
+
+def test_granules_are_matched_against_the_checksum_they_were_stored_with(tmp_path):
+    cache = CacheManager(tmp_path)
+    cache.get_or_compute_granule("20210101000000.export.CSV.zip", "EVENT", "V2",
+                                 compute=sample_frame, checksum="a" * 32)
+
+    assert cache.split_granules(["20210101000000.export.CSV.zip"], "EVENT", "V2",
+                                checksums={"20210101000000.export.CSV.zip": "a" * 32}) == \
+        (["20210101000000.export.CSV.zip"], [])
+    assert not cache.has_granule("20210101000000.export.CSV.zip", "EVENT", "V2", "b" * 32)
+    assert cache.has_granule("20210101000000.export.CSV.zip", "EVENT", "V2")
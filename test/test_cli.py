@@ -117,6 +117,62 @@ def test_database_cli_accepts_parquet_and_passes_format(tmp_path, monkeypatch):
     assert output_path.exists()
 
 
+def test_database_cli_passes_column_projection(tmp_path, monkeypatch):
+    output_path = tmp_path / "events.csv"
+    queried = {}
+
+    class FakeEventV2:
+        def __init__(self, **kwargs):
+            pass
+
+        def query(self, columns=None):
+            queried["columns"] = columns
+            return pd.DataFrame([{"GLOBALEVENTID": 1, "SOURCEURL": "https://example.com"}])
+
+    monkeypatch.setattr(cli, "EventV2", FakeEventV2)
+    run_cli(
+        monkeypatch,
+        [
+            "--db", "EVENT",
+            "--version", "V2",
+            "--start", "2021-01-01-00-00-00",
+            "--end", "2021-01-01-00-15-00",
+            "--columns", "GLOBALEVENTID, SOURCEURL",
+            "--output", str(output_path),
+        ],
+    )
+
+    assert queried["columns"] == ["GLOBALEVENTID", "SOURCEURL"]
+
+
+def test_database_cli_sets_cache_budget(tmp_path, monkeypatch):
+    budgets = []
+
+    class FakeEventV2:
+        def __init__(self, **kwargs):
+            pass
+
+        def query(self):
+            return pd.DataFrame([{"GLOBALEVENTID": 1}])
+
+    monkeypatch.setattr(cli, "EventV2", FakeEventV2)
+    monkeypatch.setattr(cli, "get_cache_manager", lambda max_bytes=None: budgets.append(max_bytes))
+    run_cli(
+        monkeypatch,
+        [
+            "--db", "EVENT",
+            "--version", "V2",
+            "--start", "2021-01-01-00-00-00",
+            "--end", "2021-01-01-00-15-00",
+            "--use-cache",
+            "--cache-max-size", "1.5",
+            "--output", str(tmp_path / "events.csv"),
+        ],
+    )
+
+    assert budgets == [int(1.5 * 1024 * 1024)]
+
+
 def test_v3_graph_cli_entry_points(tmp_path, monkeypatch):
     created = {}
 
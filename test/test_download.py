@@ -0,0 +1,111 @@
+import io
+
+import pandas as pd
+
+import newsfeed.news.db.events as events
+import newsfeed.news.db.gkg as gkg_module
+from newsfeed.news.db.events import EventV1, EventV2
+from newsfeed.news.db.gkg import GKGV2
+from newsfeed.utils import download
+from newsfeed.utils.decoders import iter_zip_tsv, read_zip_tsv
+from test.helpers import FakePool, Response, Session, zipped_tsv
+
+
+def test_event_v2_download_file_fetches_each_file_once(monkeypatch):
+    event = EventV2()
+    payload = zipped_tsv([list(range(len(event.columns_name_events)))])
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(url)
+        return Response(payload)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(fake_get))
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    result = event._download_file("20210101000000.export.CSV.zip")
+
+    assert calls == ["http://data.gdeltproject.org/gdeltv2/20210101000000.export.CSV.zip"]
+    assert isinstance(result, pd.DataFrame)
+    assert result.shape == (1, len(event.columns_name_events))
+    assert result.attrs["bytes_fetched"] == len(payload)
+    assert result.attrs["source_file"] == "20210101000000.export.CSV.zip"
+
+
+def test_event_v1_query_reports_bytes_fetched_per_file(monkeypatch):
+    event = EventV1(start_date="2021-01-01", end_date="2021-01-02")
+    payload = zipped_tsv([list(range(len(event.columns_name)))], name="20210101.export.CSV")
+    monkeypatch.setattr(events, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+
+    result = event.query()
+
+    assert len(result) == 2
+    assert event.bytes_fetched == {
+        "20210101.export.CSV.zip": len(payload),
+        "20210102.export.CSV.zip": len(payload),
+    }
+
+
+def test_read_zip_tsv_chunked_matches_single_pass():
+    rows = [[i, "actor{}".format(i), i * 0.5] for i in range(25)]
+    payload = zipped_tsv(rows)
+
+    whole = read_zip_tsv(io.BytesIO(payload))
+    chunks = list(iter_zip_tsv(io.BytesIO(payload), chunk_size=10))
+    chunked = read_zip_tsv(io.BytesIO(payload), chunk_size=10)
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    pd.testing.assert_frame_equal(whole, chunked)
+
+
+def test_gkg_v2_streaming_download_spools_body(monkeypatch):
+    gkg = GKGV2(chunk_size=1)
+    payload = zipped_tsv([list(range(len(gkg.columns_name)))] * 3, name="x.gkg.csv")
+    requested = {}
+
+    class StreamingResponse(Response):
+        def iter_content(self, chunk_size=1):
+            for start in range(0, len(self.content), 7):
+                yield self.content[start:start + 7]
+
+    def fake_get(url, **kwargs):
+        requested.update(kwargs)
+        return StreamingResponse(payload)
+
+    monkeypatch.setattr(gkg_module, "get_session", lambda: Session(fake_get))
+    monkeypatch.setattr(gkg, "_generate_header", lambda: {})
+
+    result = gkg._download_file("20210101000000.gkg.csv.zip")
+
+    assert requested["stream"] is True
+    assert result.shape == (3, len(gkg.columns_name))
+    assert result.attrs["bytes_fetched"] == len(payload)
+
+
+def test_worker_session_and_user_agent_are_reused(monkeypatch):
+    created = []
+
+    class FakeUserAgent:
+        def __init__(self):
+            created.append(self)
+
+        @property
+        def random(self):
+            return "agent-{}".format(len(created))
+
+    monkeypatch.setattr(download, "UserAgent", FakeUserAgent)
+    monkeypatch.setattr(download, "_worker_pid", None)
+    monkeypatch.setattr(download, "_worker_session", None)
+    monkeypatch.setattr(download, "_worker_user_agent", None)
+
+    session = download.get_session()
+
+    assert download.get_session() is session
+    assert download.worker_user_agent() == "agent-1"
+    assert session.headers["User-Agent"] == "agent-1"
+    assert len(created) == 1
+    assert session.get_adapter("http://data.gdeltproject.org/") is \
+        session.get_adapter("https://data.gdeltproject.org/")
@@ -2,6 +2,7 @@ import pandas as pd
 
 import newsfeed.news.db.others as others
 from newsfeed.news.db.others import GAL
+from test.helpers import FakePool, Session, gzip_jsonl, serve_zips
 
 
 def test_gal_query_reads_json_lines_and_deduplicates(monkeypatch):
@@ -16,6 +17,7 @@ def test_gal_query_reads_json_lines_and_deduplicates(monkeypatch):
         ])
 
     monkeypatch.setattr(gal, "_download_file", fake_download)
+    monkeypatch.setattr(others.multiprocessing, "Pool", FakePool)
 
     result = gal.query()
 
@@ -45,7 +47,7 @@ def test_gal_query_rss_feed_parses_items(monkeypatch):
         content = rss
         status_code = 200
 
-    monkeypatch.setattr(others.requests, "get", lambda *args, **kwargs: Response())
+    monkeypatch.setattr(others, "get_session", lambda: Session(lambda *args, **kwargs: Response()))
 
     result = gal.query_rss_feed()
 
@@ -66,9 +68,39 @@ def test_gal_query_rss_feed_returns_value_error_for_http_error(monkeypatch):
         content = b""
         status_code = 500
 
-    monkeypatch.setattr(others.requests, "get", lambda *args, **kwargs: Response())
+    monkeypatch.setattr(others, "get_session", lambda: Session(lambda *args, **kwargs: Response()))
 
     result = gal.query_rss_feed()
 
     assert isinstance(result, ValueError)
     assert "status 500" in str(result)
+
+
+def test_gal_async_query_downloads_every_minute_and_deduplicates(monkeypatch):
+    requested = serve_zips(monkeypatch, gzip_jsonl([{"date": "20200101000100", "url": "https://example.com/a"}]))
+    gal = GAL(start_date="2020-01-01-00-01-00", end_date="2020-01-01-00-03-00", use_async=True)
+
+    result = gal.query()
+
+    assert list(result.columns) == gal.columns_name
+    assert len(requested) == 3
+    assert result["url"].tolist() == ["https://example.com/a"]
+
+
+def test_gal_query_downloads_on_the_pool_and_keeps_minute_order(monkeypatch):
+    gal = GAL(start_date="2020-01-01-00-01-00", end_date="2020-01-01-00-03-00")
+
+    class ReversedPool(FakePool):
+        # Completes the last file first
+        def imap_unordered(self, func, iterable):
+            return [func(item) for item in reversed(list(iterable))]
+
+    def fake_download(url):
+        return others.tag_download(pd.DataFrame([{"url": "https://example.com/a", "title": url}]), url, 10)
+
+    monkeypatch.setattr(gal, "_download_file", fake_download)
+    monkeypatch.setattr(others.multiprocessing, "Pool", ReversedPool)
+
+    result = gal.query()
+
+    assert result["title"].tolist() == ["20200101000100.gal.json.gz"]
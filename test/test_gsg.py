@@ -72,3 +72,19 @@ def test_gsg_rejects_unknown_dataset():
         assert "dataset must" in str(exc)
     else:
         raise AssertionError("GSG accepted an unknown dataset")
+
+
+def test_gsg_async_query_resolves_docembed_file_names(monkeypatch):
+    gsg = GSG(start_date="2020-01-01-00-00-00", dataset="docembed", use_async=True)
+    monkeypatch.setattr(gsg, "_query_list", lambda: ["20200101000000.gsg.docembed.json.gz"])
+
+    def fake_iter_async_download(base_url, file_names, is_full_url=False, payload="zip_tsv", **kwargs):
+        assert base_url == GSG.docembed_base_url
+        assert file_names == ["20200101000000.gsg.docembed.json.gz"]
+        assert is_full_url is False
+        assert payload == "gzip_jsonl"
+        yield pd.DataFrame([{"url": "https://example.com"}])
+
+    monkeypatch.setattr(others, "iter_async_download", fake_iter_async_download)
+
+    assert gsg.query().to_dict("records") == [{"url": "https://example.com"}]
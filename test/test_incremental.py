@@ -0,0 +1,252 @@
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+import newsfeed.news.db.events as events
+import newsfeed.news.db.gkg as gkg
+from newsfeed.news.db.events import EventV2
+from newsfeed.news.db.gkg import GKGV1, GKGV2
+from newsfeed.utils.cache import CacheManager
+from newsfeed.utils.incremental import IncrementalManager, checkpoint_downloads, split_downloads
+from test.helpers import FakePool, Response, Session, bilateral_payload, zipped_tsv
+
+
+def test_overlapping_date_ranges_share_file_history(tmp_path):
+    mgr = IncrementalManager(tmp_path / "history.db")
+    mgr.save_query_history(["a.zip", "b.zip"], db_type="EVENT", version="V2",
+                           start_date="20210101000000", end_date="20210101003000")
+
+    new_files = mgr.get_new_files(["c.zip", "b.zip", "d.zip", "a.zip"],
+                                  db_type="EVENT", version="V2",
+                                  start_date="20210101001500", end_date="20210101010000")
+
+    assert new_files == ["c.zip", "d.zip"]
+    assert mgr.get_new_files(["a.zip"], db_type="GKG", version="V2") == ["a.zip"]
+
+
+def test_saved_files_accumulate_across_queries(tmp_path):
+    mgr = IncrementalManager(tmp_path / "history.db")
+    mgr.save_query_history(["a.zip"], db_type="EVENT", version="V2", start_date="1", end_date="2")
+    mgr.save_query_history(["b.zip"], db_type="EVENT", version="V2", start_date="1", end_date="2")
+
+    assert mgr.get_downloaded_files(db_type="EVENT", version="V2") == {"a.zip", "b.zip"}
+    stats = mgr.get_history_stats()
+    assert stats["total_queries"] == 1
+    assert stats["files_by_db_type"] == {"EVENT": 2}
+
+    assert mgr.clear_history(db_type="EVENT", version="V2") == 2
+    assert mgr.get_new_files(["a.zip"], db_type="EVENT", version="V2") == ["a.zip"]
+
+
+def test_json_file_lists_are_migrated(tmp_path):
+    db_path = tmp_path / "history.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE query_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            query_key TEXT UNIQUE NOT NULL,
+            db_type TEXT NOT NULL,
+            version TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            downloaded_files TEXT NOT NULL,
+            query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            table_type TEXT,
+            translation INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO query_history (query_key, db_type, version, start_date, end_date, downloaded_files)
+        VALUES ('k', 'GKG', 'V2', '20210101', '20210102', ?)
+    ''', (json.dumps(["a.gkg.csv.zip", "b.gkg.csv.zip"]),))
+    conn.commit()
+    conn.close()
+
+    mgr = IncrementalManager(db_path)
+
+    assert mgr.get_new_files(["a.gkg.csv.zip", "c.gkg.csv.zip"],
+                             db_type="GKG", version="V2") == ["c.gkg.csv.zip"]
+    assert mgr.get_history_stats()["total_queries"] == 1
+
+
+def test_manager_reconnects_after_pickling(tmp_path):
+    mgr = IncrementalManager(tmp_path / "history.db")
+    mgr.save_query_history(["a.zip"], db_type="EVENT", version="V1", start_date="1", end_date="2")
+
+    worker_copy = pickle.loads(pickle.dumps(mgr))
+
+    assert worker_copy.get_new_files(["a.zip", "b.zip"], db_type="EVENT", version="V1") == ["b.zip"]
+    journal_mode = worker_copy._connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+
+
+def test_failed_files_are_retried_until_they_succeed(tmp_path):
+    mgr = IncrementalManager(tmp_path / "history.db")
+    mgr.save_query_history(["a.zip"], failed_files=["b.zip"], db_type="EVENT", version="V2",
+                           start_date="1", end_date="2")
+
+    assert mgr.get_new_files(["a.zip", "b.zip"], db_type="EVENT", version="V2") == ["b.zip"]
+    assert mgr.get_failed_files(db_type="EVENT", version="V2") == {"b.zip"}
+
+    mgr.save_query_history(["b.zip"], failed_files=["a.zip"], db_type="EVENT", version="V2",
+                           start_date="1", end_date="2")
+
+    assert mgr.get_new_files(["a.zip", "b.zip"], db_type="EVENT", version="V2") == []
+    assert mgr.get_history_stats()["failed_files"] == 0
+
+
+def test_split_downloads_keeps_query_order():
+    assert split_downloads(["a", "b", "c"], {"c": 10, "a": 5}) == (["a", "c"], ["b"])
+
+
+def test_event_v2_query_records_only_successful_files(tmp_path, monkeypatch):
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-30-00",
+                    use_incremental=True)
+    event.incremental_manager = IncrementalManager(tmp_path / "history.db")
+    event.cache_manager = CacheManager(tmp_path / "cache")
+    payload = bilateral_payload(event.columns_name_events)
+
+    def get(url, **kwargs):
+        response = Response(payload)
+        if "20210101001500" in url:
+            response.status_code = 404
+        return response
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    event.query(columns=["Actor1CountryCode"])
+
+    history = dict(db_type="EVENT", version="V2")
+    assert event.incremental_manager.get_downloaded_files(**history) == {
+        "20210101000000.export.CSV.zip", "20210101003000.export.CSV.zip"}
+    assert event.incremental_manager.get_failed_files(**history) == {
+        "20210101001500.export.CSV.zip"}
+
+
+def test_gkg_v1_queries_save_incremental_history(tmp_path, monkeypatch):
+    gkg_v1 = GKGV1(start_date="2021-01-01", end_date="2021-01-03", use_incremental=True)
+    gkg_v1.incremental_manager = IncrementalManager(tmp_path / "history.db")
+    gkg_v1.cache_manager = CacheManager(tmp_path / "cache")
+    payload = zipped_tsv([["20210101", "1"] + [""] * 9])
+
+    def get(url, **kwargs):
+        response = Response(payload)
+        if "20210102" in url:
+            response.status_code = 404
+        return response
+
+    monkeypatch.setattr(gkg, "get_session", lambda: Session(get))
+    monkeypatch.setattr(gkg.multiprocessing, "Pool", FakePool)
+    monkeypatch.setattr(gkg_v1, "_generate_header", lambda: {})
+    monkeypatch.setattr(gkg_v1, "_query_list", lambda: [
+        "20210101.gkg.csv.zip", "20210102.gkg.csv.zip"])
+
+    assert len(gkg_v1.query(columns=["DATE"])) == 1
+
+    history = dict(db_type="GKG", version="V1")
+    assert gkg_v1.incremental_manager.get_downloaded_files(**history) == {"20210101.gkg.csv.zip"}
+    assert gkg_v1.incremental_manager.get_failed_files(**history) == {"20210102.gkg.csv.zip"}
+
+    monkeypatch.setattr(gkg_v1, "_query_list", lambda: [
+        "20210101.gkg.csv.zip", "20210103.gkg.csv.zip"])
+
+    assert sum(len(df) for df in gkg_v1.iter_query(columns=["DATE"])) == 2
+    assert gkg_v1.bytes_fetched == {"20210103.gkg.csv.zip": len(payload)}
+    assert gkg_v1.incremental_manager.get_downloaded_files(**history) == {
+        "20210101.gkg.csv.zip", "20210103.gkg.csv.zip"}
+
+
+def test_incremental_query_returns_the_whole_window(tmp_path, monkeypatch):
+    history = IncrementalManager(tmp_path / "history.db")
+    cache = CacheManager(tmp_path / "cache")
+    payload = bilateral_payload(EventV2.columns_name_events)
+    fetched = []
+
+    def get(url, **kwargs):
+        fetched.append(url.rsplit("/", 1)[-1])
+        return Response(payload)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+
+    def run(end_date):
+        event = EventV2(start_date="2021-01-01-00-00-00", end_date=end_date,
+                        use_incremental=True)
+        event.incremental_manager = history
+        event.cache_manager = cache
+        monkeypatch.setattr(event, "_generate_header", lambda: {})
+        return event.query(columns=["Actor2CountryCode"],
+                           where=[("Actor1CountryCode", "==", "USA")])
+
+    first = run("2021-01-01-00-15-00")
+    second = run("2021-01-01-00-30-00")
+
+    assert len(first) == 4
+    assert len(second) == 6
+    assert fetched == ["20210101000000.export.CSV.zip",
+                       "20210101001500.export.CSV.zip",
+                       "20210101003000.export.CSV.zip"]
+
+
+class TaggedFrame:
+    def __init__(self, name):
+        self.attrs = {"source_file": name}
+
+
+def test_checkpoints_record_consumed_files_when_interrupted(tmp_path):
+    mgr = IncrementalManager(tmp_path / "history.db")
+    results = [TaggedFrame("a.zip"), "404 b.zip", TaggedFrame("c.zip"), TaggedFrame("d.zip")]
+    stream = checkpoint_downloads(results, mgr, every=3, db_type="GKG", version="V2")
+
+    for _ in range(4):
+        next(stream)
+    assert mgr.get_downloaded_files(db_type="GKG", version="V2") == set()
+    # Interrupted while d.zip was being processed
+    stream.close()
+
+    assert mgr.get_downloaded_files(db_type="GKG", version="V2") == {"a.zip", "c.zip"}
+
+
+class LazyPool(FakePool):
+    def imap_unordered(self, func, iterable):
+        return (func(item) for item in iterable)
+
+
+def test_interrupted_gkg_v2_query_resumes_where_it_stopped(tmp_path, monkeypatch):
+    history = IncrementalManager(tmp_path / "history.db")
+    cache = CacheManager(tmp_path / "cache")
+    payload = zipped_tsv([list(range(len(GKGV2.columns_name)))], name="x.gkg.csv")
+    fetched = []
+    interrupt_at = [2]
+
+    def get(url, **kwargs):
+        if len(fetched) == interrupt_at[0]:
+            raise KeyboardInterrupt
+        fetched.append(url.rsplit("/", 1)[-1])
+        return Response(payload)
+
+    monkeypatch.setattr(gkg, "get_session", lambda: Session(get))
+    monkeypatch.setattr(gkg.multiprocessing, "Pool", LazyPool)
+
+    def run():
+        gkg_v2 = GKGV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-45-00",
+                       use_incremental=True)
+        gkg_v2.incremental_manager = history
+        gkg_v2.cache_manager = cache
+        monkeypatch.setattr(gkg_v2, "_generate_header", lambda: {})
+        return gkg_v2.query()
+
+    with pytest.raises(KeyboardInterrupt):
+        run()
+    assert len(history.get_downloaded_files(db_type="GKG", version="V2")) == 2
+
+    interrupt_at[0] = None
+    result = run()
+
+    assert len(result) == 4
+    assert len(fetched) == 4 and len(set(fetched)) == 4
+    assert len(history.get_downloaded_files(db_type="GKG", version="V2")) == 4
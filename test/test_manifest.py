@@ -0,0 +1,202 @@
+import hashlib
+import io
+
+import pandas as pd
+import pytest
+
+import newsfeed.news.db.events as events
+import newsfeed.utils.manifest as manifest
+from newsfeed.news.db.events import EventV2
+from newsfeed.utils.cache import CacheManager
+from newsfeed.utils.download import ChecksumMismatch, verify_body
+from newsfeed.utils.manifest import ManifestIndex, parse_manifest_line
+from test.helpers import FakePool, Response, Session, bilateral_payload, serve, serve_zips
+
+
+def entry(slice_time, kind="export.CSV.zip", size=100):
+    return "{} {} http://data.gdeltproject.org/gdeltv2/{}.{}".format(
+        size, "0" * 31 + slice_time[-1], slice_time, kind)
+
+
+def test_parse_manifest_line_skips_malformed_lines():
+    assert parse_manifest_line(entry("20210101001500")) == (
+        "20210101001500.export.CSV.zip", "20210101001500", "export.CSV.zip", 100,
+        "0" * 31 + "0")
+    assert parse_manifest_line("") is None
+    assert parse_manifest_line("- - http://data.gdeltproject.org/gdeltv2/20210101001500.export.CSV.zip") is None
+    assert parse_manifest_line("100 abc http://data.gdeltproject.org/gdeltv2/md5sums") is None
+
+
+def test_manifest_lists_only_published_files(tmp_path, monkeypatch):
+    # 00:15 is missing from GDELT
+    fetched = serve(monkeypatch, {"masterfilelist.txt": [
+        entry("20210101000000"), entry("20210101000000", "mentions.CSV.zip"),
+        entry("20210101003000", size=300), "broken line",
+    ]})
+    index = ManifestIndex(tmp_path / "manifest.db")
+
+    assert index.refresh() == "20210101003000"
+    assert index.files("export.CSV.zip", "20210101000000", "20210101003000") == [
+        ("20210101000000.export.CSV.zip", 100, "0" * 32),
+        ("20210101003000.export.CSV.zip", 300, "0" * 32),
+    ]
+    assert index.refresh() == "20210101003000"
+    assert fetched == ["masterfilelist.txt"]
+
+
+def test_manifest_files_accept_short_dates(tmp_path, monkeypatch):
+    serve(monkeypatch, {"masterfilelist.txt": [
+        entry("20210101000000"), entry("20210101234500"), entry("20210102000000"),
+        entry("20210102001500"),
+    ]})
+    index = ManifestIndex(tmp_path / "manifest.db")
+    index.refresh()
+
+    assert [row[0][:14] for row in index.files("export.CSV.zip", "20210101", "20210102")] == [
+        "20210101000000", "20210101234500", "20210102000000"]
+    assert index.refresh(until="20210102") == "20210102001500"
+
+
+def test_refresh_follows_lastupdate_and_reads_only_the_appended_master_list(tmp_path, monkeypatch):
+    lists = {
+        "masterfilelist.txt": [entry("20210101000000")],
+        "lastupdate.txt": [entry("20210101001500")],
+    }
+    fetched = serve(monkeypatch, lists)
+    index = ManifestIndex(tmp_path / "manifest.db", max_age=0)
+
+    index.refresh()
+    indexed_bytes = len(entry("20210101000000")) + 1
+    assert index.refresh() == "20210101001500"
+
+    lists["masterfilelist.txt"] += [entry("20210101001500"), entry("20210101003000")]
+    lists["lastupdate.txt"] = [entry("20210101004500")]
+    lists["masterfilelist.txt"].append(entry("20210101004500"))
+    assert index.refresh() == "20210101004500"
+
+    assert fetched == ["masterfilelist.txt", "lastupdate.txt",
+                       "lastupdate.txt", ("masterfilelist.txt", indexed_bytes - 1)]
+    assert len(index.files("export.CSV.zip", "20210101000000", "20210101010000")) == 4
+
+    # A rewritten master list is read again from the start
+    lists["masterfilelist.txt"] = [entry("20210101000000", size=7)] + lists["masterfilelist.txt"][1:]
+    lists["lastupdate.txt"] = [entry("20210101011500")]
+    lists["masterfilelist.txt"] += [entry("20210101010000"), entry("20210101011500")]
+    assert index.refresh() == "20210101011500"
+    assert fetched[-2:] == [("masterfilelist.txt", 4 * indexed_bytes - 1), "masterfilelist.txt"]
+    assert index.entry("20210101000000.export.CSV.zip") == (7, "0" * 32)
+
+
+def test_refresh_is_skipped_when_the_index_covers_the_range(tmp_path, monkeypatch):
+    fetched = serve(monkeypatch, {"masterfilelist.txt": [entry("20210101003000")]})
+    index = ManifestIndex(tmp_path / "manifest.db", max_age=0)
+    index.refresh()
+
+    assert index.refresh(until="20210101003000") == "20210101003000"
+    assert fetched == ["masterfilelist.txt"]
+
+
+def test_event_v2_query_skips_slices_missing_from_the_manifest(tmp_path, monkeypatch):
+    serve(monkeypatch, {"masterfilelist.txt": [
+        entry("20210101000000"), entry("20210101003000"),
+    ]})
+    monkeypatch.setattr(manifest, "_global_manifest_index", ManifestIndex(tmp_path / "manifest.db"))
+    payload = bilateral_payload(EventV2.columns_name_events)
+    downloaded = []
+
+    def get(url, **kwargs):
+        downloaded.append(url.rsplit("/", 1)[-1])
+        return Response(payload)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-30-00",
+                    use_manifest=True)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    result = event.query(columns=["Actor1CountryCode"])
+
+    assert downloaded == ["20210101000000.export.CSV.zip", "20210101003000.export.CSV.zip"]
+    assert len(result) == 8
+    assert event.file_info["20210101003000.export.CSV.zip"] == (100, "0" * 32)
+
+
+def verified_event(tmp_path, monkeypatch, payload, get):
+    serve(monkeypatch, {"masterfilelist.txt": [
+        "{} {} http://data.gdeltproject.org/gdeltv2/20210101000000.export.CSV.zip".format(
+            len(payload), hashlib.md5(payload).hexdigest()),
+    ]})
+    monkeypatch.setattr(manifest, "_global_manifest_index", ManifestIndex(tmp_path / "manifest.db"))
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-00-00",
+                    use_cache=True, verify_checksums=True)
+    event.cache_manager = CacheManager(tmp_path / "cache")
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+    return event
+
+
+def test_verify_body_checks_size_and_md5():
+    body = io.BytesIO(b"zip bytes")
+    verify_body(body, "a.zip", (9, hashlib.md5(b"zip bytes").hexdigest()))
+    assert body.tell() == 0
+
+    with pytest.raises(ChecksumMismatch, match="received 9 bytes"):
+        verify_body(body, "a.zip", (10, hashlib.md5(b"zip bytes").hexdigest()))
+    with pytest.raises(ChecksumMismatch, match="MD5"):
+        verify_body(body, "a.zip", (9, "0" * 32))
+
+
+def test_truncated_download_is_fetched_again(tmp_path, monkeypatch):
+    payload = bilateral_payload(EventV2.columns_name_events)
+    responses = [Response(payload[:-10]), Response(payload)]
+    event = verified_event(tmp_path, monkeypatch, payload, lambda url, **kwargs: responses.pop(0))
+
+    assert len(event.query()) == 4
+    assert responses == []
+
+
+def test_unverified_granules_are_fetched_again(tmp_path, monkeypatch):
+    payload = bilateral_payload(EventV2.columns_name_events)
+    fetched = []
+
+    def get(url, **kwargs):
+        fetched.append(url)
+        return Response(payload)
+
+    event = verified_event(tmp_path, monkeypatch, payload, get)
+    # Cached by an earlier query that did not verify its download
+    event.cache_manager.set_granule(pd.DataFrame({"GLOBALEVENTID": [1]}),
+                                    "20210101000000.export.CSV.zip", "EVENT", "V2")
+
+    assert len(event.query()) == 4
+    assert len(event.query()) == 4
+    assert len(fetched) == 1
+
+
+def test_async_downloads_are_verified_and_their_granules_reused(tmp_path, monkeypatch):
+    payload = bilateral_payload(EventV2.columns_name_events)
+    event = verified_event(tmp_path, monkeypatch, payload, lambda url, **kwargs: pytest.fail(url))
+    event.use_async = True
+    requested = serve_zips(monkeypatch, payload)
+
+    assert len(event.query()) == 4
+    assert len(event.query()) == 4
+    assert len(requested) == 1
+
+    event.force_redownload = True
+    serve_zips(monkeypatch, payload[:-10])
+
+    assert len(event.query()) == 0
+
+
+@pytest.mark.parametrize("chunk_size", [None, 2])
+def test_truncated_async_download_is_fetched_again(tmp_path, monkeypatch, chunk_size):
+    payload = bilateral_payload(EventV2.columns_name_events)
+    event = verified_event(tmp_path, monkeypatch, payload, lambda url, **kwargs: pytest.fail(url))
+    event.use_async = True
+    event.chunk_size = chunk_size
+    requested = serve_zips(monkeypatch, payload[:-10], payload)
+
+    assert len(event.query()) == 4
+    assert len(requested) == 2
@@ -0,0 +1,98 @@
+import sys
+
+import pandas as pd
+
+import newsfeed.__main__ as cli
+import newsfeed.news.db.events as events
+from newsfeed.news.db.events import EventV2
+from newsfeed.utils.mirror import Mirror
+from test.helpers import FakePool, Response, Session, bilateral_payload
+
+
+def offline(url, **kwargs):
+    raise AssertionError("unexpected download of {}".format(url))
+
+
+def synced_event(tmp_path, monkeypatch, start, end):
+    mirror = Mirror(tmp_path / "mirror")
+    payload = bilateral_payload(EventV2.columns_name_events)
+    monkeypatch.setattr(events, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    event = EventV2(start_date=start, end_date=end)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+    stats = event.sync(mirror)
+    return mirror, stats
+
+
+def test_sync_writes_date_partitions_and_skips_mirrored_files(tmp_path, monkeypatch):
+    mirror, stats = synced_event(tmp_path, monkeypatch, "2021-01-01-23-45-00", "2021-01-02-00-00-00")
+
+    assert stats == {"mirrored": 0, "downloaded": 2, "failed": 0}
+    partitions = sorted(path.relative_to(mirror.root).as_posix()
+                        for path in mirror.root.rglob("*.parquet"))
+    assert partitions == [
+        "EVENT_V2/events/date=2021-01-01/20210101234500.export.CSV.parquet",
+        "EVENT_V2/events/date=2021-01-02/20210102000000.export.CSV.parquet",
+    ]
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(offline))
+    event = EventV2(start_date="2021-01-01-23-45-00", end_date="2021-01-02-00-00-00")
+    assert event.sync(mirror) == {"mirrored": 2, "downloaded": 0, "failed": 0}
+
+
+def test_query_reads_a_fully_mirrored_range_offline(tmp_path, monkeypatch):
+    mirror, _ = synced_event(tmp_path, monkeypatch, "2021-01-01-00-00-00", "2021-01-01-00-30-00")
+    monkeypatch.setattr(events, "get_session", lambda: Session(offline))
+
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-15-00")
+    event.mirror = mirror
+    result = event.query(columns=["Actor2CountryCode"],
+                         where=[("Actor1CountryCode", "==", "USA")])
+
+    assert list(result.columns) == ["Actor2CountryCode"]
+    assert result["Actor2CountryCode"].tolist() == ["CHN", "RUS"] * 2
+    assert isinstance(result["Actor2CountryCode"].dtype, pd.CategoricalDtype)
+    frames = list(event.iter_query(columns=["Actor2CountryCode"], batch_rows=3))
+    assert [len(frame) for frame in frames] == [3, 3, 2]
+
+
+def test_query_downloads_when_the_mirror_misses_files(tmp_path, monkeypatch):
+    mirror, _ = synced_event(tmp_path, monkeypatch, "2021-01-01-00-00-00", "2021-01-01-00-15-00")
+    fetched = []
+    payload = bilateral_payload(EventV2.columns_name_events)
+
+    def get(url, **kwargs):
+        fetched.append(url)
+        return Response(payload)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(get))
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-30-00")
+    event.mirror = mirror
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    assert len(event.query()) == 12
+    assert len(fetched) == 3
+
+
+def test_sync_cli_fills_the_requested_mirror(tmp_path, monkeypatch):
+    synced = {}
+
+    class FakeEventV2:
+        def __init__(self, **kwargs):
+            synced.update(kwargs)
+
+        def sync(self, mirror):
+            synced["root"] = mirror.root
+            return {"mirrored": 1, "downloaded": 2, "failed": 0}
+
+    monkeypatch.setattr(cli, "EventV2", FakeEventV2)
+    monkeypatch.setattr(sys, "argv", [
+        "newsfeed", "sync", "--db", "MENTIONS",
+        "--since", "2021-01-01-00-00-00", "--until", "2021-01-01-01-00-00",
+        "--mirror-dir", str(tmp_path),
+    ])
+    cli.main()
+
+    assert synced["table"] == "mentions"
+    assert synced["start_date"] == "2021-01-01-00-00-00"
+    assert synced["root"] == tmp_path
@@ -1,7 +1,12 @@
+import gzip
+
 import pandas as pd
 
 import newsfeed.news.db.others as others
 from newsfeed.news.db.others import GEG, VGEG, GDG, GFG
+from newsfeed.utils.cache import CacheManager
+from newsfeed.utils.incremental import IncrementalManager
+from test.helpers import Session, gzip_jsonl, serve_zips
 
 
 def frame_for(columns):
@@ -12,34 +17,54 @@ def test_geg_query_uses_async_downloader(monkeypatch):
     geg = GEG(start_date="2020-01-01", end_date="2020-01-02", use_async=True)
     monkeypatch.setattr(geg, "_query_list", lambda: ["https://example.com/geg.json.gz"])
 
-    def fake_run_async_download(base_url, download_url_list, max_concurrent=10, proxy=None, is_full_url=False):
+    def fake_iter_async_download(base_url, download_url_list, max_concurrent=10, proxy=None, is_full_url=False,
+                                 payload="zip_tsv"):
         assert base_url == ""
         assert download_url_list == ["https://example.com/geg.json.gz"]
         assert is_full_url is True
-        return [frame_for(geg.columns_name)], []
+        assert payload == "gzip_jsonl"
+        yield frame_for(geg.columns_name)
 
-    monkeypatch.setattr(others, "run_async_download", fake_run_async_download)
+    monkeypatch.setattr(others, "iter_async_download", fake_iter_async_download)
 
     result = geg.query()
 
     assert list(result.columns) == geg.columns_name
+    assert len(result) == 1
 
 
 def test_vgeg_query_uses_async_downloader(monkeypatch):
     vgeg = VGEG(query_date="2020-01-01", domain="CNN", use_async=True)
     monkeypatch.setattr(vgeg, "_query_list", lambda: ["https://example.com/vgeg.json.gz"])
 
-    def fake_run_async_download(base_url, download_url_list, max_concurrent=10, proxy=None, is_full_url=False):
+    def fake_iter_async_download(base_url, download_url_list, max_concurrent=10, proxy=None, is_full_url=False,
+                                 payload="zip_tsv"):
         assert base_url == ""
         assert download_url_list == ["https://example.com/vgeg.json.gz"]
         assert is_full_url is True
-        return [frame_for(vgeg.columns_name_vgeg)], []
+        assert payload == "gzip_jsonl"
+        yield frame_for(vgeg.columns_name_vgeg)
 
-    monkeypatch.setattr(others, "run_async_download", fake_run_async_download)
+    monkeypatch.setattr(others, "iter_async_download", fake_iter_async_download)
 
     result = vgeg.query()
 
     assert list(result.columns) == vgeg.columns_name_vgeg
+    assert len(result) == 1
+
+
+def test_geg_async_query_checkpoints_and_caches_each_file(tmp_path, monkeypatch):
+    url = "http://data.gdeltproject.org/gdeltv3/geg_gcnlapi/20200101000000.geg-gcnlapi.json.gz"
+    geg = GEG(start_date="2020-01-01", end_date="2020-01-02", use_async=True, use_incremental=True)
+    geg.incremental_manager = IncrementalManager(tmp_path / "history.db")
+    geg.cache_manager = CacheManager(tmp_path / "cache")
+    monkeypatch.setattr(geg, "_query_list", lambda: [url])
+    serve_zips(monkeypatch, gzip_jsonl([{column: "" for column in geg.columns_name}]))
+
+    assert len(geg.query()) == 1
+
+    assert geg.incremental_manager.get_downloaded_files(db_type="GEG", version="V3") == {url}
+    assert geg.cache_manager.get_granule(url, *geg.granule_key) is not None
 
 
 def test_vgeg_query_list_allows_missing_domain(monkeypatch):
@@ -60,7 +85,7 @@ def test_gdg_query_reads_json_response(monkeypatch):
         ok = True
         content = b"{}"
 
-    monkeypatch.setattr(others.requests, "get", lambda *args, **kwargs: Response())
+    monkeypatch.setattr(others, "get_session", lambda: Session(lambda *args, **kwargs: Response()))
     monkeypatch.setattr(others.pd, "read_json", lambda *args, **kwargs: pd.DataFrame([{"score": 1}]))
 
     result = gdg.query()
@@ -74,10 +99,29 @@ def test_gfg_query_reads_frontpage_links(monkeypatch):
 
     class Response:
         ok = True
+        content = b""
 
-    monkeypatch.setattr(others.requests, "get", lambda *args, **kwargs: Response())
+    monkeypatch.setattr(others, "get_session", lambda: Session(lambda *args, **kwargs: Response()))
     monkeypatch.setattr(others.pd, "read_csv", lambda *args, **kwargs: frame_for(gfg.columns_name))
 
     result = gfg.query()
 
     assert list(result.columns) == gfg.columns_name
+
+
+def test_gdg_and_gfg_snapshots_download_through_the_async_engine(monkeypatch):
+    requested = serve_zips(monkeypatch, gzip_jsonl([{"score": 1}]))
+    gdg = GDG(query_date="2018-08-27-14-00-00", use_async=True)
+
+    assert gdg.query().to_dict("records") == [{"score": 1}]
+    assert requested[0][0] == GDG.base_url + "20180827140100.gdg.v3.json.gz"
+
+    monkeypatch.setattr(GFG, "latest_date", lambda self: None)
+    links = "\n".join("\t".join([str(row)] * 6) for row in range(3)) + "\n"
+    serve_zips(monkeypatch, gzip.compress(links.encode()))
+    gfg = GFG(query_date="2018-03-02-02-00-00", use_async=True)
+
+    result = gfg.query()
+
+    assert list(result.columns) == gfg.columns_name
+    assert result["DATE"].tolist() == [1, 2]
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+import newsfeed.news.db.events as events
+import newsfeed.news.db.gkg as gkg_module
+import newsfeed.utils.decoders as decoders
+from newsfeed.news.db.events import EventV2
+from newsfeed.news.db.gkg import GKGV2
+from newsfeed.news.db.schema import EVENTS_V2_DTYPES
+from newsfeed.utils.decoders import read_zip_tsv
+from newsfeed.utils.predicates import apply_where, normalize_where, parse_columns
+from test.helpers import FakePool, Response, Session, bilateral_payload, zipped_tsv
+
+
+def test_normalize_where_accepts_tuples_groups_and_dict():
+    available = ["a", "b"]
+
+    assert normalize_where([("a", "==", 1)], available) == [[("a", "==", 1)]]
+    assert normalize_where([[("a", "==", 1)], [("b", "IN", (2, 3))]], available) == \
+        [[("a", "==", 1)], [("b", "in", [2, 3])]]
+    assert normalize_where({"a": 1, "b": [2, 3]}, available) == \
+        [[("a", "==", 1), ("b", "in", [2, 3])]]
+    assert normalize_where(None, available) is None
+    assert parse_columns(["b"], [[("a", "==", 1), ("b", "==", 2)]]) == ["b", "a"]
+
+    with pytest.raises(ValueError, match="Unknown column"):
+        normalize_where([("c", "==", 1)], available)
+    with pytest.raises(ValueError, match="Unknown operator"):
+        normalize_where([("a", "~", 1)], available)
+
+
+def test_apply_where_handles_codes_regex_and_missing_values():
+    columns = EventV2.columns_name_events
+    df = read_zip_tsv(io.BytesIO(bilateral_payload(columns)), names=columns, dtype=EVENTS_V2_DTYPES)
+    df.attrs["source_file"] = "x.export.CSV.zip"
+    df.loc[3, "NumMentions"] = None
+
+    usa = apply_where(df, normalize_where([("Actor1CountryCode", "==", "USA")], columns))
+    themes = apply_where(df, normalize_where([("SOURCEURL", "icontains", "EXAMPLE.COM/A$")], columns))
+    mentions = apply_where(df, normalize_where([("NumMentions", "!=", 5)], columns))
+    codes = apply_where(df, normalize_where([("EventCode", ">=", "040")], columns))
+
+    assert usa["Actor2CountryCode"].tolist() == ["CHN", "RUS"]
+    assert usa.attrs["source_file"] == "x.export.CSV.zip"
+    assert len(themes) == 4
+    assert len(mentions) == 4
+    assert len(codes) == 4
+
+
+def test_event_v2_query_filters_each_file_before_concat(monkeypatch):
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-15-00")
+    payload = bilateral_payload(event.columns_name_events)
+    frame_sizes = []
+    real_concat = events.concat_frames
+
+    def fake_concat(frames):
+        frame_sizes.extend(len(frame) for frame in frames)
+        return real_concat(frames)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(events, "concat_frames", fake_concat)
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    result = event.query(columns=["Actor1CountryCode"], where=[
+        [("Actor1CountryCode", "==", "USA"), ("Actor2CountryCode", "==", "CHN")],
+        [("Actor1CountryCode", "==", "CHN"), ("Actor2CountryCode", "==", "USA")],
+    ])
+
+    assert frame_sizes == [2, 2]
+    assert list(result.columns) == ["Actor1CountryCode"]
+    assert result["Actor1CountryCode"].tolist() == ["USA", "CHN", "USA", "CHN"]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1])
+def test_chunked_parse_filters_each_chunk_before_keeping_it(monkeypatch, chunk_size):
+    columns = EventV2.columns_name_events
+    kept_sizes = []
+    real_concat = decoders.concat_frames
+
+    def fake_concat(frames):
+        kept_sizes.extend(len(frame) for frame in frames)
+        return real_concat(frames)
+
+    monkeypatch.setattr(decoders, "concat_frames", fake_concat)
+    where = normalize_where([("Actor1CountryCode", "==", "USA")], columns)
+
+    result = read_zip_tsv(io.BytesIO(bilateral_payload(columns)), chunk_size=chunk_size,
+                          where=where, names=columns, dtype=EVENTS_V2_DTYPES)
+
+    assert result["Actor2CountryCode"].tolist() == ["CHN", "RUS"]
+    assert kept_sizes == ([] if chunk_size is None else [1, 0, 1, 0])
+
+
+def test_gkg_v2_download_file_applies_where(monkeypatch):
+    gkg = GKGV2()
+    themes_index = gkg.columns_name.index("V2ENHANCEDTHEMES")
+    rows = []
+    for themes in ["TAX_FNCACT_AI,12", "ELECTION,4", "WB_GPT_MODELS,9"]:
+        row = [""] * len(gkg.columns_name)
+        row[themes_index] = themes
+        rows.append(row)
+    payload = zipped_tsv(rows, name="x.gkg.csv")
+    monkeypatch.setattr(gkg_module, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(gkg, "_generate_header", lambda: {})
+    gkg.where = normalize_where([("V2ENHANCEDTHEMES", "icontains", "_ai|gpt")], gkg.columns_name)
+
+    result = gkg._download_file("20210101000000.gkg.csv.zip")
+
+    assert result.iloc[:, themes_index].tolist() == ["TAX_FNCACT_AI,12", "WB_GPT_MODELS,9"]
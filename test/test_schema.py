@@ -0,0 +1,104 @@
+import io
+
+import pandas as pd
+import pytest
+
+import newsfeed.news.db.events as events
+from newsfeed.news.db.events import EventV1, EventV2
+from newsfeed.news.db.schema import (EVENTS_V1_DTYPES, EVENTS_V2_DTYPES,
+                                     MENTIONS_V2_DTYPES, get_dtypes)
+from newsfeed.utils.decoders import concat_frames, read_zip_tsv
+from test.helpers import FakePool, Response, Session, event_row, zipped_tsv
+
+
+def test_schemas_follow_class_column_order():
+    assert list(EVENTS_V1_DTYPES) == EventV1.columns_name
+    assert list(EVENTS_V2_DTYPES) == EventV2.columns_name_events
+    assert list(MENTIONS_V2_DTYPES) == EventV2.columns_name_mentions
+    assert get_dtypes("event", "v2", "mentions") is MENTIONS_V2_DTYPES
+
+
+def test_typed_parse_keeps_codes_and_uses_compact_dtypes():
+    columns = EventV2.columns_name_events
+    payload = zipped_tsv([event_row("010", "USA", columns), event_row("190", "CHN", columns)])
+
+    df = read_zip_tsv(io.BytesIO(payload), names=columns, dtype=EVENTS_V2_DTYPES)
+
+    assert df["EventCode"].tolist() == ["010", "190"]
+    assert isinstance(df["Actor1CountryCode"].dtype, pd.CategoricalDtype)
+    assert df["GLOBALEVENTID"].dtype == "Int64"
+    assert df["GoldsteinScale"].dtype == "float32"
+    assert df["ActionGeo_Lat"].dtype == "float32"
+    assert df["NumMentions"].isna().all()
+
+
+def test_typed_parse_coerces_malformed_values():
+    columns = EventV2.columns_name_events
+    bad = event_row("010", "USA", columns)
+    bad[columns.index("NumMentions")] = "not-a-number"
+    payload = zipped_tsv([bad, event_row("190", "CHN", columns)])
+
+    df = read_zip_tsv(io.BytesIO(payload), names=columns, dtype=EVENTS_V2_DTYPES)
+
+    assert len(df) == 2
+    assert df["NumMentions"].dtype == "Int32"
+    assert df["NumMentions"].isna().all()
+
+
+def test_coerced_parse_keeps_leading_zeros_and_concatenates_with_typed_files():
+    columns = EventV2.columns_name_events
+    bad = event_row("040", "USA", columns)
+    bad[columns.index("NumMentions")] = "x"
+
+    coerced = read_zip_tsv(io.BytesIO(zipped_tsv([bad])), names=columns, dtype=EVENTS_V2_DTYPES)
+    typed = read_zip_tsv(io.BytesIO(zipped_tsv([event_row("190", "CHN", columns)])),
+                         names=columns, dtype=EVENTS_V2_DTYPES)
+    result = concat_frames([coerced, typed])
+
+    assert coerced["EventCode"].tolist() == ["040"]
+    assert coerced["GLOBALEVENTID"].dtype == "Int64"
+    assert coerced["GoldsteinScale"].dtype == "float32"
+    assert result["EventCode"].tolist() == ["040", "190"]
+    assert result["EventRootCode"].tolist() == ["04", "19"]
+    assert result["NumMentions"].isna().all()
+
+
+def test_concat_frames_keeps_categoricals_with_different_categories():
+    first = pd.DataFrame({"code": pd.Categorical(["USA"]), "n": [1]})
+    second = pd.DataFrame({"code": pd.Categorical(["CHN"]), "n": [2]})
+
+    result = concat_frames([first, second])
+
+    assert isinstance(result["code"].dtype, pd.CategoricalDtype)
+    assert result["code"].tolist() == ["USA", "CHN"]
+    assert result.index.tolist() == [0, 1]
+
+
+def test_event_v2_query_parses_only_requested_columns(monkeypatch):
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-15-00")
+    columns = event.columns_name_events
+    payload = zipped_tsv([event_row("010", "USA", columns)])
+    requested = {}
+
+    def fake_read_zip_tsv(fileobj, chunk_size=None, **kwargs):
+        requested.update(kwargs)
+        return read_zip_tsv(fileobj, chunk_size=chunk_size, **kwargs)
+
+    monkeypatch.setattr(events, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(events, "read_zip_tsv", fake_read_zip_tsv)
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    result = event.query(columns=["SOURCEURL", "EventCode"])
+
+    assert requested["usecols"] == ["SOURCEURL", "EventCode"]
+    assert list(result.columns) == ["SOURCEURL", "EventCode"]
+    assert result["EventCode"].tolist() == ["010", "010"]
+    assert isinstance(result["EventCode"].dtype, pd.CategoricalDtype)
+
+
+def test_query_rejects_unknown_columns():
+    event = EventV1(start_date="2021-01-01", end_date="2021-01-01")
+
+    with pytest.raises(ValueError, match="NotAColumn"):
+        event.query(columns=["SQLDATE", "NotAColumn"])
@@ -0,0 +1,322 @@
+import asyncio
+import sys
+import tempfile
+import threading
+
+import aiohttp
+
+import pandas as pd
+import pytest
+
+import newsfeed.__main__ as cli
+import newsfeed.news.db.events as events
+import newsfeed.news.db.others as others
+from newsfeed.news.db.events import EventV2
+from newsfeed.news.db.others import GAL, GEG
+import newsfeed.utils.async_downloader as async_downloader
+import newsfeed.utils.decoders as decoders
+from newsfeed.utils.async_downloader import AdaptiveLimiter, AsyncDownloader
+from newsfeed.utils.cache import CacheManager
+from newsfeed.utils.predicates import apply_where
+from newsfeed.utils.stream import rebatch
+import test.helpers as helpers
+from test.helpers import FakePool, Response, Session, bilateral_payload, gzip_jsonl, serve_zips
+
+
+class FakeIncrementalManager:
+
+    def __init__(self):
+        self.saved = []
+        self.checkpointed = []
+
+    def get_new_files(self, files, **kwargs):
+        return files[1:]
+
+    def record_downloaded(self, files, **kwargs):
+        self.checkpointed.extend(files)
+
+    def save_query_history(self, files, **kwargs):
+        self.saved.append(list(files))
+
+
+def test_rebatch_regroups_frames_into_fixed_size_batches():
+    frames = [pd.DataFrame({"n": range(start, start + size)})
+              for start, size in [(0, 3), (3, 0), (3, 4), (7, 2)]]
+
+    batches = list(rebatch(iter(frames), batch_rows=4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 1]
+    assert pd.concat(batches)["n"].tolist() == list(range(9))
+    assert batches[1].index.tolist() == [0, 1, 2, 3]
+    assert [len(frame) for frame in rebatch(frames)] == [3, 0, 4, 2]
+    with pytest.raises(ValueError):
+        list(rebatch(frames, batch_rows=0))
+
+
+def test_event_v2_iter_query_yields_each_file_and_saves_history(tmp_path, monkeypatch):
+    event = EventV2(start_date="2021-01-01-00-00-00", end_date="2021-01-01-00-30-00",
+                    use_incremental=True)
+    event.incremental_manager = FakeIncrementalManager()
+    event.cache_manager = CacheManager(tmp_path)
+    payload = bilateral_payload(event.columns_name_events)
+    monkeypatch.setattr(events, "get_session", lambda: Session(lambda url, **kwargs: Response(payload)))
+    monkeypatch.setattr(events.multiprocessing, "Pool", FakePool)
+    monkeypatch.setattr(event, "_generate_header", lambda: {})
+
+    stream = event.iter_query(columns=["Actor2CountryCode"],
+                              where=[("Actor1CountryCode", "==", "USA")])
+    first = next(stream)
+
+    assert list(first.columns) == ["Actor2CountryCode"]
+    assert first["Actor2CountryCode"].tolist() == ["CHN", "RUS"]
+    assert event.incremental_manager.saved == []
+
+    rest = list(stream)
+
+    # The first file is recorded as downloaded but missing from the granule
+    # store, so it is fetched again to return the whole window
+    assert len(rest) == 2
+    assert event.incremental_manager.saved == [[
+        "20210101000000.export.CSV.zip",
+        "20210101001500.export.CSV.zip",
+        "20210101003000.export.CSV.zip",
+    ]]
+    assert len(event.bytes_fetched) == 3
+
+
+def test_gal_iter_query_drops_duplicates_across_files(monkeypatch):
+    gal = GAL(start_date="2020-01-01-00-01-00", end_date="2020-01-01-00-02-00")
+    monkeypatch.setattr(gal, "_download_file", lambda url: pd.DataFrame([
+        {"url": "https://example.com/a", "title": url},
+        {"url": "https://example.com/" + url, "title": url},
+    ]))
+    monkeypatch.setattr(others.multiprocessing, "Pool", FakePool)
+
+    frames = list(gal.iter_query())
+
+    assert [list(frame.columns) for frame in frames] == [gal.columns_name] * 2
+    assert [frame["url"].tolist() for frame in frames] == [
+        ["https://example.com/a", "https://example.com/20200101000100.gal.json.gz"],
+        ["https://example.com/20200101000200.gal.json.gz"],
+    ]
+
+
+def test_async_iter_files_yields_as_completed_and_stops_early(monkeypatch):
+    started = []
+
+    async def fake_download(self, session, url, semaphore, name=None):
+        async with semaphore:
+            started.append(url)
+            await asyncio.sleep(0.01 if url.endswith("0") else 0)
+            return url, pd.DataFrame({"url": [url]}), None
+
+    monkeypatch.setattr(AsyncDownloader, "_download_single_file", fake_download)
+    downloader = AsyncDownloader(max_concurrent=2)
+
+    names = [str(i) for i in range(10)]
+    stream = downloader.iter_files("https://example.com/", names, show_progress=False)
+    url, df, error = next(stream)
+    stream.close()
+
+    assert url == "https://example.com/1"
+    assert df["url"].tolist() == [url] and error is None
+    assert len(started) < len(names)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def run_round(limiter, clock, seconds, num_bytes=100):
+    clock.now += seconds
+    for _ in range(limiter.limit):
+        limiter.success(num_bytes)
+
+
+def test_adaptive_limiter_grows_with_throughput_and_halves_on_congestion(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(async_downloader, "time", clock)
+    limiter = AdaptiveLimiter(maximum=8, initial=4)
+
+    run_round(limiter, clock, 1.0)   # 400 B/s, first round
+    run_round(limiter, clock, 1.0)   # 500 B/s, improved
+    assert limiter.limit == 6
+
+    run_round(limiter, clock, 1.2)   # 500 B/s, link saturated
+    assert limiter.limit == 6
+
+    limiter.failure(congested=True)
+    limiter.failure(congested=True)
+    assert limiter.limit == 3
+    limiter.failure()
+    assert limiter.limit == 3
+
+    run_round(limiter, clock, 1.0)   # new baseline after the backoff
+    assert limiter.limit == 3
+    assert limiter.peak == 6
+
+
+def test_limiter_bounds_downloads_in_flight():
+    limiter = AdaptiveLimiter(maximum=2, initial=2)
+    in_flight = []
+
+    async def download():
+        async with limiter:
+            in_flight.append(limiter.in_flight)
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(download() for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(in_flight) == 2 and limiter.in_flight == 0
+
+
+def test_rate_limited_download_backs_off(monkeypatch):
+    class Throttled:
+        status = 429
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    class ThrottlingSession:
+        def get(self, url, **kwargs):
+            return Throttled()
+
+    downloader = AsyncDownloader(max_concurrent=16)
+    limiter = AdaptiveLimiter(maximum=16, initial=8)
+
+    url, df, error = asyncio.run(
+        downloader._download_single_file(ThrottlingSession(), "https://example.com/a", limiter))
+
+    assert df is None and error == "HTTP 429: https://example.com/a"
+    assert limiter.limit == 4
+
+
+def test_async_downloads_are_parsed_off_the_event_loop(monkeypatch):
+    serve_zips(monkeypatch, bilateral_payload(EventV2.columns_name_events))
+    parsed_on = []
+    read_zip_tsv = decoders.read_zip_tsv
+
+    def recording_read_zip_tsv(*args, **kwargs):
+        parsed_on.append(threading.current_thread().name)
+        return read_zip_tsv(*args, **kwargs)
+
+    monkeypatch.setitem(decoders.DECODERS, "zip_tsv", recording_read_zip_tsv)
+    downloader = AsyncDownloader(read_csv_kwargs={"names": EventV2.columns_name_events},
+                                 parse_workers=2, parse_queue=1)
+
+    frames, errors = asyncio.run(downloader.download_files(
+        "https://example.com/", ["a.zip", "b.zip", "c.zip"], show_progress=False))
+
+    assert errors == [] and [len(frame) for frame in frames] == [4, 4, 4]
+    assert len(parsed_on) == 3
+    assert all(name.startswith("newsfeed-parse") for name in parsed_on)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 2])
+def test_async_downloads_can_be_parsed_in_worker_processes(monkeypatch, chunk_size):
+    serve_zips(monkeypatch, bilateral_payload(EventV2.columns_name_events))
+    downloader = AsyncDownloader(read_csv_kwargs={"names": EventV2.columns_name_events},
+                                 chunk_size=chunk_size, parse_executor="process",
+                                 parse_workers=2)
+
+    results = list(downloader.iter_files("https://example.com/", ["a.zip", "b.zip"],
+                                         show_progress=False))
+
+    assert sorted(url for url, _, _ in results) == ["https://example.com/a.zip",
+                                                    "https://example.com/b.zip"]
+    assert [len(df) for _, df, _ in results] == [4, 4]
+    assert results[0][1].attrs["source_file"] in ["a.zip", "b.zip"]
+
+
+@pytest.mark.parametrize("broken", [False, True])
+def test_process_spool_files_are_removed(tmp_path, monkeypatch, broken):
+    serve_zips(monkeypatch, bilateral_payload(EventV2.columns_name_events))
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    if broken:
+        async def iter_chunked(self, size):
+            yield self.payload[:size]
+            raise aiohttp.ClientPayloadError("connection reset")
+
+        monkeypatch.setattr(helpers.ZipResponse, "iter_chunked", iter_chunked)
+    downloader = AsyncDownloader(read_csv_kwargs={"names": EventV2.columns_name_events},
+                                 chunk_size=2, parse_executor="process", parse_workers=1)
+
+    frames, errors = asyncio.run(downloader.download_files(
+        "https://example.com/", ["a.zip", "b.zip"], show_progress=False))
+
+    assert len(errors) == (2 if broken else 0)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_parse_executor_is_rejected():
+    with pytest.raises(ValueError, match="parse_executor"):
+        AsyncDownloader(parse_executor="gpu")
+    with pytest.raises(ValueError, match="payload"):
+        AsyncDownloader(payload="xml")
+
+
+def test_geg_streams_gzip_json_lines_through_the_proxy(monkeypatch):
+    row = dict(zip(GEG.columns_name, ["2020-01-01", "https://example.com/a", "en", 0, 0, 0, []]))
+    requested = serve_zips(monkeypatch, gzip_jsonl([row, row]))
+    geg = GEG(start_date="2020-01-01", end_date="2020-01-02", use_async=True,
+              proxy={"http": "http://proxy:3128", "https": "http://proxy:3129"})
+    urls = ["http://example.com/1.geg.json.gz", "https://example.com/2.geg.json.gz"]
+    monkeypatch.setattr(geg, "_query_list", lambda: urls)
+
+    frames = list(geg.iter_query())
+
+    assert sorted(requested) == [(urls[0], "http://proxy:3128"), (urls[1], "http://proxy:3129")]
+    assert [list(frame.columns) for frame in frames] == [GEG.columns_name] * 2
+    assert sorted(geg.bytes_fetched) == urls
+
+
+def test_cli_stream_appends_csv(tmp_path, monkeypatch):
+    output_path = tmp_path / "events.csv"
+
+    class FakeEventV2:
+        def __init__(self, **kwargs):
+            pass
+
+        def iter_query(self, columns=None):
+            assert columns == ["GLOBALEVENTID"]
+            yield pd.DataFrame({"GLOBALEVENTID": [1, 2]})
+            yield pd.DataFrame({"GLOBALEVENTID": [3]})
+
+    monkeypatch.setattr(cli, "EventV2", FakeEventV2)
+    monkeypatch.setattr(sys, "argv", [
+        "newsfeed", "--db", "EVENT", "--version", "V2",
+        "--start", "2021-01-01-00-00-00", "--end", "2021-01-01-00-15-00",
+        "--columns", "GLOBALEVENTID", "--stream", "--output", str(output_path),
+    ])
+
+    cli.main()
+
+    assert pd.read_csv(output_path)["GLOBALEVENTID"].tolist() == [1, 2, 3]
+
+
+def test_registered_decoders_parse_async_downloads(monkeypatch):
+    serve_zips(monkeypatch, b"a,b\n1,2\n")
+    monkeypatch.setattr(decoders, "DECODERS", dict(decoders.DECODERS))
+    monkeypatch.setattr(decoders, "DATASET_PAYLOADS", dict(decoders.DATASET_PAYLOADS))
+
+    def read_plain_csv(fileobj, chunk_size=None, where=None, **kwargs):
+        return apply_where(pd.read_csv(fileobj, **kwargs), where)
+
+    decoders.register_decoder("plain_csv", read_plain_csv, datasets=["custom"])
+    downloader = AsyncDownloader(payload=decoders.payload_for("CUSTOM"))
+
+    frames, errors = asyncio.run(downloader.download_files(
+        "https://example.com/", ["a.csv"], show_progress=False))
+
+    assert errors == [] and frames[0].to_dict("records") == [{"a": 1, "b": 2}]
+    assert decoders.payload_for("gsg") == "gzip_jsonl"
@@ -0,0 +1,120 @@
+import json
+
+import pandas as pd
+
+import newsfeed.__main__ as cli
+from newsfeed.utils.writers import get_writer, write_frames
+
+
+def frames():
+    yield pd.DataFrame({"id": [1, 2], "code": pd.Categorical(["USA", "CHN"]), "author": [None, None]})
+    yield pd.DataFrame({"id": [3], "code": pd.Categorical(["FRA"]), "author": ["Ann"]})
+
+
+def expected_records():
+    return [
+        {"id": 1, "code": "USA", "author": None},
+        {"id": 2, "code": "CHN", "author": None},
+        {"id": 3, "code": "FRA", "author": "Ann"},
+    ]
+
+
+def test_write_frames_round_trips_every_format(tmp_path):
+    for output_format in ["csv", "json", "ndjson", "parquet"]:
+        path = tmp_path / ("results." + output_format)
+
+        assert write_frames(frames(), str(path), output_format) == 3
+
+        if output_format == "csv":
+            records = pd.read_csv(path).astype(object).where(lambda df: df.notna(), None).to_dict("records")
+        elif output_format == "json":
+            records = json.loads(path.read_text(encoding="utf-8"))
+        elif output_format == "ndjson":
+            records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        else:
+            records = pd.read_parquet(path).to_dict("records")
+        assert records == expected_records(), output_format
+
+
+def test_empty_streams_leave_valid_files(tmp_path):
+    json_path = tmp_path / "empty.json"
+    parquet_path = tmp_path / "empty.parquet"
+
+    assert write_frames(iter([]), str(json_path), "json") == 0
+    assert write_frames(iter([]), str(parquet_path), "parquet") == 0
+
+    assert json.loads(json_path.read_text(encoding="utf-8")) == []
+    assert len(pd.read_parquet(parquet_path)) == 0
+
+
+def test_rows_reach_disk_before_the_stream_ends(tmp_path):
+    path = tmp_path / "results.ndjson"
+    seen_on_disk = []
+
+    def stream():
+        yield pd.DataFrame({"id": [1]})
+        seen_on_disk.append(path.read_text(encoding="utf-8"))
+        yield pd.DataFrame({"id": [2]})
+
+    with get_writer(str(path), "ndjson") as writer:
+        for df in stream():
+            writer.write(df)
+
+    assert seen_on_disk == ['{"id":1}\n']
+    assert writer.rows == 2
+
+
+def test_save_results_consumes_a_stream_of_frames(tmp_path):
+    path = tmp_path / "results.parquet"
+
+    assert cli.save_results(frames(), str(path), "parquet") == "parquet"
+    assert pd.read_parquet(path)["id"].tolist() == [1, 2, 3]
+
+    txt_path = tmp_path / "results.txt"
+    assert cli.save_results(frames(), str(txt_path), "txt") == "csv"
+    assert pd.read_csv(txt_path)["id"].tolist() == [1, 2, 3]
+
+
+def test_parquet_widens_columns_whose_dtype_drifts(tmp_path):
+    path = tmp_path / "results.parquet"
+    drifting = [
+        pd.DataFrame({"id": [1, 2], "tone": [1, 2], "code": [1.5, 2.0]}),
+        pd.DataFrame({"id": [3], "tone": [1.5], "code": [3.0]}),
+        pd.DataFrame({"id": [4], "tone": [None], "code": ["b"]}),
+    ]
+
+    assert write_frames(iter(drifting), str(path), "parquet") == 4
+
+    result = pd.read_parquet(path)
+    assert result["id"].dtype == "int64"
+    assert result["tone"].tolist()[:3] == [1.0, 2.0, 1.5] and pd.isna(result["tone"][3])
+    assert result["code"].tolist() == ["1.5", "2", "3", "b"]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_frames_with_new_or_reordered_columns_stay_aligned(tmp_path):
+    for output_format in ["csv", "json", "ndjson", "parquet"]:
+        path = tmp_path / ("results." + output_format)
+        shifting = [
+            pd.DataFrame({"id": [1], "url": ["https://a"]}),
+            pd.DataFrame({"url": ["https://b"], "id": [2], "title": ["B"]}),
+            pd.DataFrame({"id": [3]}),
+        ]
+
+        assert write_frames(iter(shifting), str(path), output_format) == 3
+
+        if output_format == "csv":
+            result = pd.read_csv(path)
+        elif output_format == "json":
+            result = pd.DataFrame(json.loads(path.read_text(encoding="utf-8")))
+        elif output_format == "ndjson":
+            result = pd.read_json(path, lines=True)
+        else:
+            result = pd.read_parquet(path)
+            assert result["id"].dtype == "int64"
+        assert list(result.columns) == ["id", "url", "title"], output_format
+        assert result["id"].tolist() == [1, 2, 3], output_format
+        assert result["url"].where(result["url"].notna(), None).tolist() == [
+            "https://a", "https://b", None], output_format
+        assert result["title"].where(result["title"].notna(), None).tolist() == [
+            None, "B", None], output_format